@@ -9,6 +9,7 @@ continuous and includes more and more handy stuff for the daily python
 scripting.
 """
 
+import sys
 from . import __pkginfo__
 
 __version__   = __pkginfo__.version
@@ -23,9 +24,34 @@ __copyright__ = __pkginfo__.copyright
 from .fspath import FSPath
 from .fspath import callEXE
 from .fspath import DevNull
+from .fsstat import FSStat
 
-from .cli    import CLI
 from .os_env import OS_ENV
-from ._which import which
 
-from .progressbar import progressbar
+from .progressbar import progressbar, ProgressBar
+
+# The names below pull in heavy modules (e.g. ``argparse``), they are imported
+# on first access (PEP 562).  Pythons older than 3.7 import them right away.
+
+_LAZY = {
+    'CLI'     : '.cli'
+    , 'which' : '._which'
+}
+
+if sys.version_info >= (3, 7):
+
+    def __getattr__(name):
+        modname = _LAZY.get(name)
+        if modname is None:
+            raise AttributeError("module %r has no attribute %r" % (__name__, name))
+        import importlib  # pylint: disable=import-outside-toplevel
+        obj = getattr(importlib.import_module(modname, __name__), name)
+        globals()[name] = obj
+        return obj
+
+    def __dir__():
+        return sorted(list(globals()) + list(_LAZY))
+
+else:
+    from .cli    import CLI      # pylint: disable=unused-import
+    from ._which import which    # pylint: disable=unused-import
@@ -3,7 +3,6 @@
 """
 python package meta informations
 """
-import platform
 
 package      = 'fspath'
 version      = '20230629'
@@ -17,6 +16,7 @@ keywords     = "path-names development"
 
 def get_entry_points():
     """get entry points of the python package"""
+    import platform  # pylint: disable=import-outside-toplevel
     # To not compete with POSIXs 'which', fspaths 'which'
     # will be installed as .py
     _which = 'which.py'
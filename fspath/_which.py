@@ -7,7 +7,6 @@ which - locate a command
 import sys
 import os
 import fspath  # pylint: disable=cyclic-import
-from .cli import CLI
 
 
 # ==============================================================================
@@ -67,6 +66,7 @@ def main():
     u"""
     which command line main function
     """
+    from .cli import CLI  # pylint: disable=import-outside-toplevel
     cli = CLI(description=__doc__, cmdFunc=_which)
 
     cli.add_argument(
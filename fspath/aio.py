@@ -0,0 +1,271 @@
+# -*- coding: utf-8; mode: python -*-
+u"""
+asyncio versions of :py:meth:`fspath.FSPath.download` and
+:py:meth:`fspath.FSPath.extract` (python 3.7+)
+
+The network is read by asyncio streams (a small HTTP/1.1 client, no proxy
+support), the disk writes, the hashing and the decompression run in an
+executor.  Many downloads can run concurrently in one event loop:
+
+.. code-block:: python
+
+   import asyncio
+   from fspath import FSPath
+
+   async def main(urls):
+       await asyncio.gather(*[
+           FSPath(url.split('/')[-1]).adownload(url) for url in urls])
+
+   asyncio.run(main(urls))
+"""
+# pylint: disable=invalid-name
+
+import asyncio
+import ssl
+from urllib.parse import urlsplit, urljoin
+
+from .download import TargetFile, newHash, verify
+
+REDIRECTS = (301, 302, 303, 307, 308)
+MAX_HEADER = 64 * 1024
+
+TIMEOUT = 60
+u"""Default timeout in seconds of the connect and of each read"""
+
+async def _wait(aw, timeout, url):
+    u"""Await ``aw``, ``IOError`` if it takes longer than ``timeout`` seconds
+    (``None``: no timeout)."""
+    if timeout is None:
+        return await aw
+    try:
+        return await asyncio.wait_for(aw, timeout)
+    except asyncio.TimeoutError:
+        raise IOError("%s: timed out after %s seconds" % (url, timeout)) # pylint: disable=raise-missing-from
+
+# ==============================================================================
+class AsyncResponse(object):
+# ==============================================================================
+
+    u"""HTTP/1.1 response read from asyncio streams.
+
+    The body is read by :py:meth:`AsyncResponse.read`, ``Content-Length``,
+    ``chunked`` transfer encoding and *read until close* are supported.  Each
+    read from the network is limited by ``timeout`` seconds.
+    """
+
+    def __init__(self, url, status, reason, headers, reader, writer, timeout=TIMEOUT):
+        # pylint: disable=too-many-arguments
+        self.url     = url
+        self.timeout = timeout
+        self.status  = status
+        self.reason  = reason
+        self.headers = headers
+        self._reader = reader
+        self._writer = writer
+        self._chunked    = 'chunked' in headers.get('transfer-encoding', '').lower()
+        self._chunk_left = 0
+        self._done       = False
+        length = headers.get('content-length')
+        self._remaining = int(length) if length is not None and not self._chunked else None
+
+    def getheader(self, name, default=None):
+        u"""Value of the header ``name``"""
+        return self.headers.get(name.lower(), default)
+
+    async def read(self, size=65536):
+        u"""Read up to ``size`` bytes of the body, ``b''`` at the end of the body."""
+        if self._done:
+            return b''
+        if self._chunked:
+            return await self._readChunked(size)
+        if self._remaining is None:
+            data = await _wait(self._reader.read(size), self.timeout, self.url)
+            self._done = not data
+            return data
+        if not self._remaining:
+            self._done = True
+            return b''
+        data = await _wait(self._reader.read(min(size, self._remaining)), self.timeout, self.url)
+        if not data:
+            raise IOError("%s: connection closed, %d bytes missing" % (self.url, self._remaining))
+        self._remaining -= len(data)
+        return data
+
+    async def _readChunked(self, size):
+        if not self._chunk_left:
+            line = await _wait(self._reader.readline(), self.timeout, self.url)
+            try:
+                self._chunk_left = int(line.split(b';', 1)[0].strip(), 16)
+            except ValueError:
+                raise IOError("%s: invalid chunk size %r" % (self.url, line)) # pylint: disable=raise-missing-from
+            if not self._chunk_left:
+                # last chunk, skip trailers
+                while (await _wait(self._reader.readline(), self.timeout, self.url)) not in (
+                        b'\r\n', b'\n', b''):
+                    pass
+                self._done = True
+                return b''
+        data = await _wait(self._reader.read(min(size, self._chunk_left)), self.timeout, self.url)
+        if not data:
+            raise IOError("%s: connection closed within chunk" % self.url)
+        self._chunk_left -= len(data)
+        if not self._chunk_left:
+            await _wait(self._reader.readline(), self.timeout, self.url)
+        return data
+
+    async def close(self):
+        u"""Close the connection"""
+        self._writer.close()
+        if hasattr(self._writer, 'wait_closed'):
+            try:
+                await self._writer.wait_closed()
+            except (IOError, OSError):
+                pass
+
+# ==============================================================================
+async def aopenURL(url, headers=None, max_redirects=5, timeout=TIMEOUT):
+# ==============================================================================
+    u"""``GET`` request of ``url``, returns a :py:class:`AsyncResponse`.
+
+    Redirects are followed, the caller has to check the status and to close
+    the response.  The connect and each read time out after ``timeout``
+    seconds (``IOError``).
+    """
+    for _ in range(max_redirects + 1):
+        resp = await _request(url, headers or {}, timeout)
+        if resp.status not in REDIRECTS:
+            return resp
+        await resp.close()
+        location = resp.getheader('Location')
+        if not location:
+            raise IOError("%s: redirect without location" % url)
+        url = urljoin(url, location)
+    raise IOError("%s: too many redirects" % url)
+
+async def _request(url, headers, timeout):
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https'):
+        raise ValueError("%s: only HTTP(S) URLs are supported" % url)
+    https = parts.scheme == 'https'
+    reader, writer = await _wait(asyncio.open_connection(
+        parts.hostname, parts.port or (443 if https else 80)
+        , ssl=ssl.create_default_context() if https else None
+        , server_hostname=parts.hostname if https else None
+        , limit=MAX_HEADER), timeout, url)
+
+    target = (parts.path or '/') + ('?' + parts.query if parts.query else '')
+    hdrs = {
+        'Host' : parts.netloc
+        , 'Connection' : 'close'
+        , 'Accept-Encoding' : 'identity'
+        , 'User-Agent' : 'fspath'
+    }
+    hdrs.update(headers)
+    head = ''.join(['GET %s HTTP/1.1\r\n' % target]
+                   + ['%s: %s\r\n' % (k, v) for k, v in hdrs.items()]
+                   + ['\r\n'])
+    writer.write(head.encode('latin-1'))
+
+    try:
+        raw = await _wait(reader.readuntil(b'\r\n\r\n'), timeout, url)
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError) as exc:
+        writer.close()
+        raise IOError("%s: invalid HTTP response header (%s)" % (url, exc)) # pylint: disable=raise-missing-from
+    except IOError:
+        writer.close()
+        raise
+
+    lines = raw.decode('latin-1').split('\r\n')
+    status_line = lines[0].split(None, 2)
+    if len(status_line) < 2 or not status_line[0].startswith('HTTP/'):
+        writer.close()
+        raise IOError("%s: invalid HTTP status line %r" % (url, lines[0]))
+    rsp_headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            rsp_headers[name.strip().lower()] = value.strip()
+    return AsyncResponse(url, int(status_line[1]), (status_line[2:] or [''])[0]
+                         , rsp_headers, reader, writer, timeout)
+
+# ==============================================================================
+async def adownload(fname, url, chunksize=1048576, tick=None, checksum=None, headers=None, executor=None
+                    , timeout=TIMEOUT):
+# ==============================================================================
+
+    u"""Download ``url`` into ``fname``, asyncio version of :py:func:`fspath.download.fetch`.
+
+    The response is read by asyncio streams; writing the chunks into the
+    :py:class:`fspath.download.TargetFile` (and hashing them) runs in the
+    ``executor`` (default: the loop's default executor).  While a chunk is
+    written, the next one is read from the network, but not more: a slow disk
+    holds back the download (backpressure).
+
+    :param tick:     function called in the event loop with ``(down_bytes, max_bytes)``
+    :param checksum: tuple ``(algorithm, hexdigest)``
+    :param timeout:  seconds to wait for the connect and for each read
+                     (``IOError``), ``None`` waits forever
+    """
+    # pylint: disable=too-many-arguments
+    loop = asyncio.get_running_loop()
+    if chunksize is None:
+        chunksize = 1048576
+
+    resp = await aopenURL(url, headers, timeout=timeout)
+    try:
+        if resp.status != 200:
+            raise IOError("%s: HTTP %s %s" % (url, resp.status, resp.reason))
+        max_bytes = int(resp.getheader('Content-Length', 0))
+        h = newHash(checksum)
+        target = await loop.run_in_executor(executor, TargetFile, fname, max_bytes)
+
+        def write(data):
+            target.write(data)
+            if h is not None:
+                h.update(data)
+
+        try:
+            pending    = None
+            down_bytes = 0
+            while 1:
+                data = await resp.read(chunksize)
+                if pending is not None:
+                    await pending
+                if not data:
+                    break
+                pending = loop.run_in_executor(executor, write, data)
+                down_bytes += len(data)
+                if tick:
+                    tick(down_bytes, max_bytes)
+            verify(h, checksum, url)
+        except BaseException:
+            if pending is not None and not pending.done():
+                await asyncio.wait([pending])
+            await loop.run_in_executor(executor, target.abort)
+            raise
+        await loop.run_in_executor(executor, target.commit)
+    finally:
+        await resp.close()
+        if hasattr(fname, 'clearStat'):
+            fname.clearStat()
+
+# ==============================================================================
+async def aextract(archive, folder=".", pwd=None, executor=None, **kwargs):
+# ==============================================================================
+
+    u"""Extract TAR or ZIP ``archive`` into ``folder``, asyncio version of
+    :py:meth:`fspath.FSPath.extract`.
+
+    The extraction runs in the ``executor`` (default: the loop's default
+    executor), the number of workers of the executor limits the number of
+    concurrent extractions.  The ``kwargs`` are passed to ``extract``, with
+    ``stream=True`` the members are also extracted in the executor.
+
+    :return: list of the extracted members
+    """
+    def extract():
+        # consume a generator (stream=True) in the executor, not in the loop
+        return list(archive.extract(folder, pwd, **kwargs))
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, extract)
@@ -0,0 +1,713 @@
+# -*- coding: utf-8; mode: python -*-
+u"""
+archive engine of :py:meth:`fspath.FSPath.extract` & Co.
+"""
+# pylint: disable=invalid-name
+
+import os
+import io
+import stat
+import time
+import zlib
+import struct
+import zipfile
+import tarfile
+from contextlib import closing
+
+import six
+
+from .walker import excludeFilter
+from .download import (openURL, getStatus, getHeader, validator, ifRange, HTTPRangeFile
+                       , copyResponse)
+
+ZIP_MAGIC = (b'PK\x03\x04', b'PK\x05\x06')
+u"""First bytes of a ZIP archive (local file header or empty archive)"""
+
+RANGE_BUFFER = 256 * 1024
+u"""Buffer size of a ZIP archive read by HTTP ``Range`` requests"""
+
+BATCH_SIZE = 4 * 1024 * 1024
+u"""Compressed bytes of the ZIP members passed to a worker in one task (``jobs=N``)"""
+
+# ==============================================================================
+class ArchiveMember(object): # pylint: disable=too-few-public-methods
+# ==============================================================================
+
+    u"""wrapper for an archive member (tar or zip members)"""
+
+    def __init__(self, member, archive):
+        self.ISTAR       = isinstance(archive, tarfile.TarFile)
+        self.ISZIP       = isinstance(archive, zipfile.ZipFile)
+        self.archive     = archive
+        self.skipped     = False
+        self.view        = None   # ZipView of the archive
+        if self.ISTAR:
+            self.member  = member
+            self.name    = _FSPath(member.name)
+            self.size    = member.size
+        elif self.ISZIP:
+            self.member  = member if isinstance(member, zipfile.ZipInfo) else self.archive.getinfo(member)
+            self.name    = _FSPath(self.member.filename)
+            self.size    = self.member.file_size
+
+    def target(self, folder):
+        u"""File name of the extracted member in ``folder``"""
+        if self.ISTAR:
+            return os.path.join(folder, self.member.name)
+        return os.path.join(folder, _zipTarget(self.member.filename))
+
+    def isUnchanged(self, folder):
+        u"""True if the member is a file which has already been extracted into
+        ``folder`` (same size and mtime, for ZIP members the CRC is compared if
+        the mtime differs)."""
+        if self.ISTAR:
+            return _tarUnchanged(self.member, self.target(folder))
+        return _zipUnchanged(self.member, self.target(folder))
+
+    def extract(self, folder="", pwd=None, incremental=False):
+        u"""wrapped extract member function
+
+        With ``incremental=True`` an unchanged member (see
+        :py:meth:`ArchiveMember.isUnchanged`) is not extracted and marked as
+        ``skipped``.
+        """
+        if incremental and self.isUnchanged(folder):
+            self.skipped = True
+            return
+        if self.ISTAR:
+            self.archive.extract(self.member, folder or "")
+        elif self.ISZIP:
+            _zipExtract(self.archive, self.member, folder or None, pwd, incremental)
+        else:
+            raise tarfile.ExtractError("%s archive type is unknown" % self.member)
+
+    def open(self, pwd=None):
+        u"""Open the member for reading (binary file object), ``None`` if the
+        member is not a file.
+
+        The data of a stored (uncompressed) ZIP member is served from the
+        :py:class:`ZipView` of the archive (if there is one) as
+        :py:class:`MemoryReader`, nothing is copied until it is read (the CRC
+        is not tested).
+        """
+        if self.ISTAR:
+            try:
+                return self.archive.extractfile(self.member)
+            except (tarfile.StreamError, KeyError):
+                # a link in a TAR stream or a link to a missing member
+                return None
+        if self.member.filename.endswith('/'):
+            return None
+        if self.view is not None:
+            data = self.view.data(self.member)
+            if data is not None:
+                return MemoryReader(data, self.member.filename)
+        return self.archive.open(self.member, pwd=pwd)
+
+def _stat(fname):
+    try:
+        st = os.lstat(fname)
+    except OSError:
+        return None
+    return st if stat.S_ISREG(st.st_mode) else None
+
+def _tarUnchanged(info, target):
+    if not info.isfile():
+        return False
+    st = _stat(target)
+    return st is not None and st.st_size == info.size and int(st.st_mtime) == int(info.mtime)
+
+def _zipMtime(info):
+    return time.mktime(info.date_time + (0, 0, -1))
+
+def _zipUnchanged(info, target):
+    if info.filename.endswith('/'):
+        return False
+    st = _stat(target)
+    if st is None or st.st_size != info.file_size:
+        return False
+    mtime = _zipMtime(info)
+    # the ZIP format stores the time in steps of two seconds
+    if abs(st.st_mtime - mtime) < 2:
+        return True
+    crc = 0
+    with io.open(target, 'rb') as f:
+        for x in iter(lambda: f.read(1048576), b''):
+            crc = zlib.crc32(x, crc)
+    if (crc & 0xffffffff) != info.CRC:
+        return False
+    os.utime(target, (st.st_atime, mtime))
+    return True
+
+def _zipExtract(arc, info, folder, pwd, incremental):
+    target = arc.extract(info, folder, pwd)
+    if incremental and not info.filename.endswith('/'):
+        # ZipFile.extract does not set the mtime, it is needed by the next
+        # incremental run
+        os.utime(target, (time.time(), _zipMtime(info)))
+
+# ==============================================================================
+def pruneFolder(folder, keep):
+# ==============================================================================
+
+    u"""Remove all files and (empty) folders in ``folder`` which are not in ``keep``.
+
+    :param keep: file names (e.g. from :py:meth:`ArchiveMember.target`), the
+                 folders of these files are kept also
+    :return: list of the removed names
+    """
+    folder = os.path.abspath(folder)
+    keep_set = set()
+    for name in keep:
+        name = os.path.abspath(name)
+        while name not in keep_set and name != folder and len(name) > len(folder):
+            keep_set.add(name)
+            name = os.path.dirname(name)
+
+    removed = []
+    for root, dirs, files in os.walk(folder, topdown=False):
+        for name in files:
+            name = os.path.join(root, name)
+            if name not in keep_set:
+                os.remove(name)
+                removed.append(name)
+        for name in dirs:
+            name = os.path.join(root, name)
+            if name in keep_set:
+                continue
+            if os.path.islink(name):
+                os.remove(name)
+            else:
+                try:
+                    os.rmdir(name)
+                except OSError:
+                    # not empty
+                    continue
+            removed.append(name)
+    return removed
+
+def memberFilter(members=None, include=None, exclude=None):
+    u"""Returns a function which tests the name of an archive member, ``None``
+    if there is nothing to test.
+
+    :param members: names of the members to select
+    :param include: select only names matching these shell-style patterns
+                    (``fnmatch``) or this compiled regular expression
+    :param exclude: skip names matching these patterns (or regular expression)
+    """
+    if members is None and include is None and exclude is None:
+        return None
+    if isinstance(members, six.string_types):
+        members = [members]
+    names = None if members is None else set(x.rstrip('/') for x in members)
+    include, exclude = _compile(include), _compile(exclude)
+
+    def test(name):
+        name = name.rstrip('/')
+        if names is not None and name not in names:
+            return False
+        if include is not None and not include.match(name):
+            return False
+        if exclude is not None and exclude.match(name):
+            return False
+        return True
+    return test
+
+def _compile(patterns):
+    if patterns is None or hasattr(patterns, 'match'):
+        return patterns
+    return excludeFilter(patterns)
+
+def _memberName(info):
+    return info.name if isinstance(info, tarfile.TarInfo) else info.filename
+
+def _FSPath(name):
+    from .fspath import FSPath # pylint: disable=import-outside-toplevel, cyclic-import
+    return FSPath(name)
+
+def openArchive(fname):
+    u"""Open TAR or ZIP archive ``fname``, returns the ``TarFile`` or ``ZipFile`` object."""
+    if zipfile.is_zipfile(fname):
+        return zipfile.ZipFile(fname)
+    if tarfile.is_tarfile(fname):
+        return tarfile.open(fname, 'r:*')
+    raise tarfile.ExtractError("%s archive type is unknown" % fname)
+
+# ==============================================================================
+def openMember(fname, name, pwd=None):
+# ==============================================================================
+
+    u"""Open file ``name`` from the ZIP or TAR archive ``fname`` for reading
+    without extracting it (see :py:meth:`ArchiveMember.open`).
+
+    A member of a TAR archive is found by the seek index of the archive if
+    there is one (see :py:mod:`fspath.tarindex`), otherwise by reading the
+    headers of the archive.
+
+    :raises KeyError: if there is no file ``name`` in the archive
+    """
+    if not zipfile.is_zipfile(fname):
+        from .tarindex import openArchiveMember # pylint: disable=import-outside-toplevel
+        return openArchiveMember(fname, name, build=False)
+    # the opened member holds its own reference to the file (or the map)
+    with zipfile.ZipFile(fname) as arc:
+        view = ZipView(fname)
+        try:
+            m = ArchiveMember(arc.getinfo(name), arc)
+            m.view = view
+            f = m.open(pwd)
+        finally:
+            view.close()
+    if f is None:
+        raise KeyError(name)
+    return f
+
+# ==============================================================================
+def iterMembers(fname, select=None):
+# ==============================================================================
+
+    u"""Generator of the :py:class:`ArchiveMember` objects of the ZIP or TAR
+    archive ``fname``, read a member by :py:meth:`ArchiveMember.open`.
+
+    A TAR archive is read in one pass as stream (``r|*``), a member can only
+    be read *before* the next member is taken from the generator.  The stored
+    members of a ZIP archive are served from a memory map of the archive
+    (see :py:class:`ZipView`).
+
+    .. code-block:: python
+
+       for member in iterMembers('foo.whl', memberFilter(include='*.py')):
+           with member.open() as f:
+               compile(f.read(), member.name, 'exec')
+
+    :param select: function which tests the member names, see :py:func:`memberFilter`
+    """
+    if zipfile.is_zipfile(fname):
+        view = ZipView(fname)
+        with zipfile.ZipFile(fname) as arc:
+            for info in arc.infolist():
+                if select is not None and not select(info.filename):
+                    continue
+                m = ArchiveMember(info, arc)
+                m.view = view
+                yield m
+    else:
+        with io.open(fname, 'rb') as f:
+            with tarfile.open(fileobj=f, mode='r|*') as arc:
+                for info in iterTar(arc):
+                    if select is None or select(info.name):
+                        yield ArchiveMember(info, arc)
+
+# ==============================================================================
+class ZipView(object):
+# ==============================================================================
+
+    u"""Read-only memory map of the ZIP archive ``fname``.
+
+    The data of a stored (uncompressed) member is a slice of the map (a
+    ``memoryview``, zero-copy), e.g. the resources in a wheel or JAR file.
+    The map is closed when :py:meth:`close` is called and the last slice is
+    released.
+    """
+
+    def __init__(self, fname):
+        self.buf = None
+        try:
+            import mmap # pylint: disable=import-outside-toplevel
+            with io.open(fname, 'rb') as f:
+                self.buf = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except (ImportError, ValueError, TypeError, EnvironmentError):
+            # no mmap on this platform / file system
+            pass
+
+    def close(self):
+        u"""Release the map, slices which are still in use stay valid."""
+        if self.buf is not None:
+            self.buf.release()
+            self.buf = None
+
+    def data(self, info):
+        u"""Data of member ``info`` (``memoryview``), ``None`` if the member is
+        compressed or encrypted."""
+        if self.buf is None or info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+            return None
+        offset = info.header_offset
+        head = self.buf[offset:offset + 30].tobytes()
+        if head[:4] != ZIP_MAGIC[0]:
+            return None
+        # the length of the extra field in the local header may differ from
+        # the one in the central directory
+        name_len, extra_len = struct.unpack('<HH', head[26:30])
+        start = offset + 30 + name_len + extra_len
+        return self.buf[start:start + info.file_size]
+
+# ==============================================================================
+class MemoryReader(io.RawIOBase):
+# ==============================================================================
+
+    u"""Read-only, seekable file object of a ``memoryview``.
+
+    :py:meth:`getbuffer` returns the view itself, ``readinto`` copies
+    directly from the view into the buffer of the caller.
+    """
+
+    def __init__(self, view, name=None):
+        super(MemoryReader, self).__init__()
+        self.view = view
+        self.name = name
+        self.pos  = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def getbuffer(self):
+        u"""The data (``memoryview``, zero-copy)"""
+        return self.view
+
+    def readinto(self, b):
+        n = max(0, min(len(b), len(self.view) - self.pos))
+        b[:n] = self.view[self.pos:self.pos + n]
+        self.pos += n
+        return n
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = len(self.view) - self.pos
+        data = self.view[self.pos:self.pos + size].tobytes()
+        self.pos += len(data)
+        return data
+
+    def readall(self):
+        return self.read()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            offset += len(self.view)
+        if offset < 0:
+            raise ValueError("negative seek position %s" % offset)
+        self.pos = offset
+        return self.pos
+
+    def tell(self):
+        return self.pos
+
+# ==============================================================================
+def extractArchive(fname, folder, pwd=None, tick=None, jobs=1, stream=False, incremental=False, prune=False
+                   , select=None):
+# ==============================================================================
+
+    u"""Extract TAR or ZIP archive ``fname`` into ``folder``.
+
+    :param tick: function called with ``(member, counter, max_count)`` before
+                 (``jobs=1``) or after (``jobs=N``) a member is extracted,
+                 ``member`` is a :py:class:`ArchiveMember`
+    :param jobs: number of processes extracting the members of a ZIP archive,
+                 see :py:func:`extractZipParallel` (ignored for TAR archives)
+    :param stream: return a generator, see :py:func:`iterExtract`
+    :param incremental: don't extract unchanged files, see
+                 :py:meth:`ArchiveMember.isUnchanged`
+    :param prune: remove files from ``folder`` which are not in the archive
+                 (or not selected), see :py:func:`pruneFolder`, the archive
+                 ``fname`` itself is kept
+    :param select: function which tests the member names, see
+                 :py:func:`memberFilter`.  The names are tested before any
+                 data is read, for ZIP archives the names are taken from the
+                 central directory, unselected members are not touched.
+    :return: list of :py:class:`ArchiveMember`
+    """
+    # pylint: disable=too-many-arguments
+    if stream:
+        return iterExtract(fname, folder, pwd, tick, incremental, prune, select)
+    arc = openArchive(fname)
+    if isinstance(arc, tarfile.TarFile):
+        am = list(arc.getmembers())
+    else:
+        am = arc.infolist()
+    if select is not None:
+        am = [x for x in am if select(_memberName(x))]
+
+    if isinstance(arc, zipfile.ZipFile) and jobs > 1 and len(am) > 1:
+        members = extractZipParallel(fname, arc, am, folder, pwd, tick, jobs, incremental)
+    else:
+        mx = len(am)
+        members = []
+        for c, m in enumerate(am, start=1):
+            m = ArchiveMember(m, arc)
+            members.append(m)
+            if tick:
+                tick(m, c, mx)
+            m.extract(folder, pwd, incremental)
+    if prune:
+        pruneFolder(folder, [fname] + [m.target(folder) for m in members])
+    return members
+
+# ==============================================================================
+def iterExtract(fname, folder, pwd=None, tick=None, incremental=False, prune=False, select=None):
+# ==============================================================================
+
+    u"""Generator which extracts TAR or ZIP archive ``fname`` into ``folder``
+    and yields the :py:class:`ArchiveMember` objects one by one.
+
+    A TAR archive is read in one pass as stream (``r|*``), each member is
+    extracted as soon as its header is read and the members are not
+    collected (constant memory).  The members can't be extracted again from
+    the yielded objects.  In this mode ``tick`` is called with ``(member,
+    read_bytes, archive_size)``, for ZIP archives with ``(member, counter,
+    max_count)``.
+
+    For ``incremental``, ``prune`` and ``select`` see
+    :py:func:`extractArchive`, the folder is pruned when the generator is
+    exhausted.
+
+    Nothing is extracted until the generator is consumed:
+
+    .. code-block:: python
+
+       for member in iterExtract('foo.tar.gz', '/tmp/foo'):
+           print(member.name)
+    """
+    # pylint: disable=too-many-arguments
+    keep = set()
+    if zipfile.is_zipfile(fname):
+        with zipfile.ZipFile(fname) as arc:
+            infos = arc.infolist()
+            if select is not None:
+                infos = [x for x in infos if select(x.filename)]
+            for c, info in enumerate(infos, start=1):
+                m = ArchiveMember(info, arc)
+                if tick:
+                    tick(m, c, len(infos))
+                m.extract(folder, pwd, incremental)
+                if prune:
+                    keep.add(m.target(folder))
+                yield m
+    else:
+        size = os.path.getsize(fname)
+        with io.open(fname, 'rb') as f:
+            reader = StreamReader(f)
+            with tarfile.open(fileobj=reader, mode='r|*') as arc:
+                for info in iterTar(arc):
+                    if select is not None and not select(info.name):
+                        continue
+                    m = ArchiveMember(info, arc)
+                    if tick:
+                        tick(m, reader.received, size)
+                    m.extract(folder, incremental=incremental)
+                    if prune:
+                        keep.add(m.target(folder))
+                    yield m
+    if prune:
+        keep.add(fname)
+        pruneFolder(folder, keep)
+
+def _zipTarget(name):
+    u"""Relative file name of a ZIP member on disk (sanitized like ``ZipFile.extract`` does)"""
+    name = name.replace('/', os.path.sep)
+    if os.path.altsep:
+        name = name.replace(os.path.altsep, os.path.sep)
+    name = os.path.splitdrive(name)[1]
+    invalid = ('', os.path.curdir, os.path.pardir)
+    return os.path.sep.join(x for x in name.split(os.path.sep) if x not in invalid)
+
+_WORKER_ZIP = None
+
+def _initZipWorker(fname, pwd):
+    global _WORKER_ZIP # pylint: disable=global-statement
+    _WORKER_ZIP = zipfile.ZipFile(fname)
+    if pwd:
+        _WORKER_ZIP.setpassword(pwd)
+
+def _extractZipBatch(args):
+    folder, indices, incremental = args
+    infos = _WORKER_ZIP.infolist()
+    skipped = []
+    for i in indices:
+        if incremental and _zipUnchanged(infos[i], os.path.join(folder, _zipTarget(infos[i].filename))):
+            skipped.append(i)
+            continue
+        _zipExtract(_WORKER_ZIP, infos[i], folder, None, incremental)
+    return indices, skipped
+
+def _batches(infos, positions, size):
+    batch, batch_size = [], 0
+    # big members first: the last tasks are small, the workers finish together
+    for i in sorted(positions, key=lambda i: -infos[i].compress_size):
+        batch.append(i)
+        batch_size += infos[i].compress_size
+        if batch_size >= size:
+            yield batch
+            batch, batch_size = [], 0
+    if batch:
+        yield batch
+
+# ==============================================================================
+def extractZipParallel(fname, arc, infos, folder, pwd=None, tick=None, jobs=2, incremental=False):
+# ==============================================================================
+
+    u"""Extract the members ``infos`` of ZIP archive ``arc`` (file name
+    ``fname``) by a pool of ``jobs`` processes.
+
+    The members of a ZIP archive are compressed independently, each worker
+    process opens its own ``ZipFile`` handle and extracts batches of members
+    (about :py:data:`BATCH_SIZE` compressed bytes).  The folders are created
+    up front, ``tick`` is called for each member when its batch is complete.
+    With ``incremental`` the workers skip unchanged members.
+
+    :return: list of :py:class:`ArchiveMember`
+    """
+    # pylint: disable=too-many-arguments, import-outside-toplevel
+    import multiprocessing
+
+    folder = os.path.abspath(folder)
+    dirs = set()
+    for info in infos:
+        name = _zipTarget(info.filename)
+        dirs.add(name if info.filename.endswith('/') else os.path.dirname(name))
+    for d in sorted(dirs):
+        target = os.path.join(folder, d)
+        if d and not os.path.isdir(target):
+            os.makedirs(target)
+
+    # the workers address the members by their position in the archive
+    all_infos = arc.infolist()
+    position  = dict((id(info), i) for i, info in enumerate(all_infos))
+    members   = [ArchiveMember(info, arc) for info in infos]
+    by_pos    = dict((position[id(m.member)], m) for m in members)
+    counter = 0
+    pool = multiprocessing.Pool(jobs, _initZipWorker, (fname, pwd))
+    try:
+        tasks = [(folder, batch, incremental) for batch in _batches(all_infos, by_pos, BATCH_SIZE)]
+        for indices, skipped in pool.imap_unordered(_extractZipBatch, tasks):
+            for i in skipped:
+                by_pos[i].skipped = True
+            for i in indices:
+                counter += 1
+                if tick:
+                    tick(by_pos[i], counter, len(members))
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+    return members
+
+# ==============================================================================
+class StreamReader(object):
+# ==============================================================================
+
+    u"""File object which reads a ``head`` (already read bytes) and the rest
+    from file object ``fileobj``, counts the bytes read (``received``)."""
+
+    def __init__(self, fileobj, head=b''):
+        self.fileobj  = fileobj
+        self.head     = head
+        self.received = 0
+
+    def read(self, size=-1):
+        u"""Read up to ``size`` bytes (all if ``size < 0``)"""
+        if self.head:
+            if size is None or size < 0:
+                x, self.head = self.head + self.fileobj.read(), b''
+            else:
+                x, self.head = self.head[:size], self.head[size:]
+        elif size is None or size < 0:
+            x = self.fileobj.read()
+        else:
+            x = self.fileobj.read(size)
+        self.received += len(x)
+        return x
+
+def _readHead(resp, size):
+    head = b''
+    while len(head) < size:
+        x = resp.read(size - len(head))
+        if not x:
+            break
+        head += x
+    return head
+
+# ==============================================================================
+def extractURL(url, folder, pwd=None, tick=None):
+# ==============================================================================
+
+    u"""Extract the TAR or ZIP archive at ``url`` into ``folder`` while it is
+    downloaded, no intermediate archive file is written.
+
+    The type of the archive is detected from the first bytes of the response:
+
+    - a TAR archive (compressed or not) is read as stream
+      (``tarfile.open(mode='r|*')``), each member is written to disk as soon
+      as it has arrived.
+
+    - a ZIP archive has its directory at the end.  If the server supports
+      ``Range`` requests the archive is read by a :py:class:`HTTPRangeFile`:
+      the directory is fetched first, then the members in the order they are
+      stored in the archive (which is one sequential stream).  Otherwise the
+      response is spooled into an anonymous temporary file in ``folder``.
+
+    :param tick: function called with ``(name, down_bytes, max_bytes)`` after
+                 each member, ``down_bytes`` are the (compressed) bytes
+                 received, ``max_bytes`` the ``Content-Length`` (``0`` if unknown)
+    :return: list with the names of the members
+    """
+    with closing(openURL(url)) as resp:
+        if getStatus(resp) != 200:
+            raise IOError("%s: HTTP %s" % (url, getStatus(resp)))
+        max_bytes = int(getHeader(resp, 'Content-Length', 0))
+        head = _readHead(resp, 4)
+        if head not in ZIP_MAGIC:
+            stream = StreamReader(resp, head)
+            return _extractTarStream(stream, folder, tick, max_bytes)
+
+        if_range = ifRange(validator(resp))
+        ranges = (max_bytes and if_range
+                  and (getHeader(resp, 'Accept-Ranges') or '').lower() == 'bytes')
+        if not ranges:
+            # spool into a temporary file
+            import tempfile # pylint: disable=import-outside-toplevel
+            with tempfile.TemporaryFile(dir=folder) as f:
+                f.write(head)
+                copyResponse(resp, f.write)
+                f.seek(0)
+                return _extractZip(f, folder, pwd, tick, f.tell, max_bytes)
+
+    raw = HTTPRangeFile(url, max_bytes, if_range)
+    with closing(raw):
+        f = io.BufferedReader(raw, RANGE_BUFFER)
+        return _extractZip(f, folder, pwd, tick, lambda: raw.received, max_bytes)
+
+def _extractTarStream(stream, folder, tick, max_bytes):
+    names = []
+    with tarfile.open(fileobj=stream, mode='r|*') as arc:
+        for member in iterTar(arc):
+            arc.extract(member, folder)
+            names.append(member.name)
+            if tick:
+                tick(member.name, stream.received, max_bytes)
+    return names
+
+def iterTar(arc):
+    u"""Iterate over the members of TAR archive ``arc`` (opened in stream mode
+    ``r|*``) without collecting them in ``arc.members`` (constant memory)."""
+    while True:
+        info = arc.next()
+        if info is None:
+            return
+        # TarFile.next() appends each member to TarFile.members
+        arc.members = []
+        yield info
+
+def _extractZip(f, folder, pwd, tick, received, max_bytes):
+    names = []
+    with zipfile.ZipFile(f) as arc:
+        # in order of the offsets: one sequential stream
+        for info in sorted(arc.infolist(), key=lambda x: x.header_offset):
+            arc.extract(info, folder, pwd)
+            names.append(info.filename)
+            if tick:
+                tick(info.filename, received(), max_bytes)
+    return names
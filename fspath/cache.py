@@ -0,0 +1,290 @@
+# -*- coding: utf-8; mode: python -*-
+u"""
+local content-addressed cache of :py:meth:`fspath.FSPath.download`
+"""
+# pylint: disable=invalid-name
+
+import os
+import io
+import json
+import errno
+import time
+import hashlib
+from contextlib import closing
+
+from six.moves.urllib.error import HTTPError  # pylint: disable=E0401
+
+from .download import (openURL, getStatus, getHeader, validator, copyResponse
+                       , TargetFile, ChecksumError, newHash, verify, hashFile, _replace)
+from .filecopy import copyData, _reflink
+
+MAX_SIZE = 5 * 1024 * 1024 * 1024
+u"""Default size limit of the cache in bytes (5 GiB)"""
+
+def defaultCacheDir():
+    u"""Folder of the download cache.
+
+    ``$FSPATH_CACHE_DIR`` or ``fspath/downloads`` in ``$XDG_CACHE_HOME``
+    (default ``~/.cache``).
+    """
+    folder = os.environ.get('FSPATH_CACHE_DIR')
+    if folder:
+        return folder
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'fspath', 'downloads')
+
+def _makedirs(folder):
+    try:
+        os.makedirs(folder)
+    except OSError as exc:
+        if exc.errno != errno.EEXIST:
+            raise
+
+# ==============================================================================
+def placeFile(src, dst, hardlink=True):
+# ==============================================================================
+
+    u"""Put the content of file ``src`` at ``dst`` (an existing ``dst`` is replaced).
+
+    The cheapest method is used: a reflink (copy-on-write clone, e.g. btrfs or
+    XFS), a hard link (if ``hardlink`` is true) or a copy.  The new file
+    appears atomically under the name ``dst``.
+
+    :return: the method used, ``'reflink'``, ``'hardlink'`` or ``'copy'``
+    """
+    target = TargetFile(dst)
+    try:
+        with io.open(src, 'rb') as f:
+            if _reflink(f.fileno(), target.fd):
+                target.commit()
+                return 'reflink'
+            if hardlink and hasattr(os, 'link'):
+                target.abort()
+                if os.path.exists(dst) and os.path.samestat(os.fstat(f.fileno()), os.stat(dst)):
+                    # already a hard link of src: rename() would be a no-op
+                    # and leave the temporary link behind
+                    return 'hardlink'
+                try:
+                    os.link(src, target.name)
+                    _replace(target.name, dst)
+                    if os.path.lexists(target.name):
+                        os.remove(target.name)
+                    return 'hardlink'
+                except OSError:
+                    # e.g. cache and target are on different file systems
+                    if os.path.lexists(target.name):
+                        os.remove(target.name)
+                    target = TargetFile(dst)
+            copyData(f.fileno(), target.fd)
+    except BaseException:
+        target.abort()
+        raise
+    target.commit()
+    return 'copy'
+
+# ==============================================================================
+class DownloadCache(object):
+# ==============================================================================
+
+    u"""Local content-addressed cache of downloads.
+
+    The bodies are stored by their SHA-256 digest (a content which is
+    delivered by many URLs is stored once)::
+
+        <folder>/objects/9f/9f86d081884c7d65...
+        <folder>/urls/<sha256 of the URL>.json
+
+    The JSON file of a URL holds the digest of the content and the validators
+    (``ETag`` / ``Last-Modified``) of the response.  A repeated download of
+    the URL sends them in ``If-None-Match`` / ``If-Modified-Since``, on a
+    ``304 Not Modified`` the cached file is put into place by
+    :py:func:`placeFile` (reflink, hard link or copy), nothing is downloaded.
+
+    The cache is limited to ``max_size`` bytes (``None``: no limit), the least
+    recently used contents are removed first.  The cache can be shared by
+    processes, all files of the cache are replaced atomically.
+
+    .. code-block:: python
+
+       cache = DownloadCache('/var/cache/ci-downloads', max_size=20 * 1024**3)
+       FSPath('gcc.tar.xz').download(url, cache=cache)
+
+    .. hint::
+
+       A hard link shares the content with the cached file, don't modify the
+       downloaded file in place (use ``hardlink=False`` if you have to).
+    """
+
+    def __init__(self, folder=None, max_size=MAX_SIZE, hardlink=True):
+        self.folder   = folder or defaultCacheDir()
+        self.max_size = max_size
+        self.hardlink = hardlink
+
+    def objectPath(self, digest):
+        u"""File name of the content with SHA-256 ``digest``"""
+        return os.path.join(self.folder, 'objects', digest[:2], digest)
+
+    def _metaPath(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.folder, 'urls', key + '.json')
+
+    def lookup(self, url):
+        u"""Meta data of ``url`` (dict) or ``None`` if the content is not cached."""
+        try:
+            with io.open(self._metaPath(url), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        if meta.get('url') != url or not os.path.exists(self.objectPath(meta.get('digest', ''))):
+            return None
+        return meta
+
+    def _writeMeta(self, url, meta):
+        fname = self._metaPath(url)
+        _makedirs(os.path.dirname(fname))
+        with TargetFile(fname) as f:
+            f.write(json.dumps(meta, sort_keys=True, indent=2).encode('utf-8'))
+
+    def forget(self, url):
+        u"""Remove ``url`` from the cache (the content is removed by :py:meth:`evict`)"""
+        try:
+            os.remove(self._metaPath(url))
+        except OSError as exc:
+            if exc.errno != errno.ENOENT:
+                raise
+
+    def fetch(self, fname, url, chunksize=None, tick=None, checksum=None):
+        u"""Download ``url`` into ``fname`` through the cache.
+
+        For the arguments see :py:func:`fspath.download.fetch`.
+
+        :return: ``True`` if the content was taken from the cache
+        """
+        meta    = self.lookup(url)
+        headers = {}
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last-modified'):
+                headers['If-Modified-Since'] = meta['last-modified']
+
+        resp = openURL(url, headers)
+        with closing(resp):
+            if meta and getStatus(resp) == 304:
+                try:
+                    self._verify(meta, checksum, url)
+                    placeFile(self.objectPath(meta['digest']), fname, self.hardlink)
+                except (IOError, OSError) as exc:
+                    if exc.errno != errno.ENOENT:
+                        raise
+                    # removed by an other process in the meantime
+                    self.forget(url)
+                    return self.fetch(fname, url, chunksize, tick, checksum)
+                meta['used'] = time.time()
+                self._writeMeta(url, meta)
+                if tick:
+                    tick(meta['size'], meta['size'])
+                return True
+            if isinstance(resp, HTTPError):
+                raise resp
+            meta = self._store(resp, url, chunksize, tick, checksum)
+
+        placeFile(self.objectPath(meta['digest']), fname, self.hardlink)
+        self.evict()
+        return False
+
+    def _verify(self, meta, checksum, url):
+        if checksum is None:
+            return
+        if checksum[0].lower() == 'sha256':
+            # the name of the object is its SHA-256 digest
+            if meta['digest'] != checksum[1].lower():
+                raise ChecksumError("%s: sha256 checksum mismatch (%s != %s)" % (
+                    url, meta['digest'], checksum[1]))
+            return
+        h = newHash(checksum)
+        hashFile(h, self.objectPath(meta['digest']))
+        verify(h, checksum, url)
+
+    def _store(self, resp, url, chunksize, tick, checksum):
+        u"""Store the body of ``resp`` in the cache, returns the meta data."""
+        max_bytes = int(getHeader(resp, 'Content-Length', 0))
+        objects   = os.path.join(self.folder, 'objects')
+        _makedirs(objects)
+
+        h = hashlib.sha256()
+        c = newHash(checksum)
+        target = TargetFile(os.path.join(objects, 'incoming'), max_bytes)
+
+        def write(data):
+            target.write(data)
+            if c is not None:
+                c.update(data)
+        try:
+            copyResponse(resp, write, h, 0, max_bytes, chunksize, tick)
+            verify(c, checksum, url)
+        except BaseException:
+            target.abort()
+            raise
+
+        digest = h.hexdigest()
+        obj    = self.objectPath(digest)
+        _makedirs(os.path.dirname(obj))
+        target.commit(obj)
+
+        meta = validator(resp)
+        meta.update(url=url, digest=digest, size=target.written, used=time.time())
+        self._writeMeta(url, meta)
+        return meta
+
+    def evict(self, max_size=None):
+        u"""Remove the least recently used contents until the cache is not
+        larger than ``max_size`` (default: the limit of the cache).
+
+        :return: number of bytes removed
+        """
+        max_size = self.max_size if max_size is None else max_size
+        if max_size is None:
+            return 0
+
+        objects = {}
+        for folder, _dirs, files in os.walk(os.path.join(self.folder, 'objects')):
+            for name in files:
+                if name.startswith('.'):
+                    continue  # incoming
+                st = os.stat(os.path.join(folder, name))
+                objects[name] = [st.st_mtime, st.st_size]
+        total = sum(x[1] for x in objects.values())
+        if total <= max_size:
+            return 0
+
+        urls = os.path.join(self.folder, 'urls')
+        refs = {}
+        for name in (os.listdir(urls) if os.path.isdir(urls) else []):
+            try:
+                with io.open(os.path.join(urls, name), 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (IOError, OSError, ValueError):
+                continue
+            digest = meta.get('digest')
+            if digest in objects:
+                objects[digest][0] = max(objects[digest][0], meta.get('used', 0))
+                refs.setdefault(digest, []).append(name)
+
+        removed = 0
+        for _used, size, digest in sorted((v[0], v[1], k) for k, v in objects.items()):
+            if total - removed <= max_size:
+                break
+            for fname in [os.path.join(urls, name) for name in refs.get(digest, [])] + [self.objectPath(digest)]:
+                try:
+                    os.remove(fname)
+                except OSError as exc:
+                    # removed by an other process in the meantime
+                    if exc.errno != errno.ENOENT:
+                        raise
+            removed += size
+        return removed
+
+    def clear(self):
+        u"""Remove all contents from the cache."""
+        return self.evict(0)
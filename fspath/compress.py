@@ -0,0 +1,469 @@
+# -*- coding: utf-8; mode: python -*-
+u"""
+archive creation of :py:meth:`fspath.FSPath.compress`
+
+The data is compressed by a pool of processes in independent blocks which
+are written into the archive in order:
+
+- ZIP: the blocks of the members are deflated by the workers (each worker
+  reads its block from the file), the deflate streams of a member are
+  concatenated at sync flush points.
+
+- ``.tar.gz``: the TAR stream is cut into blocks of :py:data:`GZIP_BLOCK`
+  bytes, each block is deflated with the last 32 KiB of the previous block
+  as dictionary and ends with a sync flush (like ``pigz``).  The result is
+  one gzip member which can be read by any gzip tool, the flush points are
+  the checkpoints of the seek index (see :py:mod:`fspath.tarindex`).
+
+- ``.tar.xz``: each block of :py:data:`XZ_BLOCK` bytes is a xz block of a
+  multi-block stream (like ``xz -T``).
+"""
+# pylint: disable=invalid-name
+
+import os
+import io
+import stat
+import time
+import zlib
+import struct
+import zipfile
+import tarfile
+import collections
+
+import six
+
+from .download import TargetFile
+from .tarindex import XZ_MAGIC, WINDOW, xzBlocks, _encVarint, _crc32, _pad4
+
+GZIP_BLOCK = 1024 * 1024
+u"""Uncompressed bytes of a ``.tar.gz`` block"""
+
+XZ_BLOCK = 16 * 1024 * 1024
+u"""Uncompressed bytes of a ``.tar.xz`` block"""
+
+ZIP_BLOCK = 4 * 1024 * 1024
+u"""Uncompressed bytes of a ZIP member deflated by one worker"""
+
+FORMATS = collections.OrderedDict([
+    ('.zip', 'zip'), ('.tar.gz', 'tar.gz'), ('.tgz', 'tar.gz')
+    , ('.tar.xz', 'tar.xz'), ('.txz', 'tar.xz'), ('.tar', 'tar')])
+u"""Archive format by the suffix of the archive name"""
+
+_MASK   = 0xffffffff
+_XZ_FLAGS = b'\x00\x04'  # check: CRC64
+
+def archiveFormat(fname):
+    u"""Archive format of file name ``fname`` (see :py:data:`FORMATS`), ``None`` if unknown"""
+    name = fname.lower()
+    for suffix, fmt in FORMATS.items():
+        if name.endswith(suffix):
+            return fmt
+    return None
+
+def _readahead(fd, offset=0, length=0):
+    u"""Tell the kernel that ``length`` bytes from ``offset`` will be read
+    sequentially (``posix_fadvise``), the kernel reads ahead."""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        os.posix_fadvise(fd, offset, length, os.POSIX_FADV_SEQUENTIAL)
+        os.posix_fadvise(fd, offset, length, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+
+def _compressobj(level, wbits, zdict):
+    if zdict and six.PY3:
+        return zlib.compressobj(level, zlib.DEFLATED, wbits, 9, zlib.Z_DEFAULT_STRATEGY, zdict)
+    return zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+def _deflate(data, zdict, last, level):
+    u"""Raw deflate ``data``, the stream ends at a byte boundary (sync flush)
+    unless it is the ``last`` block."""
+    c = _compressobj(level, -15, zdict)
+    return c.compress(data) + c.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+def _gf2Times(mat, vec):
+    u"""Product of the GF(2) matrix ``mat`` (32 columns) and the vector ``vec``"""
+    out, i = 0, 0
+    while vec:
+        if vec & 1:
+            out ^= mat[i]
+        vec >>= 1
+        i += 1
+    return out
+
+def _gf2Square(mat):
+    return [_gf2Times(mat, col) for col in mat]
+
+# _CRC_OPS[k]: operator which appends 2**k zero bytes to a CRC-32 register
+_CRC_OPS = []
+
+def _crcOperator(k):
+    if not _CRC_OPS:
+        # one zero bit: the CRC-32 polynomial (reflected) and shifts
+        op = [0xedb88320] + [1 << n for n in range(31)]
+        for _ in range(3):
+            op = _gf2Square(op)
+        _CRC_OPS.append(op)
+    while len(_CRC_OPS) <= k:
+        _CRC_OPS.append(_gf2Square(_CRC_OPS[-1]))
+    return _CRC_OPS[k]
+
+def crc32Combine(crc1, crc2, len2):
+    u"""CRC-32 of the concatenation ``A + B`` from ``crc1`` (of ``A``), ``crc2``
+    and ``len2`` (CRC and length of ``B``).
+
+    Like zlib's ``crc32_combine``: ``crc1`` is shifted over ``len2`` zero
+    bytes by GF(2) matrix operators (O(log ``len2``)), the operators of the
+    powers of two are computed once.
+    """
+    k = 0
+    while len2 > 0:
+        if len2 & 1:
+            crc1 = _gf2Times(_crcOperator(k), crc1)
+        len2 >>= 1
+        k += 1
+    return (crc1 ^ crc2) & _MASK
+
+# ==============================================================================
+# workers
+# ==============================================================================
+
+def _deflateGzipBlock(args):
+    data, zdict, last, level = args
+    return _deflate(data, zdict, last, level)
+
+def _deflateFileBlock(args):
+    u"""Deflate ``length`` bytes at ``offset`` of file ``fname``, the 32 KiB in
+    front of the block are the dictionary.  Returns ``(crc, size, data)``."""
+    fname, offset, length, last, level = args
+    start = max(0, offset - WINDOW)
+    with io.open(fname, 'rb') as f:
+        _readahead(f.fileno(), start, length + offset - start)
+        f.seek(start)
+        zdict = f.read(offset - start)
+        data = f.read(length)
+    return zlib.crc32(data) & _MASK, len(data), _deflate(data, zdict, last, level)
+
+def _xzBlock(args):
+    u"""Compress ``data`` into one xz block, returns ``(block, unpadded_size,
+    uncompressed_size)``, the block is padded to four bytes (``None`` if
+    there is no data)."""
+    import lzma # pylint: disable=import-outside-toplevel, import-error
+    data, preset = args
+    if not data:
+        return None
+    c = lzma.LZMACompressor(lzma.FORMAT_XZ, check=lzma.CHECK_CRC64, preset=preset)
+    stream = c.compress(data) + c.flush()
+    _uoffset, coffset, unpadded, usize = xzBlocks(io.BytesIO(stream))[0][0]
+    return stream[coffset:coffset + _pad4(unpadded)], unpadded, usize
+
+class _Done(object):  # pylint: disable=too-few-public-methods
+    u"""Result of a task which has been run in this process (no pool)"""
+    def __init__(self, value):
+        self.value = value
+    def get(self):
+        return self.value
+
+def _pool(jobs):
+    if jobs <= 1:
+        return None
+    import multiprocessing # pylint: disable=import-outside-toplevel
+    return multiprocessing.Pool(jobs)
+
+# ==============================================================================
+class BlockWriter(object):
+# ==============================================================================
+
+    u"""Write-only file object which compresses the data in blocks of
+    ``block_size`` bytes by a ``pool`` of processes (``None``: in this
+    process) and writes the blocks in order into ``fileobj``.
+
+    At most two blocks per process are pending, a slow ``fileobj`` slows
+    down the writer.  Subclasses implement the container format.
+    """
+
+    block_size = GZIP_BLOCK
+
+    def __init__(self, fileobj, pool=None, jobs=1):
+        self.fileobj = fileobj
+        self.pool    = pool
+        self.jobs    = jobs
+        self.buf     = []
+        self.buf_size = 0
+        self.pending = collections.deque()
+        self.closed  = False
+
+    def write(self, data):
+        u"""Append ``data`` to the stream"""
+        size = len(data)
+        self.buf.append(bytes(data))
+        self.buf_size += size
+        if self.buf_size >= self.block_size:
+            data = b''.join(self.buf)
+            pos = 0
+            while len(data) - pos >= self.block_size:
+                self._submit(data[pos:pos + self.block_size], False)
+                pos += self.block_size
+            self.buf = [data[pos:]]
+            self.buf_size = len(data) - pos
+        return size
+
+    def _submit(self, block, last):
+        func, args = self.task(block, last)
+        if self.pool is None:
+            result = _Done(func(args))
+        else:
+            result = self.pool.apply_async(func, (args,))
+        self.pending.append(result)
+        while len(self.pending) > 2 * self.jobs:
+            self.fileobj.write(self.collect(self.pending.popleft().get()))
+
+    def close(self):
+        u"""Compress the rest of the data, wait for the pending blocks and
+        write the end of the stream (``fileobj`` is not closed)."""
+        if self.closed:
+            return
+        self.closed = True
+        self._submit(b''.join(self.buf), True)
+        self.buf = []
+        while self.pending:
+            self.fileobj.write(self.collect(self.pending.popleft().get()))
+        self.fileobj.write(self.trailer())
+
+    def task(self, block, last):
+        u"""Returns ``(func, args)``: the worker function which compresses ``block``"""
+        raise NotImplementedError
+
+    def collect(self, result):
+        u"""Data written into the stream from the ``result`` of a task"""
+        return result
+
+    def trailer(self):
+        u"""End of the stream"""
+        return b''
+
+# ==============================================================================
+class GzipWriter(BlockWriter):
+# ==============================================================================
+
+    u"""Block parallel gzip (like ``pigz``), see :py:class:`BlockWriter`"""
+
+    block_size = GZIP_BLOCK
+
+    def __init__(self, fileobj, pool=None, jobs=1, level=6, mtime=None):
+        super(GzipWriter, self).__init__(fileobj, pool, jobs)
+        self.level = level
+        self.crc   = 0
+        self.size  = 0
+        self.zdict = b''
+        mtime = int(time.time() if mtime is None else mtime)
+        # magic, deflate, no flags, mtime, no extra flags, OS unknown
+        self.fileobj.write(b'\x1f\x8b\x08\x00' + struct.pack('<I', mtime & _MASK) + b'\x00\xff')
+
+    def task(self, block, last):
+        self.crc = zlib.crc32(block, self.crc) & _MASK
+        self.size += len(block)
+        zdict = self.zdict
+        self.zdict = (zdict + block)[-WINDOW:]
+        return _deflateGzipBlock, (block, zdict, last, self.level)
+
+    def trailer(self):
+        return struct.pack('<II', self.crc, self.size & _MASK)
+
+# ==============================================================================
+class XzWriter(BlockWriter):
+# ==============================================================================
+
+    u"""Block parallel xz (multi-block stream like ``xz -T``), see :py:class:`BlockWriter`"""
+
+    block_size = XZ_BLOCK
+
+    def __init__(self, fileobj, pool=None, jobs=1, preset=6):
+        super(XzWriter, self).__init__(fileobj, pool, jobs)
+        self.preset  = preset
+        self.records = []
+        self.fileobj.write(XZ_MAGIC + _XZ_FLAGS + _crc32(_XZ_FLAGS))
+
+    def task(self, block, last):
+        return _xzBlock, (block, self.preset)
+
+    def collect(self, result):
+        if result is None:
+            return b''
+        block, unpadded, usize = result
+        self.records.append((unpadded, usize))
+        return block
+
+    def trailer(self):
+        index = bytearray(b'\x00' + _encVarint(len(self.records)))
+        for unpadded, usize in self.records:
+            index += _encVarint(unpadded) + _encVarint(usize)
+        index += b'\x00' * (_pad4(len(index)) - len(index))
+        index = bytes(index) + _crc32(bytes(index))
+        backward = struct.pack('<I', len(index) // 4 - 1)
+        return index + _crc32(backward + _XZ_FLAGS) + backward + _XZ_FLAGS + b'YZ'
+
+# ==============================================================================
+def archiveMembers(src):
+# ==============================================================================
+
+    u"""List of ``(fname, arcname)`` of the files and folders in ``src``, the
+    names in the archive start with the base name of ``src``."""
+    src = os.path.abspath(src)
+    base = os.path.basename(src)
+    members = [(src, base)]
+    if not os.path.isdir(src) or os.path.islink(src):
+        return members
+    for folder, dirs, files in os.walk(src):
+        dirs.sort()
+        prefix = os.path.join(base, os.path.relpath(folder, src))
+        for name in sorted(files) + [d for d in dirs if os.path.islink(os.path.join(folder, d))]:
+            members.append((os.path.join(folder, name), os.path.normpath(os.path.join(prefix, name))))
+        for name in dirs:
+            if not os.path.islink(os.path.join(folder, name)):
+                members.append((os.path.join(folder, name), os.path.normpath(os.path.join(prefix, name))))
+    return members
+
+# ==============================================================================
+def createArchive(src, fname, fmt=None, jobs=1, level=None, tick=None):
+# ==============================================================================
+
+    u"""Create archive ``fname`` with the files and folders in ``src``.
+
+    :param fmt: ``'zip'``, ``'tar.gz'``, ``'tar.xz'`` or ``'tar'`` (default:
+                by the suffix of ``fname``, see :py:data:`FORMATS`)
+    :param jobs: number of processes compressing the data
+    :param level: compression level (default: 6)
+    :param tick: function called with ``(arcname, counter, max_count)``
+                 after a member is added
+    :return: list of the member names in the archive
+
+    The archive is written into a temporary file which is renamed to
+    ``fname`` when the archive is complete.
+    """
+    # pylint: disable=too-many-arguments
+    fmt = fmt or archiveFormat(fname)
+    if fmt not in FORMATS.values():
+        raise ValueError("%s: unknown archive format %r" % (fname, fmt))
+    level = 6 if level is None else level
+    members = archiveMembers(src)
+
+    target = pool = None
+    try:
+        target = TargetFile(fname)
+        pool = _pool(jobs)
+        with io.open(target.fd, 'wb', closefd=False) as f:
+            if fmt == 'zip':
+                _writeZip(f, members, pool, level, tick)
+            else:
+                _writeTar(f, members, fmt, pool, jobs, level, tick)
+        if pool is not None:
+            pool.close()
+    except BaseException:
+        if target is not None:
+            target.abort()
+        raise
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    target.commit()
+    return [arcname for _fname, arcname in members]
+
+def _writeTar(f, members, fmt, pool, jobs, level, tick):
+    # pylint: disable=too-many-arguments
+    if fmt == 'tar.gz':
+        stream = GzipWriter(f, pool, jobs, level)
+    elif fmt == 'tar.xz':
+        stream = XzWriter(f, pool, jobs, level)
+    else:
+        stream = f
+    with tarfile.open(fileobj=stream, mode='w|', format=tarfile.PAX_FORMAT) as arc:
+        for counter, (fname, arcname) in enumerate(members, start=1):
+            info = arc.gettarinfo(fname, arcname)
+            if info.isreg():
+                with io.open(fname, 'rb') as src:
+                    _readahead(src.fileno())
+                    arc.addfile(info, src)
+            else:
+                arc.addfile(info)
+            if tick:
+                tick(arcname, counter, len(members))
+    if stream is not f:
+        stream.close()
+
+def _zipInfo(fname, arcname, st):
+    date_time = time.localtime(st.st_mtime)[:6]
+    if date_time[0] < 1980:
+        date_time = (1980, 1, 1, 0, 0, 0)
+    arcname = arcname.replace(os.sep, '/')
+    isdir = stat.S_ISDIR(st.st_mode)
+    info = zipfile.ZipInfo(arcname + '/' if isdir else arcname, date_time)
+    info.external_attr = (st.st_mode & 0xFFFF) << 16
+    if isdir:
+        info.external_attr |= 0x10
+    elif stat.S_ISREG(st.st_mode):
+        info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+def _writeZip(f, members, pool, level, tick):
+    # pylint: disable=too-many-locals
+    infos, tasks = [], []
+    for fname, arcname in members:
+        # a symbolic link is stored as link (like in a TAR archive), the
+        # data of the member is the target of the link
+        st = os.lstat(fname)
+        info = _zipInfo(fname, arcname, st)
+        data = b''
+        if stat.S_ISLNK(st.st_mode):
+            data = os.readlink(fname)
+            if not isinstance(data, bytes):
+                data = data.encode('utf-8', 'surrogateescape')
+        blocks = []
+        if info.compress_type == zipfile.ZIP_DEFLATED:
+            offset = 0
+            while True:
+                length = min(ZIP_BLOCK, st.st_size - offset)
+                last = offset + length >= st.st_size
+                blocks.append((fname, offset, length, last, level))
+                if last:
+                    break
+                offset += length
+        infos.append((info, st.st_size, len(blocks), data))
+        tasks.extend(blocks)
+
+    if pool is None:
+        results = six.moves.map(_deflateFileBlock, tasks)
+    else:
+        results = pool.imap(_deflateFileBlock, tasks, chunksize=8)
+
+    with zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as arc:
+        for counter, (info, size, count, data) in enumerate(infos, start=1):
+            if not count:
+                arc.writestr(info, data)
+            else:
+                _writeZipMember(arc, info, size, [next(results) for _ in range(count)])
+            if tick:
+                tick(info.filename, counter, len(infos))
+
+def _writeZipMember(arc, info, size, blocks):
+    u"""Write the deflated ``blocks`` of a member into ``arc`` (like
+    ``ZipFile.write`` does, but the data is already compressed)."""
+    fp = arc.fp
+    zip64 = size * 1.05 > zipfile.ZIP64_LIMIT
+    info.header_offset = fp.tell()
+    info.CRC, info.compress_size, info.file_size = 0, 0, 0
+    fp.write(info.FileHeader(zip64))
+    for crc, length, data in blocks:
+        fp.write(data)
+        info.CRC = crc32Combine(info.CRC, crc, length)
+        info.compress_size += len(data)
+        info.file_size += length
+    end = fp.tell()
+    fp.seek(info.header_offset)
+    fp.write(info.FileHeader(zip64))
+    fp.seek(end)
+    arc.filelist.append(info)
+    arc.NameToInfo[info.filename] = info
+    arc.start_dir = end
@@ -4,8 +4,8 @@
 Some *console* stuff
 """
 
-import os
 import sys
+import time
 
 from .helper import Options
 
@@ -58,10 +58,71 @@ def consoleDimension():
 
     return rows, columns
 
+# cached console dimension: [timestamp, (rows, columns)]
+_DIMENSION = []
+_DIMENSION_TTL = 1.0
+_WATCH_RESIZE = [None]
+
+def _watchResize():
+    u"""Drop the cached console dimension when the console is resized
+    (``SIGWINCH``), returns ``True`` if the signal handler is installed."""
+    # pylint: disable=import-outside-toplevel
+    try:
+        import signal
+        sig  = signal.SIGWINCH
+        prev = signal.getsignal(sig)
+
+        def onResize(signum, frame):
+            del _DIMENSION[:]
+            if callable(prev):
+                prev(signum, frame)
+
+        signal.signal(sig, onResize)
+        signal.siginterrupt(sig, False)
+    except (ImportError, AttributeError, ValueError):
+        # no SIGWINCH (MS-Win) or not called from the main thread
+        return False
+    return True
+
+def cachedConsoleDimension():
+    u"""Returns count of (row, columns) from current console (cached)
+
+    Same as :py:func:`consoleDimension`, but the dimension is cached until the
+    console is resized (``SIGWINCH``).  Where a ``SIGWINCH`` handler can't be
+    installed (MS-Win or if first called in a thread), the cached value expires
+    after one second.
+    """
+    if _WATCH_RESIZE[0] is None:
+        _WATCH_RESIZE[0] = _watchResize()
+    now   = time.time()
+    cache = list(_DIMENSION)  # the signal handler may clear _DIMENSION meanwhile
+    if cache:
+        if _WATCH_RESIZE[0] or now - cache[0] < _DIMENSION_TTL:
+            return cache[1]
+    dim = consoleDimension()
+    _DIMENSION[:] = [now, dim]
+    return dim
+
 def consoleDimensionsLinux():
-    u"""Returns count of (row, columns) from current console"""
-    rows, columns = os.popen('stty size', 'r').read().split()
-    return rows, columns
+    u"""Returns count of (row, columns) from current console
+
+    The size is asked by the ``TIOCGWINSZ`` ioctl on stdout, stderr or stdin
+    (whichever is a terminal), no subprocess is forked.
+    """
+    # pylint: disable=import-outside-toplevel
+    import fcntl
+    import termios
+    import struct
+
+    for fd in (1, 2, 0):
+        try:
+            rows, columns = struct.unpack(
+                'hh', fcntl.ioctl(fd, termios.TIOCGWINSZ, b'\0' * 8)[:4])
+        except (IOError, OSError):
+            continue
+        if rows and columns:
+            return rows, columns
+    raise IOError("no terminal (TIOCGWINSZ)")
 
 def consoleDimensionsWIN():
     u"""Returns count of (row, columns) from current console"""
@@ -0,0 +1,262 @@
+# -*- coding: utf-8; mode: python -*-
+u"""
+deletion engine of :py:meth:`fspath.FSPath.rmtree` & Co.
+
+The entries of a folder are listed by ``os.scandir`` on a file descriptor
+of the folder and unlinked relative to it (``dir_fd``), the path name of
+the folder is resolved once and not for each entry.  The folders of the
+tree are independent tasks which can be run by a pool of threads, a folder
+is removed when its last subfolder is removed.
+
+With :py:func:`deleteLater` the tree is renamed to a hidden sibling (the
+*trash*) and removed by a detached process, the caller does not wait.
+"""
+# pylint: disable=invalid-name
+
+import os
+import sys
+import stat
+import errno
+import random
+import threading
+
+import six
+
+TRASH_SUFFIX = '.trash'
+u"""Suffix of a tree renamed by :py:func:`deleteLater`"""
+
+MAX_OPEN_FOLDERS = 64
+u"""Max. number of folders kept open for their subfolders, the subfolders of
+further folders are opened by path (and checked to be the listed folder)"""
+
+def _supportsDirFd():
+    return (hasattr(os, 'supports_dir_fd') and os.unlink in os.supports_dir_fd
+            and os.rmdir in os.supports_dir_fd and os.open in os.supports_dir_fd
+            and os.scandir in getattr(os, 'supports_fd', ()))
+
+def _checkTree(path):
+    u"""Raise ``OSError`` if ``path`` is not a folder (or is a symbolic link),
+    returns its ``lstat``."""
+    st = os.lstat(path)
+    if stat.S_ISLNK(st.st_mode):
+        raise OSError("Cannot call rmtree on a symbolic link")
+    if not stat.S_ISDIR(st.st_mode):
+        raise OSError("Not a directory: '%s'" % path)
+    return st
+
+class _Folder(object):  # pylint: disable=too-few-public-methods
+    u"""A folder of the tree, ``pending`` counts the subfolders which have not
+    been removed (plus one for the folder's own entries).  The folder is
+    opened by ``name`` relative to the file descriptor ``fd`` of its parent,
+    which is open until all subfolders (``users``) have been opened.  If the
+    parent has not been kept open (:py:data:`MAX_OPEN_FOLDERS`), the folder
+    is opened by ``path``."""
+    def __init__(self, path, parent, name, st):
+        self.path    = path
+        self.parent  = parent
+        self.name    = name
+        self.st      = st
+        self.pending = 1
+        self.fd      = None
+        self.users   = 0
+
+# ==============================================================================
+def removeTree(path, jobs=1, ignore_errors=False, onerror=None):
+# ==============================================================================
+
+    u"""Remove the directory tree ``path``.
+
+    Like ``shutil.rmtree`` (same meaning of ``ignore_errors`` and ``onerror``)
+    but the entries of a folder are removed relative to the file descriptor
+    of the folder and the folders are removed by ``jobs`` threads.  Symbolic
+    links are removed, not followed.  On platforms without ``dir_fd``
+    support, ``shutil.rmtree`` is used.
+    """
+    # pylint: disable=too-many-statements, import-outside-toplevel
+    import shutil
+    if not _supportsDirFd():
+        shutil.rmtree(path, ignore_errors, onerror)
+        return
+
+    if ignore_errors:
+        def onerror(*_args):  # pylint: disable=function-redefined
+            pass
+    elif onerror is None:
+        def onerror(*args):  # pylint: disable=function-redefined
+            six.reraise(*args[2])
+
+    try:
+        st = _checkTree(path)
+    except OSError:
+        onerror(os.lstat, path, sys.exc_info())
+        return
+
+    lock  = threading.Lock()
+    done  = threading.Event()
+    tasks = []
+    errors = []
+    pool = None
+    # folders which may be kept open for their subfolders
+    budget = [MAX_OPEN_FOLDERS]
+
+    def report(func, fname):
+        # called in the threads of the pool: onerror is called by the caller
+        with lock:
+            errors.append((func, fname, sys.exc_info()))
+
+    def release(folder):
+        # remove the folders whose last pending task is finished
+        while folder is not None:
+            with lock:
+                folder.pending -= 1
+                if folder.pending:
+                    return
+            try:
+                os.rmdir(folder.path)
+            except OSError:
+                report(os.rmdir, folder.path)
+            if folder.parent is None:
+                done.set()
+            folder = folder.parent
+
+    def submit(folder):
+        if pool is None:
+            tasks.append(folder)
+        else:
+            pool.apply_async(clear, (folder,))
+
+    def unref(folder):
+        # a subfolder has been opened relative to the fd of folder
+        with lock:
+            folder.users -= 1
+            if folder.users:
+                return
+            fd, folder.fd = folder.fd, None
+            budget[0] += 1
+        os.close(fd)
+
+    def openFolder(folder):
+        flags = os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0) | getattr(os, 'O_NOFOLLOW', 0)
+        if folder.parent is None or folder.parent.fd is None:
+            fd = os.open(folder.path, flags)
+        else:
+            try:
+                fd = os.open(folder.name, flags, dir_fd=folder.parent.fd)
+            finally:
+                unref(folder.parent)
+        if not os.path.samestat(os.fstat(fd), folder.st):
+            # replaced (e.g. by a symbolic link) since it has been listed
+            os.close(fd)
+            raise OSError(errno.ENOTDIR, "Folder has been replaced: '%s'" % folder.path)
+        return fd
+
+    def clear(folder):
+        u"""Unlink the entries of ``folder``, submit its subfolders"""
+        try:
+            try:
+                fd = openFolder(folder)
+            except OSError:
+                report(os.open, folder.path)
+                return
+            subdirs = []
+            try:
+                try:
+                    with os.scandir(fd) as it:
+                        entries = list(it)
+                except OSError:
+                    report(os.scandir, folder.path)
+                    entries = []
+                for entry in entries:
+                    try:
+                        isdir = entry.is_dir(follow_symlinks=False)
+                        if isdir:
+                            subdirs.append((entry.name, entry.stat(follow_symlinks=False)))
+                            continue
+                        os.unlink(entry.name, dir_fd=fd)
+                    except OSError:
+                        report(os.unlink, os.path.join(folder.path, entry.name))
+                if subdirs:
+                    with lock:
+                        folder.pending += len(subdirs)
+                        if budget[0]:
+                            # the subfolders are opened relative to fd
+                            budget[0] -= 1
+                            folder.users = len(subdirs)
+                            folder.fd, fd = fd, None
+            finally:
+                if fd is not None:
+                    os.close(fd)
+            for name, st in subdirs:
+                submit(_Folder(os.path.join(folder.path, name), folder, name, st))
+        finally:
+            release(folder)
+
+    root = _Folder(path, None, None, st)
+    if jobs > 1:
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(jobs)
+        try:
+            submit(root)
+            done.wait()
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+    else:
+        tasks.append(root)
+        while tasks:
+            clear(tasks.pop())
+    for func, fname, exc_info in errors:
+        onerror(func, fname, exc_info)
+
+# ==============================================================================
+def deleteLater(path, jobs=1):
+# ==============================================================================
+
+    u"""Rename the directory tree ``path`` to a hidden sibling and remove it
+    by a detached process, returns the new name immediately.
+
+    The name ``path`` is free when the function returns, the disk space is
+    released later.  The process lives on when the calling process exits.
+    If the tree can't be renamed, it is removed by :py:func:`removeTree`.
+
+    :raises OSError: ``path`` is not a folder or is a symbolic link
+    :return: name of the renamed tree (``None`` if it has been removed)
+    """
+    import subprocess  # pylint: disable=import-outside-toplevel
+    path = os.path.abspath(path)
+    _checkTree(path)
+    folder, name = os.path.split(path)
+    trash = os.path.join(folder, '.%s.%08x%s' % (name, random.getrandbits(32), TRASH_SUFFIX))
+    try:
+        os.rename(path, trash)
+    except OSError:
+        removeTree(path, jobs)
+        return None
+    # the process has to find this package
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))]
+        + [x for x in [env.get('PYTHONPATH')] if x])
+    kwargs = {}
+    if os.name == 'posix' and six.PY3:
+        # own session: not killed with the process group of the caller
+        kwargs['start_new_session'] = True
+    with open(os.devnull, 'r+b') as devnull:
+        subprocess.Popen(
+            [sys.executable, '-m', 'fspath.delete', '--jobs', str(jobs), trash]
+            , stdin=devnull, stdout=devnull, stderr=devnull, close_fds=True, env=env, **kwargs)
+    return trash
+
+def _main(argv=None):
+    u"""Remove the trees given on the command line (used by :py:func:`deleteLater`)"""
+    argv = list(sys.argv[1:] if argv is None else argv)
+    jobs = 1
+    if argv[:1] == ['--jobs']:
+        jobs = int(argv[1])
+        argv = argv[2:]
+    for path in argv:
+        removeTree(path, jobs, ignore_errors=True)
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,822 @@
+# -*- coding: utf-8; mode: python -*-
+u"""
+download engine of :py:meth:`fspath.FSPath.download`
+"""
+# pylint: disable=invalid-name
+
+import os
+import io
+import errno
+import json
+import hashlib
+import random
+import time
+from contextlib import closing
+
+import six
+from six.moves.urllib.request import urlopen, Request # pylint: disable=E0401
+from six.moves.urllib.error import HTTPError          # pylint: disable=E0401
+
+RESUME_SUFFIX = '.resume'
+u"""Suffix of the file which holds the validators (``ETag`` / ``Last-Modified``)
+of a partial download."""
+
+MIN_SEGMENT = 256 * 1024
+u"""Minimal size in bytes of a segment (see :py:func:`fetchSegments`)"""
+
+CHUNK_BOUNDS = (64 * 1024, 16 * 1024 * 1024)
+u"""Default bounds ``(min, max)`` of the adaptive chunk size (see :py:func:`copyResponse`)"""
+
+CHUNK_TIME = 0.05
+u"""Target time in seconds to read one chunk when the chunk size is adaptive"""
+
+_clock = getattr(time, 'monotonic', time.time)
+
+# ==============================================================================
+class ChecksumError(IOError):
+# ==============================================================================
+    u"""The checksum of the downloaded content does not match"""
+
+def newHash(checksum):
+    u"""Hash object for a ``checksum=(algorithm, hexdigest)``, ``None`` if
+    there is no checksum."""
+    if checksum is None:
+        return None
+    return hashlib.new(checksum[0])
+
+def verify(h, checksum, url):
+    u"""Raise :py:class:`ChecksumError` if the digest of hash ``h`` does not
+    match the ``checksum``."""
+    if h is None:
+        return
+    if h.hexdigest().lower() != checksum[1].lower():
+        raise ChecksumError("%s: %s checksum mismatch (%s != %s)" % (
+            url, checksum[0], h.hexdigest(), checksum[1]))
+
+def hashFile(h, fname, chunksize=1048576):
+    u"""Update hash ``h`` with the content of file ``fname``."""
+    with io.open(fname, 'rb') as f:
+        while 1:
+            x = f.read(chunksize)
+            if not x:
+                break
+            h.update(x)
+
+def _writeAll(fd, data):
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+def _replace(src, dst):
+    if hasattr(os, 'replace'):
+        os.replace(src, dst)
+        return
+    if os.name == 'nt' and os.path.exists(dst):  # pragma: no cover
+        os.remove(dst)
+    os.rename(src, dst)
+
+# ==============================================================================
+class TargetFile(object):
+# ==============================================================================
+
+    u"""Temporary sibling of a download target, finalized by fsync & rename.
+
+    The content is written into a hidden file in the folder of ``fname``.  On
+    :py:meth:`TargetFile.commit` the file is synced to disk and renamed to
+    ``fname``, on :py:meth:`TargetFile.abort` it is removed.  A crashed
+    download never leaves a truncated file under the final name.  If the
+    ``size`` is known, the file is preallocated (``posix_fallocate``).
+
+    .. code-block:: python
+
+       with TargetFile(fname, size) as f:
+           f.write(data)    # commit on exit, abort on exception
+    """
+
+    def __init__(self, fname, size=None):
+        self.fname   = fname
+        self.written = 0
+        self.prealloc = None
+        folder, name = os.path.split(fname)
+        flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+        while True:
+            self.name = os.path.join(folder, '.%s.%08x.part' % (name, random.getrandbits(32)))
+            try:
+                # mode 0o666: same permissions (umask) as a file created by open()
+                self.fd = os.open(self.name, flags, 0o666)
+                break
+            except OSError as exc:
+                if exc.errno != errno.EEXIST:
+                    raise
+        if size:
+            self.preallocate(size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    def preallocate(self, size):
+        u"""Allocate ``size`` bytes on disk (if supported)"""
+        if not hasattr(os, 'posix_fallocate'):
+            return
+        try:
+            os.posix_fallocate(self.fd, 0, size)
+            self.prealloc = size
+        except OSError:
+            # not supported by the file system
+            pass
+
+    def write(self, data):
+        u"""Append ``data``"""
+        _writeAll(self.fd, data)
+        self.written += len(data)
+
+    def commit(self, fname=None):
+        u"""Sync to disk and rename to the final name (or to ``fname``)"""
+        if self.fd is None:
+            return
+        if self.prealloc is not None and self.prealloc != self.written:
+            os.ftruncate(self.fd, self.written)
+        os.fsync(self.fd)
+        os.close(self.fd)
+        self.fd = None
+        _replace(self.name, fname or self.fname)
+
+    def abort(self):
+        u"""Remove the temporary file"""
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+            os.remove(self.name)
+
+# ==============================================================================
+def openURL(url, headers=None):
+# ==============================================================================
+    u"""Open ``url`` with additional request ``headers``, returns the response.
+
+    HTTP errors are not raised, the ``HTTPError`` is returned as response
+    (it has the same interface), the caller has to check the status code.
+    """
+    req = Request(url, headers=headers or {})
+    try:
+        return urlopen(req)
+    except HTTPError as exc:
+        return exc
+
+def getStatus(resp):
+    u"""HTTP status code of the response (``None`` if not HTTP)"""
+    return getattr(resp, 'status', None) or resp.getcode()
+
+def getHeader(resp, name, default=None):
+    u"""Value of the header ``name`` from the response"""
+    if hasattr(resp, 'getheader'):
+        return resp.getheader(name, default)
+    return resp.headers.get(name, default) # pylint: disable=no-member
+
+def contentRange(resp):
+    u"""Returns ``(first, last, total)`` from the ``Content-Range`` header.
+
+    Unknown values are ``None``, if there is no such header, ``None`` is
+    returned.
+    """
+    value = getHeader(resp, 'Content-Range')
+    if not value:
+        return None
+    # e.g. "bytes 100-199/1000", "bytes */1000" or "bytes 100-199/*"
+    try:
+        unit, spec = value.strip().split(None, 1)
+        if unit.lower() != 'bytes':
+            return None
+        rng, total = spec.split('/', 1)
+        total = None if total.strip() == '*' else int(total)
+        if rng.strip() == '*':
+            return None, None, total
+        first, last = rng.split('-', 1)
+        return int(first), int(last), total
+    except ValueError:
+        return None
+
+def validator(resp):
+    u"""Returns the validators of the response (``ETag``, ``Last-Modified``) as dict."""
+    return {
+        'etag'            : getHeader(resp, 'ETag')
+        , 'last-modified' : getHeader(resp, 'Last-Modified')
+    }
+
+# ==============================================================================
+def readResumeInfo(fname, url):
+# ==============================================================================
+    u"""Validators of a partial download of ``url`` into ``fname`` (dict)"""
+    info_file = fname + RESUME_SUFFIX
+    if not info_file.EXISTS:
+        return {}
+    try:
+        with io.open(info_file, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+    except ValueError:
+        return {}
+    if info.get('url') != url:
+        return {}
+    return info
+
+def writeResumeInfo(fname, url, resp):
+    u"""Store the validators of the response, needed to resume a partial download."""
+    info = validator(resp)
+    info['url'] = url
+    with io.open(fname + RESUME_SUFFIX, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(info, sort_keys=True, indent=2))
+
+def clearResumeInfo(fname):
+    u"""Remove validators of a partial download"""
+    info_file = fname + RESUME_SUFFIX
+    if info_file.EXISTS:
+        info_file.rmfile()
+
+def ifRange(info):
+    u"""Value for the ``If-Range`` request header (``None`` if there is no
+    validator).  A weak ``ETag`` can't be used in a ``If-Range`` header."""
+    etag = info.get('etag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return info.get('last-modified')
+
+# ==============================================================================
+class HTTPRangeFile(io.RawIOBase):
+# ==============================================================================
+
+    u"""Seekable, read-only file object of a HTTP resource, read by ``Range`` requests.
+
+    A read continues the running response as long as the reads are
+    sequential, a seek to another position opens a new ``Range: bytes=<pos>-``
+    request.  The ``if_range`` validator (see :py:func:`ifRange`) makes sure
+    all ranges are from the same content.  Wrap it in a ``io.BufferedReader``
+    for small reads:
+
+    .. code-block:: python
+
+       f = io.BufferedReader(HTTPRangeFile(url, size), 256 * 1024)
+       zipfile.ZipFile(f).extractall(folder)
+    """
+
+    def __init__(self, url, size, if_range=None):
+        super(HTTPRangeFile, self).__init__()
+        self.url      = url
+        self.size     = size
+        self.if_range = if_range
+        self.pos      = 0
+        self.received = 0
+        self._resp    = None
+        self._at      = None
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self.pos
+        elif whence == os.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError("negative seek position %d" % offset)
+        self.pos = offset
+        return self.pos
+
+    def readinto(self, b):
+        if self.pos >= self.size:
+            return 0
+        if self._resp is None or self._at != self.pos:
+            self._open()
+        if hasattr(self._resp, 'readinto'):
+            n = self._resp.readinto(b)
+        else:
+            x = self._resp.read(len(b))
+            n = len(x)
+            b[:n] = x
+        if not n:
+            raise IOError("%s: connection closed at byte %d of %d" % (self.url, self.pos, self.size))
+        self.pos += n
+        self.received += n
+        self._at = self.pos
+        return n
+
+    def _open(self):
+        self._closeResponse()
+        headers = {'Range': 'bytes=%d-' % self.pos}
+        if self.if_range:
+            headers['If-Range'] = self.if_range
+        resp = openURL(url=self.url, headers=headers)
+        rng  = contentRange(resp)
+        if getStatus(resp) != 206 or rng is None or rng[0] != self.pos:
+            resp.close()
+            raise IOError("%s: range %d- not delivered (HTTP %s), content changed?" % (
+                self.url, self.pos, getStatus(resp)))
+        self._resp = resp
+        self._at   = self.pos
+
+    def _closeResponse(self):
+        if self._resp is not None:
+            self._resp.close()
+            self._resp = None
+
+    def close(self):
+        self._closeResponse()
+        super(HTTPRangeFile, self).close()
+
+# ==============================================================================
+def fetch(fname, url, chunksize=None, tick=None, resume=False, checksum=None):
+# ==============================================================================
+
+    u"""Download ``url`` into file ``fname`` (:py:class:`fspath.FSPath`).
+
+    :param chunksize: bytes read in one chunk, ``None`` (or ``(min, max)``)
+                      adapts the chunk size to the throughput (see
+                      :py:func:`copyResponse`)
+    :param tick:      function called with ``(down_bytes, max_bytes)`` after
+                      each chunk
+    :param resume:    continue a partial download
+    :param checksum:  tuple ``(algorithm, hexdigest)``, e.g. ``('sha256',
+                      '9f86d0...')``, the chunks are hashed as they arrive
+
+    The content is written into a temporary file next to ``fname``
+    (:py:class:`TargetFile`) which is renamed to ``fname`` when the download
+    is complete and the checksum matches.  A checksum mismatch raises
+    :py:class:`ChecksumError`.
+
+    To resume, the size of the partial file is requested by a ``Range``
+    header.  The ``ETag`` or ``Last-Modified`` validator of the first
+    response is stored in a file next to ``fname`` (suffix ``.resume``) and
+    send in the ``If-Range`` header; if there is no validator, the content on
+    the server has changed or the server ignores the range, the file is
+    downloaded from scratch.  The
+    partial content is kept under the name ``fname`` (no temporary file), if
+    the checksum of the resumed download does not match, the file is removed.
+    """
+
+    offset  = 0
+    headers = {}
+    if resume and fname.EXISTS:
+        offset = fname.SIZE
+    if offset:
+        if_range = ifRange(readResumeInfo(fname, url))
+        if if_range:
+            headers['Range'] = 'bytes=%d-' % offset
+            headers['If-Range'] = if_range
+        else:
+            # without a validator, the partial content may be from another
+            # version of the resource
+            offset = 0
+
+    resp = openURL(url, headers)
+    status = getStatus(resp)
+
+    if offset and status == 416:
+        # range not satisfiable: download is already complete?
+        resp.close()
+        rng = contentRange(resp)
+        if rng is not None and rng[2] == offset:
+            clearResumeInfo(fname)
+            if tick:
+                tick(offset, offset)
+            return
+        offset, resp = 0, openURL(url)
+        status = getStatus(resp)
+
+    if offset:
+        rng = contentRange(resp)
+        if status != 206 or rng is None or rng[0] != offset:
+            # server ignores the range or the content has changed
+            if status == 206:
+                resp.close()
+                resp = openURL(url)
+                status = getStatus(resp)
+            offset = 0
+
+    if isinstance(resp, HTTPError):
+        raise resp
+
+    with closing(resp):
+        if not resume:
+            _stream(resp, fname, url, chunksize, tick, checksum)
+            return
+        writeResumeInfo(fname, url, resp)
+        h = newHash(checksum)
+        if offset and h is not None:
+            hashFile(h, fname)
+        max_bytes = offset + int(getHeader(resp, 'Content-Length', 0))
+        with io.open(fname, 'ab' if offset else 'wb') as f:
+            copyResponse(resp, f.write, h, offset, max_bytes, chunksize, tick)
+    try:
+        verify(h, checksum, url)
+    except ChecksumError:
+        fname.rmfile()
+        raise
+    finally:
+        clearResumeInfo(fname)
+
+def copyResponse(resp, write, h=None, down_bytes=0, max_bytes=0, chunksize=None, tick=None):
+    u"""Copy the body of ``resp`` into the ``write`` function, returns the
+    number of bytes (plus ``down_bytes``).
+
+    The body is read by ``readinto`` into one buffer which is reused for all
+    chunks, ``write`` (and the hash ``h``) gets a ``memoryview`` of the
+    buffer, which is only valid until ``write`` returns.
+
+    :param chunksize: an ``int`` is a fixed chunk size.  ``None`` or a tuple
+                      ``(min, max)`` adapts the chunk size to the throughput:
+                      it is doubled when a chunk is read in less than
+                      :py:data:`CHUNK_TIME` and halved when it takes four
+                      times longer (default bounds: :py:data:`CHUNK_BOUNDS`).
+    :param tick:      function called with ``(down_bytes, max_bytes)`` after
+                      each chunk
+    """
+    # pylint: disable=too-many-arguments
+    if isinstance(chunksize, six.integer_types):
+        lo = hi = max(chunksize, 1)
+    else:
+        lo, hi = chunksize or CHUNK_BOUNDS
+    size = lo
+    buf  = memoryview(bytearray(size))
+    readinto = getattr(resp, 'readinto', None)
+
+    while 1:
+        start = _clock()
+        if readinto is not None:
+            x = buf[:readinto(buf[:size])]
+        else:
+            # e.g. py2's httplib.HTTPResponse
+            x = resp.read(size)
+        n = len(x)
+        if not n:
+            break
+        write(x)
+        if h is not None:
+            h.update(x)
+        down_bytes += n
+        if tick:
+            tick(down_bytes, max_bytes)
+        if lo != hi:
+            elapsed = _clock() - start
+            if n == size and size < hi and elapsed < CHUNK_TIME:
+                size = min(2 * size, hi)
+                if size > len(buf):
+                    buf = memoryview(bytearray(size))
+            elif size > lo and elapsed > 4 * CHUNK_TIME:
+                size = max(size // 2, lo)
+    return down_bytes
+
+def _stream(resp, fname, url, chunksize, tick, checksum):
+    u"""Copy response into a :py:class:`TargetFile` and verify the checksum."""
+    max_bytes = int(getHeader(resp, 'Content-Length', 0))
+    h = newHash(checksum)
+    with TargetFile(fname, max_bytes) as f:
+        copyResponse(resp, f.write, h, 0, max_bytes, chunksize, tick)
+        verify(h, checksum, url)
+
+def _pwrite(fd, data, offset):
+    u"""Write all of ``data`` at ``offset`` into file descriptor ``fd``."""
+    view = memoryview(data)
+    while view:
+        if hasattr(os, 'pwrite'):
+            n = os.pwrite(fd, view, offset)
+        else:
+            os.lseek(fd, offset, os.SEEK_SET)
+            n = os.write(fd, view)
+        view = view[n:]
+        offset += n
+
+def splitRange(total, segments, minsize=MIN_SEGMENT):
+    u"""Split ``total`` bytes into (at most) ``segments`` ranges ``(first, last)``,
+    each range is at least ``minsize`` bytes (except the last one)."""
+    if total <= 0:
+        return []
+    segments = max(1, min(segments, total // max(minsize, 1)))
+    size = -(-total // segments)
+    return [(first, min(first + size, total) - 1) for first in range(0, total, size)]
+
+# ==============================================================================
+def fetchSegments(fname, url, segments=4, chunksize=None, tick=None, checksum=None):
+# ==============================================================================
+
+    u"""Download ``url`` into ``fname`` by ``segments`` connections in parallel.
+
+    The size of the content is probed by a ``Range: bytes=0-0`` request, the
+    file is preallocated and split into byte ranges (segments) which are
+    fetched by a pool of threads.  Each thread writes its data straight into
+    the right offset of the file (``os.pwrite``).  The ``ETag`` (or
+    ``Last-Modified``) of the probe is send as ``If-Range`` to make sure all
+    segments are from the same content.
+
+    If the server does not support ranges, the content is downloaded by the
+    probe's connection (like :py:func:`fetch` does).  The ``tick`` function is
+    called in the thread of the caller with the sum of the bytes of all
+    segments.
+
+    Like :py:func:`fetch` the segments are written into a
+    :py:class:`TargetFile`.  Since the segments arrive out of order, the
+    ``checksum`` is calculated from the file when all segments are complete.
+    """
+    # pylint: disable=too-many-locals, import-outside-toplevel
+    import threading
+    from multiprocessing.pool import ThreadPool
+
+    probe  = openURL(url, {'Range': 'bytes=0-0'})
+    status = getStatus(probe)
+    rng    = contentRange(probe) if status == 206 else None
+    if rng is None or rng[2] is None:
+        if isinstance(probe, HTTPError):
+            raise probe
+        with closing(probe):
+            _stream(probe, fname, url, chunksize, tick, checksum)
+        return
+    probe.close()
+
+    total    = rng[2]
+    if_range = ifRange(validator(probe))
+
+    target  = TargetFile(fname, total)
+    lock    = threading.Lock()
+    counter = [0]
+
+    def fetchSegment(segment):
+        first, last = segment
+        headers = {'Range': 'bytes=%d-%d' % (first, last)}
+        if if_range:
+            headers['If-Range'] = if_range
+        resp = openURL(url, headers)
+        with closing(resp):
+            rng = contentRange(resp)
+            if getStatus(resp) != 206 or rng is None or rng[0] != first:
+                raise IOError("%s: range %d-%d not delivered (HTTP %s)" % (url, first, last, getStatus(resp)))
+            fd  = os.open(target.name, os.O_WRONLY | getattr(os, 'O_BINARY', 0))
+            pos = [first]
+
+            def write(x):
+                x = x[:last + 1 - pos[0]]
+                _pwrite(fd, x, pos[0])
+                pos[0] += len(x)
+                with lock:
+                    counter[0] += len(x)
+            try:
+                copyResponse(resp, write, chunksize=chunksize)
+            finally:
+                os.close(fd)
+        if pos[0] != last + 1:
+            raise IOError("%s: range %d-%d incomplete" % (url, first, last))
+
+    bounds = splitRange(total, segments)
+    pool   = ThreadPool(len(bounds) or 1)
+    with target:
+        try:
+            res = pool.map_async(fetchSegment, bounds)
+            while not res.ready():
+                res.wait(0.1)
+                if tick:
+                    tick(counter[0], total)
+            res.get()
+        finally:
+            pool.terminate()
+            pool.join()
+        target.written = total
+        h = newHash(checksum)
+        if h is not None:
+            hashFile(h, target.name)
+            verify(h, checksum, url)
+    if tick:
+        tick(total, total)
+
+
+def _proxyAuth(netloc):
+    u"""Split the credentials from the ``netloc`` of a proxy, returns
+    ``(host:port, headers)`` with a ``Proxy-Authorization`` header (if any)."""
+    # pylint: disable=import-outside-toplevel
+    import base64
+    from six.moves.urllib.parse import unquote  # pylint: disable=import-error
+    if '@' not in netloc:
+        return netloc, {}
+    auth, netloc = netloc.rsplit('@', 1)
+    user, _, password = auth.partition(':')
+    cred = '%s:%s' % (unquote(user), unquote(password))
+    cred = base64.b64encode(cred.encode('utf-8')).decode('ascii')
+    return netloc, {'Proxy-Authorization': 'Basic ' + cred}
+
+# ==============================================================================
+class ConnectionPool(object):
+# ==============================================================================
+
+    u"""Pool of persistent HTTP/1.1 (keep-alive) connections, per host.
+
+    Connections are taken from the pool for a request and given back when the
+    response has been read completely.  The pool is thread-safe, the number
+    of connections to a host is given by the number of concurrent requests.
+    Proxies from the environment (``http_proxy`` & Co.) are respected.
+
+    .. code-block:: python
+
+       pool = ConnectionPool()
+       resp = pool.request(url)
+       data = resp.read()
+       pool.release(resp)
+    """
+
+    REDIRECTS = (301, 302, 303, 307, 308)
+
+    def __init__(self, timeout=60, max_redirects=5):
+        # pylint: disable=import-outside-toplevel
+        import threading
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _connect(self, key):
+        # pylint: disable=import-outside-toplevel
+        from six.moves import http_client  # pylint: disable=import-error
+        scheme, netloc, proxy = key
+        if proxy is not None:
+            p_scheme, p_netloc = proxy
+            p_netloc, p_headers = _proxyAuth(p_netloc)
+            if scheme == 'https':
+                # like urllib: a CONNECT tunnel through the proxy and TLS with
+                # the target host, whatever the scheme of the proxy is
+                conn = http_client.HTTPSConnection(p_netloc, timeout=self.timeout)
+                conn.set_tunnel(netloc, headers=p_headers)
+                return conn
+            cls = http_client.HTTPSConnection if p_scheme == 'https' else http_client.HTTPConnection
+            return cls(p_netloc, timeout=self.timeout)
+        cls = http_client.HTTPSConnection if scheme == 'https' else http_client.HTTPConnection
+        return cls(netloc, timeout=self.timeout)
+
+    @staticmethod
+    def _key(url):
+        # pylint: disable=import-outside-toplevel
+        from six.moves.urllib.parse import urlsplit             # pylint: disable=import-error
+        from six.moves.urllib.request import getproxies, proxy_bypass # pylint: disable=import-error
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError("%s: only HTTP(S) URLs are supported" % url)
+        proxy = getproxies().get(parts.scheme)
+        if proxy and not proxy_bypass(parts.hostname):
+            proxy = urlsplit(proxy if '://' in proxy else 'http://' + proxy)
+            proxy = (proxy.scheme, proxy.netloc)
+        else:
+            proxy = None
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+        if proxy is not None and parts.scheme == 'http':
+            target = url
+        return (parts.scheme, parts.netloc, proxy), target
+
+    def _acquire(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._connect(key), False
+
+    def release(self, resp):
+        u"""Give the connection of the (completely read) response back to the pool."""
+        conn, key = resp.fspath_conn
+        resp.fspath_conn = None
+        if resp.will_close or not resp.isclosed():
+            conn.close()
+            return
+        with self._lock:
+            self._idle.setdefault(key, []).append(conn)
+
+    def discard(self, resp):
+        u"""Close the connection of a response which is not read completely."""
+        conn, _key = resp.fspath_conn
+        resp.fspath_conn = None
+        conn.close()
+
+    def close(self):
+        u"""Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def request(self, url, headers=None):
+        u"""``GET`` request of ``url``, redirects are followed.
+
+        Returns the ``HTTPResponse``, when the response is read, pass it to
+        :py:meth:`ConnectionPool.release` (or :py:meth:`ConnectionPool.discard`).
+        """
+        # pylint: disable=import-outside-toplevel
+        from six.moves.urllib.parse import urljoin  # pylint: disable=import-error
+        for _ in range(self.max_redirects + 1):
+            resp = self._request(url, headers)
+            if getStatus(resp) not in self.REDIRECTS:
+                return resp
+            location = getHeader(resp, 'Location')
+            resp.read()
+            self.release(resp)
+            if not location:
+                raise IOError("%s: redirect without location" % url)
+            url = urljoin(url, location)
+        raise IOError("%s: too many redirects" % url)
+
+    def _request(self, url, headers):
+        # pylint: disable=import-outside-toplevel
+        from six.moves import http_client  # pylint: disable=import-error
+        key, target = self._key(url)
+        hdrs = {'Connection': 'keep-alive'}
+        scheme, _netloc, proxy = key
+        if proxy is not None and scheme == 'http':
+            hdrs.update(_proxyAuth(proxy[1])[1])
+        hdrs.update(headers or {})
+        while True:
+            conn, reused = self._acquire(key)
+            try:
+                conn.request('GET', target, headers=hdrs)
+                resp = conn.getresponse()
+            except (EnvironmentError, http_client.HTTPException):
+                conn.close()
+                if reused:
+                    # stale keep-alive connection, try the next one
+                    continue
+                raise
+            resp.fspath_conn = (conn, key)
+            return resp
+
+# ==============================================================================
+def fetchMany(pairs, jobs=4, chunksize=None, tick=None):
+# ==============================================================================
+
+    u"""Download many ``(url, fname)`` pairs by ``jobs`` threads.
+
+    The threads share a :py:class:`ConnectionPool`, the connections are reused
+    (HTTP/1.1 keep-alive) for the following downloads from the same host, no
+    new TCP (and TLS) handshake needed.
+
+    Items of ``pairs`` can be triples ``(url, fname, checksum)``, for
+    ``checksum`` see :py:func:`fetch`.  Each file is written into a
+    :py:class:`TargetFile` which is renamed to ``fname`` on success.
+
+    :param tick: function called in the thread of the caller with
+                 ``(fname, count, max_count, down_bytes)`` after each finished
+                 download.
+    :return: list of the failed downloads ``(url, fname, exception)``
+    """
+    # pylint: disable=import-outside-toplevel
+    import threading
+    from multiprocessing.pool import ThreadPool
+
+    pairs   = list(pairs)
+    pool    = ConnectionPool()
+    lock    = threading.Lock()
+    counter = [0]
+
+    def count(data):
+        with lock:
+            counter[0] += len(data)
+
+    def fetchOne(pair):
+        url, fname = pair[:2]
+        checksum = pair[2] if len(pair) > 2 else None
+        try:
+            resp = pool.request(url)
+            try:
+                if getStatus(resp) != 200:
+                    raise IOError("%s: HTTP %s %s" % (url, getStatus(resp), resp.reason))
+                h = newHash(checksum)
+                with TargetFile(fname, int(getHeader(resp, 'Content-Length', 0))) as f:
+                    def write(data):
+                        f.write(data)
+                        count(data)
+                    copyResponse(resp, write, h, 0, 0, chunksize, None)
+                    verify(h, checksum, url)
+            except Exception:
+                pool.discard(resp)
+                raise
+            pool.release(resp)
+        except Exception as exc:  # pylint: disable=broad-except
+            return url, fname, exc
+        return url, fname, None
+
+    failed  = []
+    workers = ThreadPool(max(1, min(jobs, len(pairs))))
+    try:
+        for c, (url, fname, exc) in enumerate(workers.imap_unordered(fetchOne, pairs), start=1):
+            if exc is not None:
+                failed.append((url, fname, exc))
+            if tick:
+                tick(fname, c, len(pairs), counter[0])
+    finally:
+        workers.terminate()
+        workers.join()
+        pool.close()
+    return failed
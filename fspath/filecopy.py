@@ -0,0 +1,282 @@
+# -*- coding: utf-8; mode: python -*-
+u"""
+copy engine of :py:meth:`fspath.FSPath.copyfile` & Co.
+
+The data of a file is copied by the cheapest method the platform and the
+file systems support, in this order:
+
+1. ``reflink``: a copy-on-write clone (``FICLONE``, e.g. btrfs or XFS), no
+   data is copied at all.
+2. ``copy_file_range``: the kernel copies the data, a network file system
+   may copy on the server side (Linux, python 3.8+).
+3. ``sendfile``: the kernel copies the data (no copy to user space).
+4. ``userspace``: ``readinto`` and ``write`` with one buffer of
+   :py:data:`COPY_BUFSIZE` bytes.
+
+The method which has been used is returned and counted in :py:data:`STATS`.
+"""
+# pylint: disable=invalid-name
+
+import os
+import io
+import stat
+import errno
+import threading
+import collections
+
+FICLONE = 0x40049409
+u"""``ioctl`` request of a reflink (copy-on-write clone) of a file (Linux)"""
+
+COPY_BUFSIZE = 1024 * 1024
+u"""Buffer size of the user space copy"""
+
+CHUNK = 1024 * 1024 * 1024
+u"""Bytes copied by one ``copy_file_range`` / ``sendfile`` call"""
+
+METHODS = ('reflink', 'copy_file_range', 'sendfile', 'userspace')
+u"""Copy methods in the order they are tried"""
+
+STATS = collections.Counter()
+u"""Number of files copied by each method (for instrumentation)"""
+
+_STATS_LOCK = threading.Lock()
+
+# errors which mean: not supported for these files, try the next method
+_UNSUPPORTED = set(getattr(errno, x) for x in (
+    'EXDEV', 'ENOSYS', 'EINVAL', 'EOPNOTSUPP', 'ENOTSUP', 'ENOTTY', 'EBADF', 'EPERM', 'ETXTBSY')
+                   if hasattr(errno, x))
+
+def _reflink(src_fd, dst_fd):
+    try:
+        import fcntl  # pylint: disable=import-outside-toplevel
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+    except (ImportError, IOError, OSError):
+        return False
+    return True
+
+def _kernelCopy(func, src_fd, dst_fd, offset):
+    u"""Copy from ``offset`` to the end of file by ``func(src_fd, dst_fd,
+    offset, count)``, returns the new offset.  The ``OSError`` of a failed
+    call holds the offset reached so far in attribute ``copied``."""
+    while True:
+        try:
+            n = func(src_fd, dst_fd, offset, CHUNK)
+        except OSError as exc:
+            if exc.errno == errno.EINTR:
+                continue
+            exc.copied = offset
+            raise
+        if not n:
+            return offset
+        offset += n
+
+def _copyFileRange(src_fd, dst_fd, offset, count):
+    return os.copy_file_range(src_fd, dst_fd, count, offset, offset) # pylint: disable=no-member
+
+def _sendfile(src_fd, dst_fd, offset, count):
+    os.lseek(dst_fd, offset, os.SEEK_SET)
+    return os.sendfile(dst_fd, src_fd, offset, count)
+
+def _userspace(src_fd, dst_fd, offset):
+    buf = bytearray(COPY_BUFSIZE)
+    view = memoryview(buf)
+    os.lseek(src_fd, offset, os.SEEK_SET)
+    os.lseek(dst_fd, offset, os.SEEK_SET)
+    with io.open(src_fd, 'rb', buffering=0, closefd=False) as src:
+        while True:
+            n = src.readinto(buf)
+            if not n:
+                break
+            pos = 0
+            while pos < n:
+                pos += os.write(dst_fd, view[pos:n])
+
+# ==============================================================================
+def copyData(src_fd, dst_fd):
+# ==============================================================================
+
+    u"""Copy the content of file ``src_fd`` into the empty file ``dst_fd``.
+
+    The methods are tried in the order of :py:data:`METHODS`, a method which
+    fails before any data is copied (not supported by the platform or file
+    system) is skipped.
+
+    :return: name of the method which copied the data
+    """
+    if _reflink(src_fd, dst_fd):
+        return 'reflink'
+    offset = 0
+    for method, func in (('copy_file_range', _copyFileRange), ('sendfile', _sendfile)):
+        if not hasattr(os, method):
+            continue
+        try:
+            if _kernelCopy(func, src_fd, dst_fd, offset):
+                return method
+            # nothing copied: an empty file or a file with unknown size
+            # (e.g. procfs), which is only read by read() calls
+            break
+        except OSError as exc:
+            if exc.errno not in _UNSUPPORTED:
+                raise
+            # continue behind the data which has already been copied
+            offset = exc.copied
+    _userspace(src_fd, dst_fd, offset)
+    return 'userspace'
+
+# ==============================================================================
+def copyFile(src, dst, preserve=False):
+# ==============================================================================
+
+    u"""Copy file ``src`` to file (or into folder) ``dst`` by :py:func:`copyData`.
+
+    The permission bits are copied, with ``preserve=True`` also the times
+    and flags (like ``shutil.copy2``).  A symbolic link ``src`` is followed.
+
+    :raises shutil.SameFileError: ``src`` and ``dst`` are the same file
+    :raises shutil.SpecialFileError: ``src`` or ``dst`` is a named pipe,
+                 a socket or a device (opening it may block forever)
+    :return: name of the method which copied the data (see :py:data:`METHODS`)
+    """
+    import shutil  # pylint: disable=import-outside-toplevel
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        raise getattr(shutil, 'SameFileError', shutil.Error)(
+            "`%s` and `%s` are the same file" % (src, dst))
+    for fname in (src, dst):
+        try:
+            mode = os.stat(fname).st_mode
+        except OSError:
+            continue
+        if stat.S_ISFIFO(mode):
+            raise shutil.SpecialFileError("`%s` is a named pipe" % fname)
+        if stat.S_ISSOCK(mode):
+            raise shutil.SpecialFileError("`%s` is a socket" % fname)
+        if stat.S_ISCHR(mode) or stat.S_ISBLK(mode):
+            raise shutil.SpecialFileError("`%s` is a device" % fname)
+    with io.open(src, 'rb') as fsrc:
+        with io.open(dst, 'wb') as fdst:
+            method = copyData(fsrc.fileno(), fdst.fileno())
+    if preserve:
+        shutil.copystat(src, dst)
+    else:
+        shutil.copymode(src, dst)
+    with _STATS_LOCK:
+        STATS[method] += 1
+    return method
+
+# ==============================================================================
+def copyTree(src, dst, symlinks=False, ignore=None, jobs=1, dirs_exist_ok=False, tick=None):
+# ==============================================================================
+
+    u"""Recursively copy the directory tree ``src`` to ``dst``.
+
+    The thread of the caller walks the tree (:py:func:`fspath.walker.scanWalk`)
+    and creates the folders and symbolic links, the data of the files is
+    copied by a pool of ``jobs`` threads (:py:func:`copyFile` with
+    ``preserve=True``).  A copy to a network file system is latency bound,
+    the threads hide the latency.  The times of the folders are set when all
+    files are copied.
+
+    :param symlinks: copy symbolic links as links (default: copy the content)
+    :param ignore: function ``ignore(folder, names)`` which returns the names
+                   not to copy (see ``shutil.ignore_patterns``)
+    :param dirs_exist_ok: merge into existing folders (existing files are
+                   overwritten)
+    :param tick: function called with ``(fname, counter, max_count,
+                 copied_bytes)`` after a file is copied, ``max_count`` is the
+                 number of files found so far
+    :raises shutil.Error: with the list of ``(src, dst, error)`` of the files
+                 which could not be copied (after all other files are copied)
+    :return: ``collections.Counter`` of the copy methods used
+    """
+    # pylint: disable=too-many-arguments, too-many-locals, import-outside-toplevel
+    import shutil
+    from multiprocessing.pool import ThreadPool
+    from .walker import scanWalk
+    from .fspath import FSPath  # pylint: disable=cyclic-import
+
+    src, dst = FSPath(os.path.abspath(src)), os.path.abspath(dst)
+    methods = collections.Counter()
+    errors  = []
+    folders = []
+    state   = {'counter': 0, 'max_count': 0, 'bytes': 0}
+    lock    = threading.Lock()
+    slots   = threading.BoundedSemaphore(4 * max(1, jobs))
+
+    def copy(args):
+        source, target, size = args
+        try:
+            method = copyFile(source, target, preserve=True)
+        except (IOError, OSError, shutil.Error) as exc:
+            with lock:
+                errors.append((source, target, str(exc)))
+            return
+        finally:
+            if pool is not None:
+                slots.release()
+        with lock:
+            methods[method] += 1
+            state['counter'] += 1
+            state['bytes'] += size
+            if tick:
+                tick(target, state['counter'], state['max_count'], state['bytes'])
+
+    def onerror(exc):
+        errors.append((exc.filename, None, str(exc)))
+
+    pool = ThreadPool(jobs) if jobs > 1 else None
+    try:
+        for folder, dirs, files in scanWalk(src, onerror=onerror, followlinks=not symlinks):
+            target = os.path.join(dst, os.path.relpath(folder, src))
+            try:
+                os.makedirs(target)
+            except OSError:
+                if not (dirs_exist_ok and os.path.isdir(target)):
+                    raise
+            folders.append((folder, target))
+            names = set(ignore(folder, [x.name for x in dirs + files])) if ignore else ()
+            dirs[:] = [x for x in dirs if x.name not in names]
+            for x in list(dirs) + files:
+                if x.name in names:
+                    continue
+                if symlinks and x.ISLINK:
+                    if x in dirs:
+                        dirs.remove(x)
+                    link = os.path.join(target, x.name)
+                    if dirs_exist_ok and os.path.lexists(link):
+                        os.remove(link)
+                    os.symlink(os.readlink(x.PATH), link)
+                    continue
+                if x.ISDIR:
+                    continue
+                try:
+                    size = x.STAT.SIZE or 0
+                except OSError as exc:
+                    # e.g. a dangling symbolic link
+                    with lock:
+                        errors.append((x.PATH, os.path.join(target, x.name), str(exc)))
+                    continue
+                with lock:
+                    state['max_count'] += 1
+                args = (x.PATH, os.path.join(target, x.name), size)
+                if pool is None:
+                    copy(args)
+                else:
+                    slots.acquire()
+                    pool.apply_async(copy, (args,))
+        if pool is not None:
+            pool.close()
+            pool.join()
+    finally:
+        if pool is not None:
+            pool.terminate()
+    # the times of a folder change while the files are copied into it
+    for folder, target in reversed(folders):
+        try:
+            shutil.copystat(folder, target)
+        except OSError as exc:
+            errors.append((folder, target, str(exc)))
+    if errors:
+        raise shutil.Error(errors)
+    return methods
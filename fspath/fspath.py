@@ -13,20 +13,43 @@ import sys
 import io
 import os
 from os import path
-import platform
 import re
-import shutil
-import subprocess
 from glob import iglob
-from contextlib import closing
-import zipfile
-import tarfile
 
 import six
-from six.moves.urllib.request import urlopen # pylint: disable=E0401
 
-from .progressbar import progressbar, humanizeBytes
+from .progressbar import ProgressBar, humanizeBytes
 from .helper import Options
+from .fsstat import FSStat
+from .walker import scanWalk, excludeFilter, statFilter
+
+_new    = six.text_type.__new__
+_SEP    = os.sep
+_ALTSEP = os.altsep
+_CURDIR = os.curdir
+_PARDIR = os.pardir
+_NT     = os.name == 'nt'
+
+def _joinNormalized(head, tail):
+    u"""Join ``tail`` to the normalized path name ``head``.
+
+    Only ``tail`` is normalized.  Returns ``None`` if the result can't be build
+    without normalizing the whole path name (e.g. ``tail`` starts with ``..``).
+    """
+    if not head or head[0] == '~' or head == _CURDIR:
+        return None
+    if _SEP in tail or (_ALTSEP and _ALTSEP in tail):
+        tail = path.normpath(tail)
+        if path.isabs(tail) or tail.startswith(_PARDIR + _SEP):
+            return None
+    if not tail or tail == _CURDIR:
+        return six.text_type(head)
+    if tail == _PARDIR or (_NT and path.splitdrive(tail)[0]):
+        return None
+    # str.join: don't call FSPath.__add__ of head
+    if head[-1] == _SEP or head[-1] == _ALTSEP:
+        return u''.join((head, tail))
+    return u''.join((head, _SEP, tail))
 
 # ==============================================================================
 class FSPath(six.text_type):  # pylint: disable=too-many-public-methods
@@ -118,20 +141,81 @@ class FSPath(six.text_type):  # pylint: disable=too-many-public-methods
         pathname = path.normpath(path.expanduser(six.text_type(pathname)))
         return super(FSPath, cls).__new__(cls, pathname)
 
+    @classmethod
+    def _fromNormalized(cls, pathname):
+        u"""Trusted constructor for path names which are already normalized.
+
+        Skips ``normpath`` and ``expanduser`` of the constructor.  Empty names
+        and names starting with ``~`` go the normal way.
+        """
+        if not pathname or pathname[0] == '~':
+            return cls(pathname)
+        return _new(cls, pathname)
+
     @property
     def VALUE(self):
         u"""string of the path name"""
         return six.text_type(self)
 
+    STAT_TTL = 0
+    u"""Lifetime in seconds of a cached :py:attr:`FSPath.STAT` snapshot.
+
+    ``0`` disables the cache (default), ``None`` caches the snapshot until
+    :py:meth:`FSPath.clearStat` is called.  Set it on the class to enable the
+    cache for all path names or use :py:meth:`FSPath.cacheStat`.
+    """
+
+    @property
+    def STAT(self):
+        u"""Snapshot of the meta data (:py:class:`fspath.fsstat.FSStat`)
+
+        The snapshot is filled by one ``os.lstat`` call (plus a ``os.stat`` call
+        for symbolic links), all the meta data properties like ``EXISTS``,
+        ``SIZE`` or ``MTIME`` are answered from it.  To save syscalls, ask the
+        snapshot instead of the path name:
+
+        .. code-block:: python
+
+          >>> st = foo.STAT
+          >>> st.ISFILE and st.SIZE > x and st.MTIME > y
+
+        If caching is enabled (see :py:attr:`FSPath.STAT_TTL`), the snapshot is
+        reused as long as it is not older than ``STAT_TTL`` seconds.
+        """
+        ttl  = self.STAT_TTL
+        snap = self.__dict__.get('_stat')
+        if ttl != 0 and snap is not None:
+            if ttl is None or snap.AGE < ttl:
+                return snap
+        snap = FSStat(self)
+        if ttl != 0:
+            self._stat = snap  # pylint: disable=attribute-defined-outside-init
+        return snap
+
+    def cacheStat(self, ttl=None):
+        u"""Enable the cache of the :py:attr:`FSPath.STAT` snapshot of this path name.
+
+        :param ttl: lifetime in seconds, ``None`` caches until
+                    :py:meth:`FSPath.clearStat` is called, ``0`` disables the cache.
+        :return: the path name (self)
+        """
+        self.STAT_TTL = ttl  # pylint: disable=attribute-defined-outside-init, invalid-name
+        self.clearStat()
+        return self
+
+    def clearStat(self):
+        u"""Drop the cached :py:attr:`FSPath.STAT` snapshot of this path name."""
+        self.__dict__.pop('_stat', None)
+
     @property
     def EXISTS(self):
         u"""True if file/pathname exist"""
-        return path.exists(self)
+        return self.STAT.EXISTS
 
     @property
     def SIZE(self):
         u"""Size in bytes"""
-        return path.getsize(self)
+        return self.STAT.SIZE
 
     @property
     def READABLE(self):
@@ -151,12 +235,12 @@ class FSPath(six.text_type):  # pylint: disable=too-many-public-methods
     @property
     def ISDIR(self):
         u"""True if path is a folder"""
-        return path.isdir(self)
+        return self.STAT.ISDIR
 
     @property
     def ISFILE(self):
         u"""True if path is a file"""
-        return path.isfile(self)
+        return self.STAT.ISFILE
 
     @property
     def ISABSPATH(self):
@@ -166,7 +250,7 @@ class FSPath(six.text_type):  # pylint: disable=too-many-public-methods
     @property
     def ISLINK(self):
         u"""True if path is a symbolic link"""
-        return path.islink(self)
+        return self.STAT.ISLINK
 
     @property
     def ISMOUNT(self):
@@ -176,26 +260,28 @@ class FSPath(six.text_type):  # pylint: disable=too-many-public-methods
     @property
     def MTIME(self):
         """Return the last modification time, reported by os.stat()."""
-        return os.stat(self).st_mtime
+        return self.STAT.MTIME
 
     @property
     def ATIME(self):
         """Return the last access time, reported by os.stat()."""
-        return os.stat(self).st_atime
+        return self.STAT.ATIME
 
     @property
     def CTIME(self):
         """Return the metadata change time, reported by os.stat()."""
-        return os.stat(self).st_ctime
+        return self.STAT.CTIME
 
     @property
     def ISZIP(self):
         u"""True if path is a ZIP file"""
+        import zipfile  # pylint: disable=import-outside-toplevel
         return zipfile.is_zipfile(self)
 
     @property
     def ISTAR(self):
         u"""True if path is a TAR archive file"""
+        import tarfile  # pylint: disable=import-outside-toplevel
         return tarfile.is_tarfile(self)
 
     @property
@@ -204,7 +290,7 @@ class FSPath(six.text_type):  # pylint: disable=too-many-public-methods
 
         E.g.: ``/path/to/folder/filename.ext`` --> ``/path/to/folder``
         """
-        return self.__class__(path.dirname(self))
+        return self._fromNormalized(path.dirname(self))
 
     @property
     def BASENAME(self):
@@ -212,7 +298,7 @@ class FSPath(six.text_type):  # pylint: disable=too-many-public-methods
 
         E.g.: ``/path/to/folder/filename.ext`` --> ``filename.ext``
         """
-        return self.__class__(path.basename(self))
+        return self._fromNormalized(path.basename(self))
 
     @property
     def FILENAME(self):
@@ -221,7 +307,7 @@ class FSPath(six.text_type):  # pylint: disable=too-many-public-methods
         E.g.: ``/path/to/folder/filename.ext`` --> ``filename``
 
         """
-        return self.__class__(path.splitext(path.basename(self))[0])
+        return self._fromNormalized(path.splitext(path.basename(self))[0])
 
     @property
     def SUFFIX(self):
@@ -230,7 +316,7 @@ class FSPath(six.text_type):  # pylint: disable=too-many-public-methods
         E.g.: ``/path/to/folder/filename.ext`` --> ``.ext``
 
         """
-        return self.__class__(path.splitext(self)[1])
+        return self._fromNormalized(path.splitext(self)[1])
 
     @property
     def SKIPSUFFIX(self):
@@ -238,7 +324,7 @@ class FSPath(six.text_type):  # pylint: disable=too-many-public-methods
 
         E.g.: ``/path/to/folder/filename.ext`` --> ``/path/to/folder/filename``
         """
-        return self.__class__(path.splitext(self)[0])
+        return self._fromNormalized(path.splitext(self)[0])
 
     @property
     def ABSPATH(self):
@@ -247,12 +333,12 @@ class FSPath(six.text_type):  # pylint: disable=too-many-public-methods
         E.g: ``../to/../to/folder/filename.ext`` --> ``/path/to/folder/filename.ext``
 
         """
-        return self.__class__(path.abspath(self))
+        return self._fromNormalized(path.abspath(self))
 
     @property
     def REALPATH(self):
         u"""The real pathname without symbolic links."""
-        return self.__class__(path.realpath(self))
+        return self._fromNormalized(path.realpath(self))
 
     @property
     def POSIXPATH(self):
@@ -312,11 +398,16 @@ class FSPath(six.text_type):  # pylint: disable=too-many-public-methods
         retVal = False
         if not self.ISDIR:
             os.makedirs(self, mode)
+            self.clearStat()
             retVal = True
         return retVal
 
     def __div__(self, pathname):
-        return self.__class__(self.VALUE + os.sep + six.text_type(pathname))
+        name = six.text_type(pathname)
+        joined = _joinNormalized(self, name)
+        if joined is None:
+            return self.__class__(self.VALUE + os.sep + name)
+        return self._fromNormalized(joined)
     __truediv__ = __div__
 
     def __rdiv__(self, pathname):
@@ -330,7 +421,7 @@ class FSPath(six.text_type):  # pylint: disable=too-many-public-methods
 
     def relpath(self, start):
         u"""Return a relative version of a path"""
-        return self.__class__(path.relpath(self, start))
+        return self._fromNormalized(path.relpath(self, start))
 
     def splitpath(self):
         u"""Split a pathname.
@@ -338,12 +429,12 @@ class FSPath(six.text_type):  # pylint: disable=too-many-public-methods
         Return tuple (head, tail) where tail is everything after the final
         slash.  Either part may be empty."""
         head, tail = path.split(self)
-        return (self.__class__(head), self.__class__(tail))
+        return (self._fromNormalized(head), self._fromNormalized(tail))
 
     def listdir(self):
         u"""Return a iterator which yields the names of the files in the directory."""
         for name in os.listdir(self):
-            yield self.__class__(name)
+            yield self._fromNormalized(name)
 
     def glob(self, pattern, relpath=False):
         u"""Return an iterator which yields the paths matching a pathname pattern.
@@ -358,7 +449,7 @@ class FSPath(six.text_type):  # pylint: disable=too-many-public-methods
                 obj = obj.relpath(self)
             yield obj
 
-    def walk(self, topdown=True, onerror=None, followlinks=False):
+    def walk(self, topdown=True, onerror=None, followlinks=False, workers=1, ordered=False):
         u"""Directory tree generator.
 
         For each directory in the directory tree rooted at top (including top
@@ -378,60 +469,134 @@ class FSPath(six.text_type):  # pylint: disable=too-many-public-methods
         systems that support them.  In order to get this functionality, set the
         optional argument 'followlinks' to true.
 
+        With ``workers=N`` (N > 1) the folders are listed concurrently by a pool
+        of N threads (only ``topdown``).  By default the folders are yielded in
+        the order they are listed by the pool, with ``ordered=True`` the order
+        is the same as in the single threaded walk.  Pruning ``dirnames`` works
+        in both modes.
+
         .. caution::
 
            If you pass a relative pathname for top, don't change the current
            working directory between resumptions of walk.  walk never changes
            the current directory, and assumes that the client doesn't either.
 
-        For more details see ``os.walk``"""
+        For more details see ``os.walk``.  To walk with the file type and stat
+        data from the folder listing see :py:meth:`FSPath.scan`."""
 
-        # argh those fu.. idiots from python impleted fspath in 3.4 which no
-        # longer supports string-like objects (inheritance of str) in os.walk.
-        # So we have to typecast str(self).
+        for folder, dirs, files in scanWalk(self, topdown, onerror, followlinks, workers, ordered):
+            dirnames = [self._fromNormalized(x.name) for x in dirs]
 
-        for dirpath, dirnames, filenames in os.walk(str(self), topdown, onerror, followlinks):
-            dirs = [self.__class__(x) for x in dirnames]
+            yield (folder
+                   , dirnames
+                   , [self._fromNormalized(x.name) for x in files])
 
-            yield (self.__class__(dirpath)
-                   , dirs
-                   , [self.__class__(x) for x in filenames])
+            if topdown:
+                keep = set(dirnames)
+                dirs[:] = [x for x in dirs if x.name in keep]
 
-            for name in list(dirnames):
-                if name not in dirs:
-                    dirnames.remove(name)
+    def scan(self, topdown=True, onerror=None, followlinks=False, workers=1, ordered=False):
+        u"""Directory tree generator based on ``os.scandir``.
 
+        Same as :py:meth:`FSPath.walk`, but the dirnames and filenames are
+        lists of :py:class:`fspath.walker.FSEntry` objects, which carry the
+        file type and stat data from ``os.scandir``.  The ``FSPath`` objects of
+        the entries are build lazy (``entry.PATH``)::
 
-    def reMatchFind(self, name, use_files=True, use_dirs=True, followlinks=False, relpath=False):
+            for folder, dirs, files in foo.scan():
+                dirs[:] = [d for d in dirs if d.name != '.git']
+                for f in files:
+                    if f.ISFILE and f.STAT.SIZE > 1024:
+                        print(f.PATH)
+
+        To prune the walk, remove entries from ``dirs`` (in-place).  For
+        ``workers`` and ``ordered`` see :py:meth:`FSPath.walk`.
+        """
+        return scanWalk(self, topdown, onerror, followlinks, workers, ordered)
+
+    def reMatchFind(self, name, use_files=True, use_dirs=True, followlinks=False, relpath=False
+                    , workers=1, ordered=False, exclude=None, mindepth=None, maxdepth=None
+                    , use_links=True, minsize=None, maxsize=None, newer=None, older=None
+                    , predicate=None):
         u"""Returns iterator which yields matching path names
 
         :param use_files:   iterator includes names of files
         :param use_dirs:    iterator includes names of folders
         :param followlinks: follow symbolic links
+        :param workers:     number of threads listing the folders (see :py:meth:`FSPath.walk`)
+        :param ordered:     with ``workers``, yield in the order of the single threaded walk
+        :param exclude:     list of shell-style patterns (``fnmatch``), matching
+                            files and folders are skipped, matching folders are
+                            not descended
+        :param mindepth:    do not yield names at levels less than ``mindepth``
+                            (names in the top folder are at level 1)
+        :param maxdepth:    descend at most ``maxdepth`` levels
+        :param use_links:   iterator includes symbolic links
+        :param minsize:     only names with a size (in bytes) >= ``minsize``
+        :param maxsize:     only names with a size (in bytes) <= ``maxsize``
+        :param newer:       only names modified after timestamp ``newer``
+        :param older:       only names modified before timestamp ``older``
+        :param predicate:   function called with the :py:class:`fspath.walker.FSEntry`
+                            of a matching name, names are only yielded if it
+                            returns ``True``
+
+        All filters are tested on the raw names and on the ``os.scandir``
+        entries, before a ``FSPath`` object is build.  The size and time filters
+        are only tested for names which pass the name filters.
 
         To find all C and header files use::
 
-            folder.reMatchFind("*\\.[ch]")
+            folder.reMatchFind(".*\\.[ch]$")
 
         To find the first C or header file use::
 
-            next(myFolder.reMatchFind("*\\.[ch]"), None)
-        """
+            next(myFolder.reMatchFind(".*\\.[ch]$"), None)
 
-        name_re = re.compile(name)
-        for folder, dirnames, filenames in self.walk(followlinks=followlinks):
-            if use_dirs:
-                for d_name in [x for x in dirnames if name_re.match(x)]:
-                    obj = folder / d_name
-                    if relpath:
-                        obj = obj.relpath(self)
-                    yield obj
-            if use_files:
-                for f_name in [x for x in filenames if name_re.match(x)]:
-                    obj = folder / f_name
-                    if relpath:
-                        obj = obj.relpath(self)
-                    yield obj
+        To find all python files, without looking into the ``.git`` and
+        ``node_modules`` folders use::
+
+            folder.reMatchFind(".*\\.py$", exclude=['.git', 'node_modules'])
+        """
+        # pylint: disable=too-many-arguments, too-many-locals, too-many-branches
+
+        name_re    = re.compile(name)
+        exclude_re = excludeFilter(exclude)
+        stat_test  = statFilter(minsize, maxsize, newer, older)
+
+        def accept(entry):
+            if not name_re.match(entry.name):
+                return False
+            if not use_links and entry.ISLINK:
+                return False
+            if stat_test is not None and not stat_test(entry):
+                return False
+            return predicate is None or bool(predicate(entry))
+
+        # depth and relative path name of the folders to come
+        levels = {self: (0, self.__class__(path.curdir))}
+
+        for folder, dirs, files in self.scan(followlinks=followlinks, workers=workers, ordered=ordered):
+            depth, rel_folder = levels.pop(folder)
+            if exclude_re is not None:
+                dirs[:] = [x for x in dirs if not exclude_re.match(x.name)]
+            show = mindepth is None or depth + 1 >= mindepth
+
+            if use_dirs and show:
+                for x in dirs:
+                    if accept(x):
+                        yield (rel_folder / x.name) if relpath else x.PATH
+            if use_files and show:
+                for x in files:
+                    if exclude_re is not None and exclude_re.match(x.name):
+                        continue
+                    if accept(x):
+                        yield (rel_folder / x.name) if relpath else x.PATH
+
+            if maxdepth is not None and depth + 1 >= maxdepth:
+                dirs[:] = []
+            for x in dirs:
+                if followlinks or not x.ISLINK:
+                    levels[x.PATH] = (depth + 1, (rel_folder / x.name) if relpath else None)
 
     def suffix(self, new_suffix):
         u"""Return path name with ``new_suffix``"""
@@ -440,41 +605,102 @@ class FSPath(six.text_type):  # pylint: disable=too-many-public-methods
     def copyfile(self, dest, preserve=False):
         u"""Copy the file src to the file or directory dest.
 
+        The data is copied by the cheapest method: a reflink (copy-on-write
+        clone), ``copy_file_range``, ``sendfile`` or a user space copy (see
+        :py:mod:`fspath.filecopy`).
+
         :dest str: The destination may be a directory
-        :preserve bool: copies permission bits
+        :preserve bool: copies also times and flags (permission bits are always copied)
+        :return: the copy method used (see :py:data:`fspath.filecopy.METHODS`)
         """
-        if preserve:
-            shutil.copy2(self, dest)
-        else:
-            shutil.copy(self, dest)
+        from .filecopy import copyFile  # pylint: disable=import-outside-toplevel
+        return copyFile(self, dest, preserve)
+
+    def copytree(self, dest, symlinks=False, ignore=None, jobs=1, dirs_exist_ok=False
+                 , ticker=False, pipe=sys.stdout):
+        u"""Recursively copy the entire directory tree
 
-    def copytree(self, dest, symlinks=False, ignore=None):
-        u"""Recursively copy the entire directory tree"""
-        shutil.copytree(self, dest, symlinks, ignore)
+        The folders are created by the calling thread, the files are copied by
+        ``jobs`` threads (see :py:func:`fspath.filecopy.copyTree`)::
+
+            FSPath("dataset").copytree("/mnt/nfs/dataset", jobs=16)
+
+        :param dirs_exist_ok: merge into existing folders
+        :param ticker: ``True`` for a progress-bar or a function called with
+                       ``(fname, counter, max_count, copied_bytes)`` after each file
+        :return: ``collections.Counter`` of the copy methods used (see
+                 :py:data:`fspath.filecopy.METHODS`)
+        """
+        # pylint: disable=too-many-arguments
+        from .filecopy import copyTree  # pylint: disable=import-outside-toplevel
+
+        if ticker and not isinstance(ticker, bool):
+            tick_func = ticker
+        else:
+            bar = ProgressBar(pipe=pipe)
+            def tick_func(fname, counter, max_count, copied_bytes):
+                u"""copytree's default ticker"""
+                bar.draw(counter, max_count
+                         , prompt = "copy: %-20s %s" % (
+                             FSPath(fname).BASENAME[:20], humanizeBytes(copied_bytes)))
+
+        methods = copyTree(self, dest, symlinks, ignore, jobs, dirs_exist_ok
+                           , tick=tick_func if ticker else None)
+        if ticker and isinstance(ticker, bool):
+            pipe.write('\n')
+        return methods
 
     def move(self, dest):
         u"""Move path to another location (dest)"""
+        import shutil  # pylint: disable=import-outside-toplevel
         shutil.move(self, dest)
+        self.clearStat()
         return self.__class__(dest)
 
-    def delete(self):
-        u"""remove file/folder"""
+    def delete(self, jobs=1, background=False):
+        u"""remove file/folder
+
+        For ``jobs`` and ``background`` see :py:meth:`FSPath.rmtree`.
+        """
         if self.ISDIR:
-            self.rmtree()
-        else:
-            self.rmfile()
+            return self.rmtree(jobs=jobs, background=background)
+        self.rmfile()
+        return None
+
+    def rmtree(self, ignore_errors=False, onerror=None, jobs=1, background=False):
+        u"""remove tree
+
+        The entries are removed relative to the file descriptor of their
+        folder, with ``jobs=N`` the folders are removed by N threads (see
+        :py:func:`fspath.delete.removeTree`).
+
+        With ``background=True`` the tree is renamed to a hidden sibling which
+        is removed by a detached process, the method returns immediately (see
+        :py:func:`fspath.delete.deleteLater`)::
 
-    def rmtree(self, ignore_errors=False, onerror=None):
-        u"""remove tree"""
-        shutil.rmtree(self, ignore_errors, onerror)
+            FSPath("build").rmtree(background=True)
+
+        :return: with ``background=True`` the new name of the tree
+        """
+        # pylint: disable=import-outside-toplevel
+        if background:
+            from .delete import deleteLater
+            trash = deleteLater(self, jobs)
+            self.clearStat()
+            return trash if trash is None else self.__class__(trash)
+        from .delete import removeTree
+        removeTree(self, jobs, ignore_errors, onerror)
+        self.clearStat()
+        return None
 
     def rmfile(self):
         u"""remove file"""
         os.remove(self)
+        self.clearStat()
 
     def filesize(self, precision=None):
         u"""Filesize in bytes or with precision"""
-        size = path.getsize(self)
+        size = self.SIZE
         if precision is not None:
             size = humanizeBytes(size, precision)
         return size
@@ -511,6 +737,7 @@ class FSPath(six.text_type):  # pylint: disable=too-many-public-methods
 
     def startFile(self):
         """Start a file with its associated application."""
+        import platform  # pylint: disable=import-outside-toplevel
         system  = platform.system()
         if system == 'Windows':
             os.startfile(self) # pylint: disable=no-member
@@ -529,79 +756,204 @@ class FSPath(six.text_type):  # pylint: disable=too-many-public-methods
         with self.openTextFile(encoding=encoding, errors=errors) as f:
             return f.read()
 
-    def extract(self, folder=".", pwd=None, ticker=False, pipe=sys.stdout):
+    def extract(self, folder=".", pwd=None, ticker=False, pipe=sys.stdout, jobs=1, stream=False
+                , incremental=False, prune=False, members=None, include=None, exclude=None):
         u"""Extract TAR or ZIP archive to 'folder'
 
-        Uses ``extractall`` from :py:class:`tarfile.TarFile` and
-        :py:class:`zipfile.Zipfile` to extract into ``folder``.
+        Uses :py:class:`tarfile.TarFile` and :py:class:`zipfile.Zipfile` to
+        extract into ``folder`` (see :py:func:`fspath.archive.extractArchive`).
+
+        With ``jobs=N`` the members of a ZIP archive are extracted by N
+        processes (the members of a ZIP are compressed independently).
+
+        With ``stream=True`` a generator is returned which extracts the members
+        while it is consumed, a TAR archive is read in one pass with constant
+        memory (see :py:func:`fspath.archive.iterExtract`)::
+
+            for member in arch.extract(folder, stream=True):
+                print(member.name)
+
+        With ``incremental=True`` files which are already extracted (same size
+        and mtime, for ZIP the CRC if the mtime differs) are skipped, with
+        ``prune=True`` files in ``folder`` which are not in the archive are
+        removed.
+
+        To extract only some of the members, pass their names in ``members``
+        and/or shell-style patterns (or a compiled regular expression) in
+        ``include`` and ``exclude``.  The names are tested before any data is
+        decompressed (see :py:func:`fspath.archive.memberFilter`)::
+
+            arch.extract(folder, include='*/MANIFEST.in', exclude=['*/tests/*'])
 
         :folder str: folder to extract into
         :pwd str: password for crypted (only ZIP)
         :return: members in an iterable form (list or just iterator)
         """
-
-        class ArchiveMember(object): # pylint: disable=missing-docstring, too-few-public-methods
-            u"""wrapper for an archive member (tar or zip members)"""
-            def __init__(self, member, archive):
-                self.ISTAR       = isinstance(archive, tarfile.TarFile)
-                self.ISZIP       = isinstance(archive, zipfile.ZipFile)
-                self.archive     = archive
-                if self.ISTAR:
-                    self.member  = member
-                    self.name    = FSPath(member.name)
-                    self.size    = member.size
-                elif self.ISZIP:
-                    self.member  = self.archive.getinfo(member)
-                    self.name    = FSPath(self.member.filename)
-                    self.size    = self.member.file_size
-
-            def extract(self, folder="", pwd=None):
-                u"""wrapped extract member function"""
-                if self.ISTAR:
-                    self.archive.extract(self.member, folder or "")
-                elif self.ISZIP:
-                    self.archive.extract(self.member, folder or None, pwd)
-                else:
-                    raise tarfile.ExtractError("%s archive type is unknown" % self.member)
-
-        if self.ISTAR:
-            arc = tarfile.open(self, 'r:*')
-            am  = list(arc.getmembers())
-            mx  = len(am)
-        elif self.ISZIP:
-            arc = zipfile.ZipFile(self)
-            am  = list(arc.namelist())
-            mx  = len(am)
-        else:
-            raise tarfile.ExtractError("%s archive type is unknown" % self)
+        # pylint: disable=too-many-arguments, import-outside-toplevel
+        from .archive import extractArchive, memberFilter
 
         if ticker and not isinstance(ticker, bool):
             tick_func = ticker
         else:
+            bar = ProgressBar(pipe=pipe)
             def tick_func(member, counter, max_count):
                 u"""extract's default ticker"""
                 n = member.name.BASENAME
-                progressbar(counter, max_count
-                            , prompt = "extract: %-20s" % (n if len(n) < 20 else n + "..")
-                            , pipe   = pipe)
+                bar.draw(counter, max_count
+                         , prompt = "extract: %-20s" % (n if len(n) < 20 else n + ".."))
 
         folder = self.__class__(folder)
         if not folder.EXISTS:
             folder.makedirs()
 
-        members = []
-        for c, m in enumerate(am, start=1):
-            m = ArchiveMember(m, arc)
-            members.append(m)
-            if ticker:
-                tick_func(m, c, mx)
-            m.extract(folder, pwd)
+        members = extractArchive(self, folder, pwd, tick=tick_func if ticker else None, jobs=jobs
+                                 , stream=stream, incremental=incremental, prune=prune
+                                 , select=memberFilter(members, include, exclude))
+        if stream:
+            return self._tickerDone(members, ticker, pipe)
 
         if ticker and isinstance(ticker, bool):
             pipe.write('\n')
 
         return members
 
+    @staticmethod
+    def _tickerDone(members, ticker, pipe):
+        for m in members:
+            yield m
+        if ticker and isinstance(ticker, bool):
+            pipe.write('\n')
+
+    def extractFrom(self, url, pwd=None, ticker=False, pipe=sys.stdout):
+        u"""Extract the TAR or ZIP archive at ``url`` into this folder while it is
+        downloaded (no intermediate archive file).
+
+        TAR archives are extracted from the stream, ZIP archives are read by
+        HTTP ``Range`` requests if the server supports them (see
+        :py:func:`fspath.archive.extractURL`)::
+
+            FSPath('/tmp/foo').extractFrom(
+                "https://github.com/return42/fspath/archive/master.tar.gz", ticker=True)
+
+        :param ticker: ``True`` for a progress-bar or a function called with
+                       ``(name, down_bytes, max_bytes)`` after each member
+        :return: list with the names of the members
+        """
+        from .archive import extractURL # pylint: disable=import-outside-toplevel
+
+        if ticker and not isinstance(ticker, bool):
+            tick_func = ticker
+        else:
+            bar = ProgressBar(pipe=pipe)
+            def tick_func(name, down_bytes, max_bytes):
+                u"""extractFrom's default ticker"""
+                n = FSPath(name).BASENAME
+                bar.draw(down_bytes, max_bytes or down_bytes
+                         , prompt = "extract: %-20s" % (n if len(n) < 20 else n + ".."))
+
+        if not self.EXISTS:
+            self.makedirs()
+        names = extractURL(url, self, pwd, tick=tick_func if ticker else None)
+        if ticker and isinstance(ticker, bool):
+            pipe.write('\n')
+        return names
+
+    def compress(self, target, format=None, jobs=1, level=None, ticker=False, pipe=sys.stdout):
+        u"""Create the archive ``target`` with this file or folder.
+
+        The names in the archive start with the base name of this path name.
+        With ``jobs=N`` the data is compressed by N processes, a ``.tar.gz``
+        is written block parallel like ``pigz`` does (see
+        :py:mod:`fspath.compress`)::
+
+            FSPath("build/out").compress("/tmp/out.tar.gz", jobs=8)
+
+        :param format: ``'zip'``, ``'tar.gz'``, ``'tar.xz'`` or ``'tar'``
+                       (default: by the suffix of ``target``)
+        :param level: compression level (default: 6)
+        :param ticker: ``True`` for a progress-bar or a function called with
+                       ``(arcname, counter, max_count)`` after each member
+        :return: list with the names of the members
+        """
+        # pylint: disable=redefined-builtin, too-many-arguments
+        from .compress import createArchive # pylint: disable=import-outside-toplevel
+
+        if ticker and not isinstance(ticker, bool):
+            tick_func = ticker
+        else:
+            bar = ProgressBar(pipe=pipe)
+            def tick_func(name, counter, max_count):
+                u"""compress's default ticker"""
+                n = FSPath(name).BASENAME
+                bar.draw(counter, max_count
+                         , prompt = "compress: %-20s" % (n if len(n) < 20 else n + ".."))
+
+        names = createArchive(self, target, format, jobs, level, tick=tick_func if ticker else None)
+        if ticker and isinstance(ticker, bool):
+            pipe.write('\n')
+        return names
+
+    def aextract(self, folder=".", pwd=None, executor=None, **kwargs):
+        u"""asyncio version of :py:meth:`FSPath.extract` (python 3.7+)
+
+        Returns a coroutine, the archive is extracted in the ``executor`` (see
+        :py:func:`fspath.aio.aextract`)::
+
+            members = await FSPath("foo.tar.gz").aextract("/tmp/foo")
+        """
+        from .aio import aextract # pylint: disable=import-outside-toplevel
+        return aextract(self, folder, pwd, executor=executor, **kwargs)
+
+    def openArchiveMember(self, name, index=True):
+        u"""Open file ``name`` from the TAR or ZIP archive for reading (binary).
+
+        A member of a compressed TAR archive is found by the seek index in the
+        sidecar file ``<archive>.fsidx``, the decompression starts at the
+        nearest checkpoint in front of the member (see
+        :py:mod:`fspath.tarindex`).  The index is build on the first call, with
+        ``index=False`` no index is used or build::
+
+            with FSPath("backup.tar.gz").openArchiveMember("var/log/syslog") as f:
+                data = f.read()
+
+        :raises KeyError: if there is no file ``name`` in the archive
+        """
+        if self.ISZIP:
+            return self.openMember(name)
+        from .tarindex import openArchiveMember # pylint: disable=import-outside-toplevel
+        return openArchiveMember(self, name, build=index)
+
+    def openMember(self, name, pwd=None):
+        u"""Open file ``name`` from the ZIP or TAR archive for reading (binary)
+        without extracting it.
+
+        The data of a stored (uncompressed) ZIP member is read from a memory
+        map of the archive, no copy to a buffer or temporary file (see
+        :py:func:`fspath.archive.openMember`)::
+
+            with FSPath("foo.whl").openMember("foo/__init__.py") as f:
+                source = f.read()
+
+        :pwd str: password for crypted (only ZIP)
+        :raises KeyError: if there is no file ``name`` in the archive
+        """
+        from .archive import openMember # pylint: disable=import-outside-toplevel
+        return openMember(self, name, pwd)
+
+    def iterMembers(self, members=None, include=None, exclude=None):
+        u"""Generator of the members of the ZIP or TAR archive, a member is read
+        by ``member.open()`` (see :py:func:`fspath.archive.iterMembers`)::
+
+            for member in FSPath("foo.jar").iterMembers(include='*.class'):
+                with member.open() as f:
+                    data = f.read()
+
+        A TAR archive is read in one pass, read a member before you take the
+        next one.  For ``members``, ``include`` and ``exclude`` see
+        :py:meth:`FSPath.extract`.
+        """
+        from .archive import iterMembers, memberFilter # pylint: disable=import-outside-toplevel
+        return iterMembers(self, memberFilter(members, include, exclude))
 
     def Popen(self, *args, **kwargs):  # pylint: disable=invalid-name
         u"""Get a ``subprocess.Popen`` object (``proc``).
@@ -625,6 +977,7 @@ class FSPath(six.text_type):  # pylint: disable=too-many-public-methods
 
         """
 
+        import subprocess  # pylint: disable=import-outside-toplevel
         defaults = {
             'stdout'               : subprocess.PIPE
             , 'stderr'             : subprocess.PIPE
@@ -634,11 +987,13 @@ class FSPath(six.text_type):  # pylint: disable=too-many-public-methods
         defaults.update(kwargs)
         return subprocess.Popen([self,] + list(args), **defaults)
 
-    def download(self, url, chunksize=1048576, ticker=False, pipe=sys.stdout):
+    def download(self, url, chunksize=None, ticker=False, pipe=sys.stdout, resume=False, segments=None
+                 , checksum=None, cache=None):
         u"""Download URL into file
 
-        The default chunksize is 1048576 Bytes, with ticker=True an progress-bar
-        is prompted.
+        By default the chunk size is adapted to the throughput, an ``int``
+        ``chunksize`` fixes it (see :py:func:`fspath.download.copyResponse`).
+        With ticker=True an progress-bar is prompted.
 
         E.g. to download FSPath's README.rst with a progressbar on stdout::
 
@@ -646,34 +1001,115 @@ class FSPath(six.text_type):  # pylint: disable=too-many-public-methods
 
             readme = FSPath("README.rst")
             readme.download(url, ticker=True)
+
+        With ``resume=True`` a partial download (e.g. from a broken connection)
+        is continued by a HTTP ``Range`` request, the content is validated by
+        ``ETag`` / ``Last-Modified`` (see :py:func:`fspath.download.fetch`).
+
+        With ``segments=N`` the content is split into N byte ranges which are
+        downloaded in parallel (see :py:func:`fspath.download.fetchSegments`),
+        ``resume`` is not supported in this mode.
+
+        The content is downloaded into a temporary file next to the target,
+        which is synced and renamed to the target name when the download is
+        complete.  With ``checksum=('sha256', hexdigest)`` the chunks are
+        hashed as they arrive, the target is only created if the checksum
+        matches (otherwise :py:class:`fspath.download.ChecksumError` is raised).
+
+        With ``cache=True`` (or a :py:class:`fspath.cache.DownloadCache`
+        object) the content is taken from the local download cache if it has
+        not been modified on the server (``304 Not Modified``).  The cache
+        can't be combined with ``resume`` or ``segments``.
         """
 
         if ticker and not isinstance(ticker, bool):
             tick_func = ticker
         else:
+            bar = ProgressBar(pipe=pipe)
             def tick_func(fname, down_bytes, max_bytes):
                 u"""download's default ticker"""
-                progressbar(down_bytes, max_bytes
-                            , prompt = "download: %s[%s]" % (fname.BASENAME, humanizeBytes(max_bytes, 1))
-                            , pipe   = pipe)
-
-        with closing(urlopen(url)) as d:
-            with open(self, "wb") as f:
-                # pylint: disable=no-member
-                max_bytes  = int(d.headers.get("Content-Length", 0))
-                down_bytes = 0
-                if chunksize is None:
-                    chunksize = max_bytes // 100
-                while 1:
-                    x = d.read(chunksize)
-                    if not bool(len(x)):
-                        break
-                    f.write(x)
-                    down_bytes += len(x)
-                    if ticker:
-                        tick_func(self, down_bytes, max_bytes)
-                if ticker:
-                    pipe.write('\n')
+                bar.draw(down_bytes, max_bytes
+                         , prompt = "download: %s[%s]" % (fname.BASENAME, humanizeBytes(max_bytes, 1)))
+
+        def tick(down_bytes, max_bytes):
+            tick_func(self, down_bytes, max_bytes)
+
+        # pylint: disable=import-outside-toplevel
+        from .download import fetch, fetchSegments
+        if segments and resume:
+            raise ValueError("download: resume is not supported with segments")
+        if cache and (resume or (segments and segments > 1)):
+            raise ValueError("download: cache is not supported with resume or segments")
+        if cache is True:
+            from .cache import DownloadCache
+            cache = DownloadCache()
+        try:
+            if cache:
+                cache.fetch(self, url, chunksize=chunksize, tick=tick if ticker else None, checksum=checksum)
+            elif segments and segments > 1:
+                fetchSegments(self, url, segments, chunksize=chunksize, tick=tick if ticker else None
+                              , checksum=checksum)
+            else:
+                fetch(self, url, chunksize=chunksize, tick=tick if ticker else None, resume=resume
+                      , checksum=checksum)
+        finally:
+            self.clearStat()
+        if ticker:
+            pipe.write('\n')
+
+    def adownload(self, url, chunksize=1048576, ticker=None, checksum=None, headers=None, executor=None
+                  , timeout=60):
+        u"""asyncio version of :py:meth:`FSPath.download` (python 3.7+)
+
+        Returns a coroutine, the network is read non-blocking, writes to the
+        disk run in the ``executor`` (see :py:func:`fspath.aio.adownload`)::
+
+            await FSPath("README.rst").adownload(url)
+
+        :param ticker: function called with ``(fname, down_bytes, max_bytes)``
+        :param timeout: seconds to wait for the connect and for each read
+        """
+        # pylint: disable=too-many-arguments
+        from .aio import adownload # pylint: disable=import-outside-toplevel
+
+        def tick(down_bytes, max_bytes):
+            ticker(self, down_bytes, max_bytes)
+
+        return adownload(self, url, chunksize=chunksize, tick=tick if ticker else None, checksum=checksum
+                         , headers=headers, executor=executor, timeout=timeout)
+
+    @classmethod
+    def downloadMany(cls, pairs, jobs=4, chunksize=None, ticker=False, pipe=sys.stdout):
+        u"""Download many files, connections are reused (HTTP keep-alive).
+
+        The ``pairs`` are ``(url, fname)`` or ``(url, fname, checksum)`` tuples
+        (for ``checksum`` see :py:meth:`FSPath.download`), ``jobs`` downloads run
+        concurrently and share a pool of persistent connections per host (see
+        :py:func:`fspath.download.fetchMany`).  With ``ticker=True`` one
+        progress-bar over all downloads is prompted::
+
+            failed = FSPath.downloadMany([
+                (url1, 'foo.txt'), (url2, 'bar.txt'), ...], jobs=8, ticker=True)
+
+        :return: list of the failed downloads ``(url, fname, exception)``
+        """
+
+        if ticker and not isinstance(ticker, bool):
+            tick_func = ticker
+        else:
+            bar = ProgressBar(pipe=pipe)
+            def tick_func(fname, counter, max_count, down_bytes):
+                u"""downloadMany's default ticker"""
+                bar.draw(counter, max_count
+                         , prompt = "download: %d/%d files [%s]" % (
+                             counter, max_count, humanizeBytes(down_bytes, 1)))
+
+        from .download import fetchMany # pylint: disable=import-outside-toplevel
+        pairs  = [(x[0], cls(x[1])) + tuple(x[2:]) for x in pairs]
+        failed = fetchMany(pairs, jobs=jobs, chunksize=chunksize, tick=tick_func if ticker else None)
+        if ticker:
+            pipe.write('\n')
+        return failed
 
 
 # ==============================================================================
@@ -0,0 +1,121 @@
+# -*- coding: utf-8; mode: python -*-
+u"""
+snapshot of the meta data of a path name
+"""
+# pylint: disable=invalid-name
+
+import os
+import stat
+import time
+
+_clock = getattr(time, 'monotonic', time.time)
+
+# ==============================================================================
+class FSStat(object):
+# ==============================================================================
+
+    u"""A snapshot of the meta data of a path name.
+
+    The snapshot is filled by one ``os.lstat`` call, only if the path name is a
+    symbolic link, a second ``os.stat`` call is needed to get the meta data of
+    the link target.  All properties are answered from this snapshot, no
+    matter how often they are asked for:
+
+    .. code-block:: python
+
+      >>> st = FSPath('/etc/hosts').STAT
+      >>> st.ISFILE and st.SIZE > 42 and st.MTIME > 1600000000
+      True
+
+    Like ``os.path.exists`` and Co., the properties ``EXISTS``, ``ISDIR``,
+    ``ISFILE``, ``SIZE`` and the times follow symbolic links, ``ISLINK`` does
+    not.  If the path name does not exist, ``SIZE`` and the times raise the
+    ``OSError`` from the ``stat`` call.
+
+    The access checks (``READABLE`` & Co. of :py:class:`fspath.FSPath`) are
+    not part of the snapshot, they depend on ACLs and mount options and are
+    asked by ``os.access``.
+    """
+
+    def __init__(self, pathname, lstat=None, st=None):
+        self.pathname  = pathname
+        self.timestamp = _clock()
+        self.lstat     = lstat
+        self.stat      = st
+        self.error     = None
+
+        if self.lstat is None:
+            try:
+                self.lstat = os.lstat(pathname)
+            except OSError as exc:
+                self.error = exc
+                return
+
+        if self.stat is None:
+            if stat.S_ISLNK(self.lstat.st_mode):
+                try:
+                    self.stat = os.stat(pathname)
+                except OSError as exc:
+                    # dangling symbolic link
+                    self.error = exc
+            else:
+                self.stat = self.lstat
+
+    @classmethod
+    def fromDirEntry(cls, entry):
+        u"""Snapshot from the (cached) meta data of a ``os.DirEntry`` object."""
+        try:
+            lstat = entry.stat(follow_symlinks=False)
+        except OSError:
+            return cls(entry.path)
+        return cls(entry.path, lstat=lstat)
+
+    @property
+    def AGE(self):
+        u"""Seconds since this snapshot was taken"""
+        return _clock() - self.timestamp
+
+    def _getStat(self):
+        if self.stat is None:
+            raise self.error
+        return self.stat
+
+    @property
+    def EXISTS(self):
+        u"""True if file/pathname exist"""
+        return self.stat is not None
+
+    @property
+    def ISDIR(self):
+        u"""True if path is a folder"""
+        return self.stat is not None and stat.S_ISDIR(self.stat.st_mode)
+
+    @property
+    def ISFILE(self):
+        u"""True if path is a file"""
+        return self.stat is not None and stat.S_ISREG(self.stat.st_mode)
+
+    @property
+    def ISLINK(self):
+        u"""True if path is a symbolic link"""
+        return self.lstat is not None and stat.S_ISLNK(self.lstat.st_mode)
+
+    @property
+    def SIZE(self):
+        u"""Size in bytes"""
+        return self._getStat().st_size
+
+    @property
+    def MTIME(self):
+        """Return the last modification time, reported by os.stat()."""
+        return self._getStat().st_mtime
+
+    @property
+    def ATIME(self):
+        """Return the last access time, reported by os.stat()."""
+        return self._getStat().st_atime
+
+    @property
+    def CTIME(self):
+        """Return the metadata change time, reported by os.stat()."""
+        return self._getStat().st_ctime
@@ -9,7 +9,18 @@ from .fspath import FSPath
 
 
 def _cli_download_url(cli):
-    u"""Download from 'url' into file 'fname'"""
+    u"""Download from 'url' into file 'fname'
+
+    To download many files, list them in a file, one URL per line, optional
+    followed by the file name (default is the last component of the URL)::
+
+        https://example.org/foo.tar.gz
+        https://example.org/bar.zip   bar-1.0.zip
+
+    and pass the list to option ``-i``::
+
+        fspath download -i urls.txt --jobs 8
+    """
 
     verbose = False
     try:
@@ -18,13 +29,51 @@ def _cli_download_url(cli):
         pass
     verbose = (verbose and not cli.quiet)
 
-    if cli.fname.EXISTS:
+    if cli.input_file:
+        return _cli_download_many(cli, verbose)
+    if cli.fname is None or cli.url is None:
+        raise cli.Error(42, "missing arguments FNAME and URL (or option -i)")
+
+    if cli.fname.EXISTS and not cli.resume:
         raise cli.Error(42, "file %s already exists" % cli.fname)
 
-    cli.fname.download(cli.url, chunksize=cli.chunksize, ticker=verbose, pipe=cli.OUT)
+    checksum = None
+    if cli.checksum:
+        algo, _, digest = cli.checksum.partition(':')
+        if not digest:
+            raise cli.Error(42, "checksum '%s' is not in the form ALGORITHM:HEXDIGEST" % cli.checksum)
+        checksum = (algo, digest)
+
+    cache = None
+    if cli.cache or cli.cache_dir:
+        from .cache import DownloadCache # pylint: disable=import-outside-toplevel
+        cache = DownloadCache(cli.cache_dir, max_size=cli.cache_size)
+
+    cli.fname.download(cli.url, chunksize=cli.chunksize, ticker=verbose, pipe=cli.OUT
+                       , resume=cli.resume, segments=cli.segments, checksum=checksum, cache=cache)
     if verbose:
         cli.OUT.write("download of '%s' succeed\n" % cli.fname)
 
+def _cli_download_many(cli, verbose):
+    pairs = []
+    with cli.input_file.openTextFile() as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            url, _, fname = line.partition(' ')
+            fname = fname.strip() or url.split('?')[0].rstrip('/').split('/')[-1]
+            pairs.append((url, fname))
+
+    failed = FSPath.downloadMany(pairs, jobs=cli.jobs, chunksize=cli.chunksize, ticker=verbose, pipe=cli.OUT)
+    for url, fname, exc in failed:
+        cli.ERR.write("download of '%s' into '%s' failed: %s\n" % (url, fname, exc))
+    if failed:
+        return 42
+    if verbose:
+        cli.OUT.write("download of %d files succeed\n" % len(pairs))
+    return 0
+
 def _cli_find_file(cli):
     u"""list file names matching regular expression
 
@@ -34,18 +83,54 @@ def _cli_find_file(cli):
     """
     for match in cli.folder.reMatchFind(
             # pylint: disable=superfluous-parens
-            cli.regexpr, use_dirs=(not cli.nodirs), use_files=(not cli.nofiles)):
+            cli.regexpr, use_dirs=(not cli.nodirs), use_files=(not cli.nofiles)
+            , workers=cli.jobs, ordered=True
+            , exclude=cli.exclude, mindepth=cli.mindepth, maxdepth=cli.maxdepth):
         cli.OUT.write(match + "\n")
 
 def _cli_extract(cli):
-    u"""extract TAR or ZIP file"""
+    u"""extract TAR or ZIP file
+
+    The ARCHIVE can be a URL, the archive is extracted while it is downloaded::
+
+        fspath extract https://example.org/foo.tar.gz /tmp/foo
+    """
     verbose = False
     try:
         verbose = cli.OUT.isatty()
     except AttributeError:
         pass
     verbose = (verbose and not cli.quiet)
-    cli.archive.extract(cli.folder, ticker=verbose)
+    if cli.folder is None:
+        if cli.prune:
+            raise cli.Error(42, "option --prune needs an explicit FOLDER")
+        cli.folder = FSPath(".")
+    if '://' in cli.archive:
+        cli.folder.extractFrom(cli.archive, ticker=verbose)
+    else:
+        for _ in FSPath(cli.archive).extract(
+                cli.folder, ticker=verbose, jobs=cli.jobs, stream=cli.jobs <= 1
+                , incremental=cli.incremental, prune=cli.prune
+                , members=cli.member, include=cli.include, exclude=cli.exclude):
+            pass
+
+def _cli_archive(cli):
+    u"""create a ZIP or TAR archive
+
+    The format is taken from the suffix of ARCHIVE (.zip, .tar.gz, .tgz,
+    .tar.xz, .txz or .tar), the data is compressed by N processes::
+
+        fspath archive -j 8 /tmp/out.tar.gz build/out
+    """
+    verbose = False
+    try:
+        verbose = cli.OUT.isatty()
+    except AttributeError:
+        pass
+    verbose = (verbose and not cli.quiet)
+    if not cli.source.EXISTS:
+        raise cli.Error(42, "%s does not exist" % cli.source)
+    cli.source.compress(cli.archive, format=cli.format, jobs=cli.jobs, level=cli.level, ticker=verbose)
 
 # ==============================================================================
 def main():
@@ -72,17 +157,63 @@ def main():
     download.add_argument(
         "fname"
         , type = FSPath
+        , nargs = "?"
         , help = "name of the file")
     download.add_argument(
         "url"
         , type = str
+        , nargs = "?"
         , help = "url of the content to download")
 
+    download.add_argument(
+        "-i", "--input-file"
+        , type = FSPath
+        , help = "download the URLs listed in this file")
+
+    download.add_argument(
+        "-j", "--jobs"
+        , type = int
+        , default = 4
+        , help = "number of parallel downloads (option -i)")
+
     download.add_argument(
         "--chunksize"
         , type  = int
-        , default = 1048576
-        , help = "download chunk size")
+        , default = None
+        , help = "download chunk size (default: adapted to the throughput)")
+
+    download.add_argument(
+        "-c", "--resume"
+        , action = 'store_true'
+        , help = "continue a partial download of file FNAME")
+
+    download.add_argument(
+        "--segments"
+        , type = int
+        , default = 1
+        , help = "download N byte ranges over N connections in parallel")
+
+    download.add_argument(
+        "--checksum"
+        , type = str
+        , metavar = "ALGORITHM:HEXDIGEST"
+        , help = "verify the content, e.g. sha256:9f86d08...")
+
+    download.add_argument(
+        "--cache"
+        , action = 'store_true'
+        , help = "use the local download cache (default folder: $FSPATH_CACHE_DIR or ~/.cache/fspath/downloads)")
+
+    download.add_argument(
+        "--cache-dir"
+        , type = str
+        , help = "folder of the download cache (implies --cache)")
+
+    download.add_argument(
+        "--cache-size"
+        , type = int
+        , default = 5 * 1024 * 1024 * 1024
+        , help = "size limit of the download cache in bytes")
 
     download.add_argument(
         "-q", "--quiet"
@@ -98,6 +229,24 @@ def main():
         "--nodirs"
         , action = 'store_true'
         , help = "do not list folder names")
+    find.add_argument(
+        "-j", "--jobs"
+        , type = int
+        , default = 1
+        , help = "number of threads listing the folders")
+    find.add_argument(
+        "--exclude"
+        , action = 'append'
+        , metavar = 'PATTERN'
+        , help = "skip names (and do not descend into folders) matching shell-style PATTERN")
+    find.add_argument(
+        "--mindepth"
+        , type = int
+        , help = "do not list names at levels less than MINDEPTH")
+    find.add_argument(
+        "--maxdepth"
+        , type = int
+        , help = "descend at most MAXDEPTH levels")
     find.add_argument(
         "regexpr"
         , type = str
@@ -112,14 +261,66 @@ def main():
     extract = cli.addCMDParser(_cli_extract, cmdName='extract')
     extract.add_argument(
         "archive"
-        , type = FSPath
-        , help = "file name of the TAR or ZIP archive")
+        , type = str
+        , help = "file name or URL of the TAR or ZIP archive")
     extract.add_argument(
         "folder"
         , type = FSPath
         , nargs = "?"
-        , default = FSPath(".")
-        , help = "extract into this folder")
+        , default = None
+        , help = "extract into this folder (default: current folder)")
+    extract.add_argument(
+        "-j", "--jobs"
+        , type = int
+        , default = 1
+        , help = "number of processes extracting the members of a ZIP archive")
+    extract.add_argument(
+        "--incremental"
+        , action = 'store_true'
+        , help = "skip files which are already extracted (same size & mtime)")
+    extract.add_argument(
+        "--prune"
+        , action = 'store_true'
+        , help = "remove files from FOLDER which are not in the archive (FOLDER is required)")
+    extract.add_argument(
+        "--member"
+        , action = 'append'
+        , metavar = 'NAME'
+        , help = "extract only this member (option can be repeated)")
+    extract.add_argument(
+        "--include"
+        , action = 'append'
+        , metavar = 'PATTERN'
+        , help = "extract only members matching shell-style PATTERN")
+    extract.add_argument(
+        "--exclude"
+        , action = 'append'
+        , metavar = 'PATTERN'
+        , help = "skip members matching shell-style PATTERN")
+
+    archive = cli.addCMDParser(_cli_archive, cmdName='archive')
+    archive.add_argument(
+        "archive"
+        , type = FSPath
+        , help = "file name of the archive")
+    archive.add_argument(
+        "source"
+        , type = FSPath
+        , help = "file or folder to archive")
+    archive.add_argument(
+        "--format"
+        , choices = ['zip', 'tar.gz', 'tar.xz', 'tar']
+        , help = "archive format, if not given the suffix of ARCHIVE is used")
+    archive.add_argument(
+        "-j", "--jobs"
+        , type = int
+        , default = 1
+        , help = "number of processes compressing the data")
+    archive.add_argument(
+        "--level"
+        , type = int
+        , default = 6
+        , help = "compression level")
 
     cli()
 
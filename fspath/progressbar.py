@@ -5,8 +5,9 @@ A progress bar for the console.
 # pylint: disable=invalid-name
 
 import sys
+import time
 
-from .console import consoleDimension
+from .console import cachedConsoleDimension
 
 # ==============================================================================
 def humanizeBytes(size, precision=2):
@@ -34,17 +35,69 @@ def progressbar(step, maxSteps, barSize=None, pipe=sys.stdout
     * step: step number
     * maxSteps: max. steps
     * barSize: char length of the progress-bar
+
+    The progress-bar is drawn on every call, to skip redraws use a
+    :py:class:`ProgressBar` object.
+    """
+    ProgressBar(barSize, pipe, fillchar, restchar, interval=0).draw(step, maxSteps, prompt)
+
+# ==============================================================================
+class ProgressBar(object):
+# ==============================================================================
+
+    """
+    A progress-bar which is redrawn by :py:meth:`ProgressBar.draw`
+
+    * barSize: char length of the progress-bar
+    * interval: min. seconds between two redraws (``0`` redraws on every call)
+
+    The progress-bar is only redrawn if it has changed and the last redraw is
+    at least ``interval`` seconds ago, the final step (100%) is always drawn.
+    The size of the console is cached (see
+    :py:func:`fspath.console.cachedConsoleDimension`).
+
+    .. code-block:: python
+
+       bar = ProgressBar()
+       for step in range(maxSteps):
+           bar.draw(step + 1, maxSteps, prompt="copy: ")
     """
 
-    percent = 0
-    if step and maxSteps:
-        percent = float(100)/maxSteps*step
+    def __init__(self, barSize=None, pipe=sys.stdout, fillchar="=", restchar=" ", interval=0.1):
+        # pylint: disable=too-many-arguments
+        self.barSize  = barSize
+        self.pipe     = pipe
+        self.fillchar = fillchar
+        self.restchar = restchar
+        self.interval = interval
+        self.last     = None  # (timestamp, line) of the last redraw
+
+    def draw(self, step, maxSteps, prompt=""):
+        """
+        Show progress-bar
+
+        * step: step number
+        * maxSteps: max. steps
+        """
+        percent = 0
+        if step and maxSteps:
+            percent = float(100)/maxSteps*step
+
+        prompt = "\r" + prompt
+        barSize = self.barSize
+        if barSize is None:
+            barSize = cachedConsoleDimension()[1]
+            barSize = barSize - 3 - len(prompt) - len(" %3d%%"  % (100,))
+
+        p_bar = self.fillchar * int(round(percent / 100 * barSize))
+        line  = (prompt +  "[%s] %3.0f%%") % (p_bar.ljust(barSize, self.restchar), percent)
 
-    prompt = "\r" + prompt
-    if barSize is None:
-        barSize = consoleDimension()[1]
-        barSize = barSize - 3 - len(prompt) - len(" %3d%%"  % (100,))
+        now  = time.time()
+        last = self.last
+        if last is not None and not (maxSteps and step >= maxSteps and last[1] != line):
+            if last[1] == line or now - last[0] < self.interval:
+                return
+        self.last = (now, line)
 
-    p_bar = fillchar * int(round(percent / 100 * barSize))
-    pipe.write((prompt +  "[%s] %3.0f%%") % (p_bar.ljust(barSize, restchar), percent))
-    pipe.flush()
+        self.pipe.write(line)
+        self.pipe.flush()
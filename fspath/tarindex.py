@@ -0,0 +1,500 @@
+# -*- coding: utf-8; mode: python -*-
+u"""
+random-access seek index for (compressed) TAR archives
+
+The index is stored in a sidecar file next to the archive (suffix
+:py:data:`INDEX_SUFFIX`), it holds the offsets of the members in the
+uncompressed TAR stream and *checkpoints* -- positions in the compressed
+stream where the decompression can be started:
+
+- ``.tar.gz``: the start of each gzip member and the byte aligned flush
+  points in a deflate stream (as written by ``pigz``, ``gzip --rsyncable``
+  or :py:meth:`fspath.FSPath.compress`), the last 32 KiB of uncompressed
+  data are stored as dictionary of the checkpoint (like *zran* does).
+
+- ``.tar.xz``: the blocks of a multi-block stream (``xz -T``, ``pixz``).
+
+- ``.tar``: the members are read by seek, no checkpoints needed.
+
+To read a member, the decompression starts at the last checkpoint in front
+of the member.  If there are no checkpoints (e.g. a ``.tar.gz`` from a
+single threaded ``gzip``), the member is read from the start of the archive,
+but the member is still found without parsing the TAR headers.
+"""
+# pylint: disable=invalid-name
+
+import os
+import io
+import json
+import zlib
+import base64
+import struct
+import bisect
+import tarfile
+
+from .download import TargetFile
+
+INDEX_SUFFIX = '.fsidx'
+u"""Suffix of the sidecar file of a archive index"""
+
+CHECKPOINT_SPAN = 4 * 1024 * 1024
+u"""Minimal distance in (uncompressed) bytes of two checkpoints"""
+
+WINDOW = 32 * 1024
+CHUNK  = 1024 * 1024
+READ   = 64 * 1024
+VERIFY = 64 * 1024
+SYNC_MARK = b'\x00\x00\xff\xff'
+XZ_MAGIC  = b'\xfd7zXZ\x00'
+
+def _format(fname):
+    with io.open(fname, 'rb') as f:
+        head = f.read(6)
+    if head[:2] == b'\x1f\x8b':
+        return 'gz'
+    if head == XZ_MAGIC:
+        return 'xz'
+    if head[:3] == b'BZh':
+        return 'bz2'
+    return 'tar'
+
+# ==============================================================================
+# gzip
+# ==============================================================================
+
+def _gzipChunks(f, coffset, window):
+    u"""Uncompressed chunks of the gzip file ``f`` from checkpoint ``coffset``
+    (``window is None``: start of a gzip member)."""
+    f.seek(coffset)
+    raw = window is not None
+    d = zlib.decompressobj(-15, zdict=window) if raw else zlib.decompressobj(31)
+    pending = b''
+    while True:
+        if not pending:
+            pending = f.read(READ)
+            if not pending:
+                return
+        out = d.decompress(pending)
+        pending = b''
+        if out:
+            yield out
+        if d.eof:
+            pending = d.unused_data
+            if raw:
+                # skip the gzip trailer (CRC32, ISIZE) of the raw deflate stream
+                while len(pending) < 8:
+                    x = f.read(READ)
+                    if not x:
+                        return
+                    pending += x
+                pending, raw = pending[8:], False
+            # next gzip member (skip zero padding)
+            pending = pending.lstrip(b'\x00')
+            d = zlib.decompressobj(31)
+
+class _GzipIndexer(object):
+    u"""File object of the uncompressed data of a gzip file, collects
+    checkpoints while it is read."""
+
+    def __init__(self, f, span):
+        self.f        = f
+        self.span     = span
+        self.d        = zlib.decompressobj(31)
+        self.cpos     = 0           # offset of the next byte read from f
+        self.upos     = 0           # uncompressed bytes so far
+        self.window   = b''
+        self.tail     = b''         # last bytes of the previous compressed chunk
+        self.out      = []
+        self.out_size = 0
+        self.buf      = b''
+        self.pos      = 0
+        self.last_cp  = 0
+        self.checkpoints = [(0, 0, None)]
+        self.verify   = None        # [checkpoint, decompressor, expected output]
+        self.eof      = False
+
+    def _emit(self, out):
+        if not out:
+            return
+        self.upos += len(out)
+        self.window = (self.window + out)[-WINDOW:]
+        self.out.append(out)
+        self.out_size += len(out)
+        if self.verify is not None:
+            self.verify[2] += out
+            self._checkVerify()
+
+    def _checkVerify(self, final=False):
+        cp, v, expected = self.verify
+        n = min(len(v[0]), len(expected))
+        if v[0][:n] != expected[:n]:
+            self.verify = None
+            return
+        if n >= VERIFY or final:
+            self.checkpoints.append(cp)
+            self.last_cp = cp[0]
+            self.verify = None
+
+    def _feedVerify(self, piece):
+        if self.verify is None:
+            return
+        v = self.verify[1]
+        try:
+            v[0] += v[1].decompress(piece)
+        except zlib.error:
+            self.verify = None
+
+    def _feed(self, piece, cpos):
+        u"""Feed compressed ``piece`` which starts at offset ``cpos``."""
+        while piece:
+            self._feedVerify(piece)
+            out = self.d.decompress(piece)
+            self._emit(out)
+            if not self.d.eof:
+                return
+            if self.verify is not None:
+                self._checkVerify(final=True)
+            rest = self.d.unused_data
+            cpos += len(piece) - len(rest)
+            piece = rest.lstrip(b'\x00')
+            cpos += len(rest) - len(piece)
+            self.d = zlib.decompressobj(31)
+            if piece and self.upos - self.last_cp >= self.span:
+                # start of a gzip member
+                self.checkpoints.append((self.upos, cpos, None))
+                self.last_cp = self.upos
+
+    def _fill(self):
+        chunk = self.f.read(CHUNK)
+        if not chunk:
+            self.eof = True
+            if self.verify is not None:
+                self._checkVerify(final=True)
+            return
+        start = self.cpos
+        self.cpos += len(chunk)
+        # split the chunk behind each sync mark (a mark may span two chunks)
+        data = self.tail + chunk
+        base = start - len(self.tail)
+        self.tail = chunk[-3:]
+        cuts = []
+        i = data.find(SYNC_MARK)
+        while i >= 0:
+            end = base + i + 4
+            if end > start:
+                cuts.append(end - start)
+            i = data.find(SYNC_MARK, i + 1)
+        prev = 0
+        for cut in cuts:
+            self._feed(chunk[prev:cut], start + prev)
+            prev = cut
+            if self.verify is None and self.upos - self.last_cp >= self.span and self.window:
+                # candidate: the deflate stream is byte aligned behind a sync
+                # mark (empty stored block), verified by decompressing the
+                # next VERIFY bytes from here
+                cp = (self.upos, start + cut, self.window)
+                self.verify = [cp, [b'', zlib.decompressobj(-15, zdict=self.window)], b'']
+        self._feed(chunk[prev:], start + prev)
+
+    def read(self, size=-1):
+        u"""Read ``size`` bytes of uncompressed data"""
+        left = len(self.buf) - self.pos
+        while not self.eof and (size < 0 or left + self.out_size < size):
+            self._fill()
+        if self.out:
+            self.buf = self.buf[self.pos:] + b''.join(self.out)
+            self.pos, self.out, self.out_size = 0, [], 0
+        if size < 0:
+            size = len(self.buf) - self.pos
+        data = self.buf[self.pos:self.pos + size]
+        self.pos += len(data)
+        return data
+
+# ==============================================================================
+# xz
+# ==============================================================================
+
+def _varint(data, pos):
+    value, shift = 0, 0
+    while True:
+        b = data[pos] if not isinstance(data, str) else ord(data[pos])
+        value |= (b & 0x7f) << shift
+        pos += 1
+        if not b & 0x80:
+            return value, pos
+        shift += 7
+
+def _encVarint(value):
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+def _crc32(data):
+    return struct.pack('<I', zlib.crc32(data) & 0xffffffff)
+
+def _pad4(size):
+    return (size + 3) & ~3
+
+def xzBlocks(f):
+    u"""Blocks ``(uoffset, coffset, unpadded_size, uncompressed_size)`` of a
+    single-stream xz file ``f`` and the stream flags, ``None`` if the file
+    has an other layout (e.g. concatenated streams)."""
+    f.seek(0)
+    header = f.read(12)
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    if header[:6] != XZ_MAGIC or size < 24:
+        return None
+    f.seek(size - 12)
+    footer = f.read(12)
+    if footer[10:] != b'YZ' or footer[8:10] != header[6:8]:
+        return None
+    index_size = (struct.unpack('<I', footer[4:8])[0] + 1) * 4
+    f.seek(size - 12 - index_size)
+    index = f.read(index_size)
+    if index[:1] != b'\x00':
+        return None
+    count, pos = _varint(index, 1)
+    blocks, coffset, uoffset = [], 12, 0
+    for _ in range(count):
+        unpadded, pos = _varint(index, pos)
+        usize, pos = _varint(index, pos)
+        blocks.append((uoffset, coffset, unpadded, usize))
+        coffset += _pad4(unpadded)
+        uoffset += usize
+    if coffset != size - 12 - index_size:
+        return None
+    return blocks, header[6:8]
+
+def _xzBlockStream(flags, block, unpadded, usize):
+    u"""A xz stream with the one ``block``"""
+    header = XZ_MAGIC + flags + _crc32(flags)
+    index = b'\x00' + _encVarint(1) + _encVarint(unpadded) + _encVarint(usize)
+    index += b'\x00' * (_pad4(len(index)) - len(index))
+    index += _crc32(index)
+    backward = struct.pack('<I', len(index) // 4 - 1)
+    footer = _crc32(backward + flags) + backward + flags + b'YZ'
+    return header + block + index + footer
+
+def _xzChunks(f, blocks, flags, first):
+    import lzma  # pylint: disable=import-outside-toplevel, import-error
+    for _uoffset, coffset, unpadded, usize in blocks[first:]:
+        f.seek(coffset)
+        block = f.read(_pad4(unpadded))
+        yield lzma.LZMADecompressor(lzma.FORMAT_XZ).decompress(
+            _xzBlockStream(flags, block, unpadded, usize))
+
+def _decompressor(fmt, f):
+    # pylint: disable=import-outside-toplevel, import-error
+    if fmt == 'gz':
+        import gzip
+        return gzip.GzipFile(fileobj=f, mode='rb')
+    if fmt == 'bz2':
+        import bz2
+        return bz2.BZ2File(f)
+    import lzma
+    return lzma.LZMAFile(f)
+
+# ==============================================================================
+class MemberReader(io.RawIOBase):
+# ==============================================================================
+
+    u"""Read-only file object of a member, reads ``size`` bytes from the
+    iterator of uncompressed ``chunks`` after skipping ``skip`` bytes."""
+
+    def __init__(self, f, chunks, skip, size):
+        super(MemberReader, self).__init__()
+        self.f      = f
+        self.chunks = chunks
+        self.skip   = skip
+        self.left   = size
+        self.buf    = b''
+        self.pos    = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if not self.left:
+            return 0
+        while self.pos >= len(self.buf):
+            try:
+                chunk = next(self.chunks)
+            except StopIteration:
+                raise IOError("%s: unexpected end of archive" % self.f.name) # pylint: disable=raise-missing-from
+            n = min(self.skip, len(chunk))
+            self.buf, self.pos, self.skip = chunk, n, self.skip - n
+        n = min(len(b), len(self.buf) - self.pos, self.left)
+        b[:n] = self.buf[self.pos:self.pos + n]
+        self.pos  += n
+        self.left -= n
+        return n
+
+    def close(self):
+        if not self.closed:
+            self.f.close()
+        super(MemberReader, self).close()
+
+# ==============================================================================
+class TarIndex(object):
+# ==============================================================================
+
+    u"""Seek index of a (compressed) TAR archive, see module :py:mod:`fspath.tarindex`.
+
+    .. code-block:: python
+
+       idx = TarIndex.load('backup.tar.gz') or TarIndex.build('backup.tar.gz')
+       with idx.open('var/log/syslog') as f:
+           data = f.read()
+    """
+
+    def __init__(self, fname, fmt, members, checkpoints, stamp):
+        self.fname       = fname
+        self.format      = fmt
+        self.members     = members        # name --> (offset, size)
+        self.checkpoints = checkpoints    # [(uoffset, coffset, extra)]
+        self.stamp       = stamp
+        self._keys       = [x[0] for x in checkpoints]
+
+    @staticmethod
+    def _stamp(fname):
+        st = os.stat(fname)
+        return [st.st_size, st.st_mtime]
+
+    @classmethod
+    def build(cls, fname, span=CHECKPOINT_SPAN, save=True):
+        u"""Build the index of archive ``fname`` and store it in the sidecar file
+        (with ``save=False`` the index is only returned)."""
+        fmt = _format(fname)
+        stamp = cls._stamp(fname)
+        members, checkpoints = {}, []
+        with io.open(fname, 'rb') as f:
+            if fmt == 'gz':
+                reader = _GzipIndexer(f, span)
+                arc = tarfile.open(fileobj=reader, mode='r|')
+            else:
+                if fmt == 'xz':
+                    blocks = xzBlocks(f)
+                    if blocks is not None:
+                        flags = base64.b64encode(blocks[1]).decode('ascii')
+                        checkpoints = [(b[0], b[1], [b[2], b[3], flags]) for b in blocks[0]]
+                    f.seek(0)
+                arc = tarfile.open(fileobj=f, mode='r|*')
+            with arc:
+                while True:
+                    info = arc.next()
+                    if info is None:
+                        break
+                    arc.members = []
+                    if info.isfile():
+                        members[info.name] = (info.offset_data, info.size)
+            if fmt == 'gz':
+                checkpoints = [
+                    (u, c, None if w is None else base64.b64encode(zlib.compress(w)).decode('ascii'))
+                    for u, c, w in reader.checkpoints]
+        idx = cls(fname, fmt, members, checkpoints, stamp)
+        if save:
+            idx.save()
+        return idx
+
+    def save(self):
+        u"""Write the index into the sidecar file"""
+        data = {
+            'version'       : 1
+            , 'format'      : self.format
+            , 'stamp'       : self.stamp
+            , 'members'     : self.members
+            , 'checkpoints' : self.checkpoints
+        }
+        with TargetFile(self.fname + INDEX_SUFFIX) as f:
+            f.write(json.dumps(data).encode('utf-8'))
+
+    @classmethod
+    def load(cls, fname):
+        u"""Load the index of archive ``fname``, ``None`` if there is no index or
+        the archive has been changed."""
+        try:
+            with io.open(fname + INDEX_SUFFIX, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        if data.get('version') != 1 or data.get('stamp') != cls._stamp(fname):
+            return None
+        members = dict((k, tuple(v)) for k, v in data['members'].items())
+        return cls(fname, data['format'], members, [tuple(x) for x in data['checkpoints']], data['stamp'])
+
+    def open(self, name):
+        u"""Open member ``name`` for reading (binary file object).
+
+        :raises KeyError: if there is no file ``name`` in the archive
+        """
+        offset, size = self.members[name]
+        f = io.open(self.fname, 'rb')
+        if self.format == 'tar':
+            f.seek(offset)
+            return io.BufferedReader(MemberReader(f, iter(lambda: f.read(READ), b''), 0, size))
+
+        i = bisect.bisect_right(self._keys, offset) - 1
+        if self.format == 'gz' and i >= 0:
+            uoffset, coffset, window = self.checkpoints[i]
+            if window is not None:
+                window = zlib.decompress(base64.b64decode(window))
+            chunks = _gzipChunks(f, coffset, window)
+        elif self.format == 'xz' and i >= 0:
+            uoffset = self.checkpoints[i][0]
+            flags = base64.b64decode(self.checkpoints[i][2][2])
+            blocks = [(u, c, x[0], x[1]) for u, c, x in self.checkpoints]
+            chunks = _xzChunks(f, blocks, flags, i)
+        else:
+            # no checkpoints: decompress from the start
+            uoffset = 0
+            stream = _decompressor(self.format, f)
+            chunks = iter(lambda: stream.read(READ), b'')
+        return io.BufferedReader(MemberReader(f, chunks, offset - uoffset, size))
+
+class _ArchiveFile(tarfile.ExFileObject):  # pylint: disable=too-many-ancestors
+    u"""File object of a TAR member which closes its ``TarFile`` when it is closed"""
+    def __init__(self, archive, info):
+        tarfile.ExFileObject.__init__(self, archive, info)
+        self.archive = archive
+
+    def close(self):
+        try:
+            tarfile.ExFileObject.close(self)
+        finally:
+            self.archive.close()
+
+# ==============================================================================
+def openArchiveMember(fname, name, build=True):
+# ==============================================================================
+
+    u"""Open file ``name`` from TAR archive ``fname`` by the seek index.
+
+    The index is loaded from the sidecar file, if there is none (or it is out
+    of date) and ``build`` is true, the index is build (one pass over the
+    archive), an index which can't be saved is used from memory.  Without
+    ``build`` the member is searched in the archive.
+    """
+    idx = TarIndex.load(fname)
+    if idx is None:
+        if not build:
+            arc = tarfile.open(fname, 'r:*')
+            arc.fileobject = _ArchiveFile
+            try:
+                f = arc.extractfile(name)
+                if f is None:
+                    raise KeyError(name)
+            except BaseException:
+                arc.close()
+                raise
+            return f
+        idx = TarIndex.build(fname, save=False)
+        try:
+            idx.save()
+        except (IOError, OSError):
+            # e.g. a read-only folder: use the index from memory
+            pass
+    return idx.open(name)
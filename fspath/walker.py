@@ -0,0 +1,354 @@
+# -*- coding: utf-8; mode: python -*-
+u"""
+directory tree walker based on ``os.scandir``
+"""
+# pylint: disable=invalid-name
+
+import os
+import re
+import stat
+from fnmatch import translate
+
+import six
+
+from .fsstat import FSStat
+
+try:
+    _scandir = os.scandir
+except AttributeError:  # pragma: no cover
+    try:
+        from scandir import scandir as _scandir  # pylint: disable=import-error
+    except ImportError:
+        _scandir = None
+
+# ==============================================================================
+class _ListDirEntry(object):
+# ==============================================================================
+
+    u"""Minimal ``os.DirEntry`` replacement for pythons without ``os.scandir``."""
+
+    def __init__(self, folder, name):
+        self.name   = name
+        self.path   = os.path.join(folder, name)
+        self._lstat = None
+        self._stat  = None
+
+    def stat(self, follow_symlinks=True):
+        if not follow_symlinks:
+            if self._lstat is None:
+                self._lstat = os.lstat(self.path)
+            return self._lstat
+        if self._stat is None:
+            if self.is_symlink():
+                self._stat = os.stat(self.path)
+            else:
+                self._stat = self.stat(follow_symlinks=False)
+        return self._stat
+
+    def is_symlink(self):
+        try:
+            return stat.S_ISLNK(self.stat(follow_symlinks=False).st_mode)
+        except OSError:
+            return False
+
+    def is_dir(self, follow_symlinks=True):
+        try:
+            return stat.S_ISDIR(self.stat(follow_symlinks=follow_symlinks).st_mode)
+        except OSError:
+            return False
+
+    def is_file(self, follow_symlinks=True):
+        try:
+            return stat.S_ISREG(self.stat(follow_symlinks=follow_symlinks).st_mode)
+        except OSError:
+            return False
+
+
+def scandir(folder):
+    u"""Return a list of the ``os.DirEntry`` objects of ``folder``.
+
+    On pythons without ``os.scandir`` (and without the *scandir* backport
+    installed) a ``os.listdir`` based emulation is used.
+    """
+    folder = six.text_type(folder)
+    if _scandir is None:
+        return [_ListDirEntry(folder, name) for name in os.listdir(folder)]
+    it = _scandir(folder)
+    try:
+        return list(it)
+    finally:
+        close = getattr(it, 'close', None)
+        if close is not None:
+            close()
+
+# ==============================================================================
+class FSEntry(object):
+# ==============================================================================
+
+    u"""A folder entry yielded by :py:func:`scanWalk`.
+
+    Wraps the ``os.DirEntry`` object from ``os.scandir``, the file type and the
+    stat data are taken from the cache of the ``os.DirEntry`` object (on most
+    systems the file type is delivered by the folder listing itself, no extra
+    syscall needed).  The :py:class:`fspath.FSPath` object of the entry is only
+    build when it is asked for (:py:attr:`FSEntry.PATH`).
+    """
+
+    __slots__ = ('entry', 'folder', '_path', '_stat')
+
+    def __init__(self, entry, folder):
+        self.entry  = entry
+        self.folder = folder
+        self._path  = None
+        self._stat  = None
+
+    def __repr__(self):
+        return "<%s %r>" % (self.__class__.__name__, self.entry.name)
+
+    @property
+    def name(self):
+        u"""name of the entry (without folder)"""
+        return self.entry.name
+
+    @property
+    def PATH(self):
+        u"""The :py:class:`fspath.FSPath` of the entry (``folder / name``)"""
+        if self._path is None:
+            self._path = self.folder / self.entry.name
+        return self._path
+
+    @property
+    def STAT(self):
+        u"""Snapshot of the meta data (:py:class:`fspath.fsstat.FSStat`)"""
+        if self._stat is None:
+            self._stat = FSStat.fromDirEntry(self.entry)
+        return self._stat
+
+    @property
+    def ISDIR(self):
+        u"""True if entry is a folder (follows symbolic links)"""
+        try:
+            return self.entry.is_dir()
+        except OSError:
+            return False
+
+    @property
+    def ISFILE(self):
+        u"""True if entry is a file (follows symbolic links)"""
+        try:
+            return self.entry.is_file()
+        except OSError:
+            return False
+
+    @property
+    def ISLINK(self):
+        u"""True if entry is a symbolic link"""
+        try:
+            return self.entry.is_symlink()
+        except OSError:
+            return False
+
+
+def excludeFilter(patterns):
+    u"""Compile a list of shell-style patterns (``fnmatch``) into one regular
+    expression, returns ``None`` if there are no patterns."""
+    if not patterns:
+        return None
+    if isinstance(patterns, six.string_types):
+        patterns = [patterns]
+    return re.compile('|'.join('(?:%s)' % translate(p) for p in patterns))
+
+
+def statFilter(minsize=None, maxsize=None, newer=None, older=None):
+    u"""Returns a function which tests size and modification time of a
+    :py:class:`FSEntry`, returns ``None`` if there is nothing to test."""
+    if minsize is None and maxsize is None and newer is None and older is None:
+        return None
+
+    def test(entry):
+        st = entry.STAT
+        if not st.EXISTS:
+            return False
+        if minsize is not None and st.SIZE < minsize:
+            return False
+        if maxsize is not None and st.SIZE > maxsize:
+            return False
+        if newer is not None and st.MTIME <= newer:
+            return False
+        if older is not None and st.MTIME >= older:
+            return False
+        return True
+    return test
+
+
+def _scanFolder(folder):
+    dirs, files = [], []
+    for entry in scandir(folder):
+        x = FSEntry(entry, folder)
+        if x.ISDIR:
+            dirs.append(x)
+        else:
+            files.append(x)
+    return dirs, files
+
+# ==============================================================================
+def scanWalk(top, topdown=True, onerror=None, followlinks=False, workers=1, ordered=False):
+# ==============================================================================
+
+    u"""Directory tree generator based on ``os.scandir``.
+
+    Like ``os.walk``, but yields 3-tuples::
+
+        folder, dirs, files
+
+    where ``folder`` is a :py:class:`fspath.FSPath` and ``dirs`` and ``files``
+    are lists of :py:class:`FSEntry` objects.  With ``topdown=True`` the caller
+    can prune the walk by removing entries from ``dirs`` (in-place), only the
+    entries left in ``dirs`` are visited.  The tree is traversed by a stack, so
+    there is no recursion limit.
+
+    With ``workers > 1`` the folders are listed by a pool of threads, see
+    :py:func:`parallelWalk`.
+    """
+
+    if workers > 1:
+        if not topdown:
+            raise ValueError("parallel walk (workers=%s) is only supported top-down" % workers)
+        for x in parallelWalk(top, workers, onerror, followlinks, ordered):
+            yield x
+        return
+
+    stack = [top]
+    while stack:
+        folder = stack.pop()
+        if isinstance(folder, tuple):
+            # bottom-up: children have been visited
+            yield folder
+            continue
+
+        try:
+            dirs, files = _scanFolder(folder)
+        except OSError as exc:
+            if onerror is not None:
+                onerror(exc)
+            continue
+
+        if topdown:
+            yield folder, dirs, files
+        else:
+            stack.append((folder, dirs, files))
+
+        for x in reversed(dirs):
+            if followlinks or not x.ISLINK:
+                stack.append(x.PATH)
+
+
+# ==============================================================================
+def parallelWalk(top, workers, onerror=None, followlinks=False, ordered=False, maxsize=None):
+# ==============================================================================
+
+    u"""Top-down directory tree generator, folders are listed by ``workers`` threads.
+
+    Same 3-tuples as :py:func:`scanWalk`.  The folders are listed concurrently
+    by a pool of threads, the results stream back through a bounded queue
+    (``maxsize``, default is ``4 * workers``).  Only the folders left in
+    ``dirs`` after the tuple was yielded are passed to the pool, so pruning
+    works like in :py:func:`scanWalk`.  The ``onerror`` callback is called in
+    the thread of the caller.
+
+    :param ordered: ``False`` yields the folders in the order they are listed
+                    by the pool, ``True`` yields them in the same (deterministic)
+                    order as :py:func:`scanWalk` does.  In ordered mode the
+                    pool lists at most ``maxsize`` folders ahead of the caller
+                    (the next ones in depth-first order).
+    """
+    # pylint: disable=import-outside-toplevel
+    import threading
+    from six.moves import queue
+
+    work    = queue.Queue()
+    results = queue.Queue(maxsize or 4 * workers)
+    stop    = threading.Event()
+
+    def worker():
+        while True:
+            folder = work.get()
+            if folder is None or stop.is_set():
+                return
+            try:
+                dirs, files = _scanFolder(folder)
+                res = (folder, dirs, files, None)
+            except Exception as exc:  # pylint: disable=broad-except
+                res = (folder, None, None, exc)
+            while not stop.is_set():
+                try:
+                    results.put(res, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+
+    pool = [threading.Thread(target=worker) for _ in range(workers)]
+    for t in pool:
+        t.daemon = True
+        t.start()
+
+    stack     = [top]    # ordered: folders in depth-first order
+    pending   = {}       # ordered: results which arrived ahead of their turn
+    submitted = set()    # ordered: folders passed to the pool, not yet yielded
+    running   = 1        # unordered: folders passed to the pool
+    ahead     = maxsize or 4 * workers
+
+    def submit(folder):
+        submitted.add(folder)
+        work.put(folder)
+
+    def fill():
+        # pass the next folders of the stack to the pool, at most ``ahead``
+        for folder in reversed(stack):
+            if len(submitted) >= ahead:
+                break
+            if folder not in submitted:
+                submit(folder)
+
+    if ordered:
+        submit(top)
+    else:
+        work.put(top)
+
+    try:
+        while (stack if ordered else running):
+            if ordered:
+                folder = stack.pop()
+                if folder not in submitted:
+                    submit(folder)
+                while folder not in pending:
+                    res = results.get()
+                    pending[res[0]] = res
+                res = pending.pop(folder)
+                submitted.discard(folder)
+            else:
+                res = results.get()
+                running -= 1
+
+            folder, dirs, files, exc = res
+            if exc is not None:
+                if not isinstance(exc, OSError):
+                    raise exc
+                if onerror is not None:
+                    onerror(exc)
+                continue
+
+            yield folder, dirs, files
+
+            children = [x.PATH for x in dirs if followlinks or not x.ISLINK]
+            if ordered:
+                stack.extend(reversed(children))
+                fill()
+            else:
+                for child in children:
+                    work.put(child)
+                running += len(children)
+    finally:
+        stop.set()
+        for _ in pool:
+            work.put(None)
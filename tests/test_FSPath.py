@@ -1,8 +1,13 @@
 # -*- coding: utf-8; mode: python -*-
 """test FSPath"""
 
+import io
+import os
+import time
 import uuid
+import shutil
 from fspath import FSPath, OS_ENV
+from fspath import delete, filecopy, walker
 
 TEST_DOWNLOAD_URL="https://git.kernel.org/cgit/linux/kernel/git/stable/linux-stable.git/plain/COPYING"
 MIN_FILESIZE=18000
@@ -37,3 +42,324 @@ def test_makedirs():
         foo.delete()
     assert foo.makedirs()
     assert not foo.makedirs()
+
+def test_STAT():
+    foo = TMP / 'foo.txt'
+    with foo.openTextFile(mode='wt') as f:
+        f.write(u'foo')
+    st = foo.STAT
+    assert st.EXISTS and st.ISFILE and not st.ISDIR and not st.ISLINK
+    assert st.SIZE == 3
+    assert foo.READABLE and foo.WRITEABLE
+    assert foo.ISFILE and foo.SIZE == 3
+
+    missing = TMP / 'missing.txt'
+    assert not missing.STAT.EXISTS
+    assert not missing.READABLE
+
+def test_STAT_cache():
+    foo = (TMP / 'foo.txt').cacheStat()
+    with foo.openTextFile(mode='wt') as f:
+        f.write(u'foo')
+    assert foo.SIZE == 3
+    with foo.openTextFile(mode='at') as f:
+        f.write(u'bar')
+    assert foo.SIZE == 3
+    foo.clearStat()
+    assert foo.SIZE == 6
+    foo.rmfile()
+    assert not foo.EXISTS
+
+TREE_FILES = ('a/foo.py', 'a/b/bar.py', 'a/.git/objects/x', 'c/baz.txt', 'top.py')
+WIDE_FILES = tuple('d%d/e%d/f%d' % (i % 5, i % 3, i) for i in range(60))
+
+def _mktree(top, files=TREE_FILES, links=None):
+    # a fresh tree with files of one byte and symbolic links {name: target}
+    if top.EXISTS:
+        top.rmtree()
+    for name in files:
+        (top / name).DIRNAME.makedirs()
+        with io.open(top / name, 'wb') as f:
+            f.write(b'x')
+    for name, target in (links or {}).items():
+        os.symlink(target, top / name)
+    return top
+
+def test_walk():
+    top = _mktree(TMP / 'tree')
+    visited = []
+    for folder, dirnames, filenames in top.walk():
+        if '.git' in dirnames:
+            dirnames.remove('.git')
+        visited.append(folder.relpath(top))
+        assert all(isinstance(x, FSPath) for x in dirnames + filenames)
+    assert sorted(visited) == ['.', 'a', 'a/b', 'c']
+
+def test_scan():
+    top = _mktree(TMP / 'tree')
+    files = []
+    for _folder, dirs, entries in top.scan():
+        dirs[:] = [d for d in dirs if d.name != '.git']
+        files.extend(x.PATH.relpath(top) for x in entries if x.ISFILE and x.STAT.SIZE == 1)
+    assert sorted(files) == ['a/b/bar.py', 'a/foo.py', 'c/baz.txt', 'top.py']
+
+    bottom_up = [folder.relpath(top) for folder, _d, _f in top.scan(topdown=False)]
+    assert bottom_up[-1] == '.'
+    assert bottom_up.index('a/b') < bottom_up.index('a')
+
+def test_reMatchFind():
+    top = _mktree(TMP / 'tree')
+    found = sorted(top.reMatchFind(r'.*\.py$', relpath=True))
+    assert found == ['a/b/bar.py', 'a/foo.py', 'top.py']
+
+def test_walk_workers():
+    top = _mktree(TMP / 'tree')
+    serial = [folder for folder, _d, _f in top.walk()]
+    ordered = [folder for folder, _d, _f in top.walk(workers=4, ordered=True)]
+    assert ordered == serial
+
+    visited = []
+    for folder, dirnames, _f in top.walk(workers=4):
+        if '.git' in dirnames:
+            dirnames.remove('.git')
+        visited.append(folder.relpath(top))
+    assert sorted(visited) == ['.', 'a', 'a/b', 'c']
+
+    found = sorted(top.reMatchFind(r'.*\.py$', relpath=True, workers=3))
+    assert found == ['a/b/bar.py', 'a/foo.py', 'top.py']
+
+def test_walk_workers_ahead(monkeypatch):
+    # the ordered walk lists at most maxsize folders ahead of the caller
+    top = TMP / 'wide'
+    if top.EXISTS:
+        top.rmtree()
+    for i in range(40):
+        os.makedirs(top / ('d%d' % i) / 'sub')
+    scanned = []
+    scan = walker._scanFolder  # pylint: disable=protected-access
+    def count(folder):
+        scanned.append(folder)
+        return scan(folder)
+    monkeypatch.setattr(walker, '_scanFolder', count)
+    serial = [folder for folder, _d, _f in walker.scanWalk(top)]
+    del scanned[:]
+    ordered = []
+    for folder, _d, _f in walker.parallelWalk(top, 4, ordered=True, maxsize=4):
+        time.sleep(0.001)
+        assert len(scanned) <= len(ordered) + 1 + 4 + 1
+        ordered.append(folder)
+    assert ordered == serial
+
+def test_reMatchFind_filter():
+    top = _mktree(TMP / 'tree')
+    found = sorted(top.reMatchFind(r'.*', relpath=True, exclude=['.git', '*.txt']))
+    assert found == ['a', 'a/b', 'a/b/bar.py', 'a/foo.py', 'c', 'top.py']
+
+    found = sorted(top.reMatchFind(r'.*', relpath=True, use_dirs=False, maxdepth=2, mindepth=2))
+    assert found == ['a/foo.py', 'c/baz.txt']
+
+    found = sorted(top.reMatchFind(r'.*', relpath=True, use_dirs=False, minsize=2))
+    assert found == []
+    found = sorted(top.reMatchFind(r'.*\.py$', relpath=True, predicate=lambda x: x.name != 'top.py'))
+    assert found == ['a/b/bar.py', 'a/foo.py']
+
+def test_div():
+    foo = FSPath('/foo/bar')
+    assert foo / 'baz' == '/foo/bar/baz'
+    assert foo / 'a/./b/' == '/foo/bar/a/b'
+    assert foo / '../baz' == '/foo/baz'
+    assert foo / 'a/../../baz' == '/foo/baz'
+    assert foo / '' == '/foo/bar'
+    assert FSPath('/') / 'foo' == '/foo'
+    assert FSPath('.') / 'foo' == 'foo'
+    assert isinstance(foo / 'baz', FSPath)
+    assert foo.DIRNAME == '/foo' and foo.BASENAME == 'bar'
+    assert FSPath('foo').DIRNAME == '.'
+
+def test_copyfile():
+    data = os.urandom(3 * 1024 * 1024 + 5)
+    src = TMP / 'copy_src.bin'
+    with io.open(src, 'wb') as f:
+        f.write(data)
+    os.chmod(src, 0o640)
+
+    dst = TMP / 'copy_dst.bin'
+    assert src.copyfile(dst) in filecopy.METHODS
+    with io.open(dst, 'rb') as f:
+        assert f.read() == data
+    assert os.stat(dst).st_mode & 0o777 == 0o640
+
+    # the fallbacks of the engine
+    funcs = [lambda s, d: filecopy._userspace(s, d, 0)]  # pylint: disable=protected-access
+    if hasattr(os, 'sendfile'):
+        funcs.append(lambda s, d: filecopy._kernelCopy(filecopy._sendfile, s, d, 0))  # pylint: disable=protected-access
+    for func in funcs:
+        with io.open(src, 'rb') as fsrc:
+            with io.open(dst, 'wb') as fdst:
+                func(fsrc.fileno(), fdst.fileno())
+        with io.open(dst, 'rb') as f:
+            assert f.read() == data
+
+    tree = TMP / 'copytree'
+    for folder in (tree, TMP / 'copytree2'):
+        if folder.EXISTS:
+            folder.rmtree()
+    (tree / 'a' / 'b').makedirs()
+    src.copyfile(tree / 'a' / 'b')
+    (TMP / 'copytree').copytree(TMP / 'copytree2')
+    with io.open(TMP / 'copytree2' / 'a' / 'b' / 'copy_src.bin', 'rb') as f:
+        assert f.read() == data
+
+    # same file, also as the folder which holds src
+    for target in (src, TMP):
+        try:
+            src.copyfile(target)
+            assert False, "shutil.Error expected"
+        except shutil.Error:
+            pass
+        with io.open(src, 'rb') as f:
+            assert f.read() == data
+
+def test_copytree():
+    src = TMP / 'tree_src'
+    dst = TMP / 'tree_dst'
+    for folder in (src, dst):
+        if folder.EXISTS:
+            folder.rmtree()
+    for i in range(40):
+        (src / ('d%d' % (i % 4)) / 'sub').makedirs()
+        with io.open(src / ('d%d' % (i % 4)) / 'sub' / ('f%d.txt' % i), 'wb') as f:
+            f.write(b'x' * i)
+    with io.open(src / 'skip.pyc', 'wb') as f:
+        f.write(b'')
+    os.symlink('d0', src / 'link')
+
+    ticks = []
+    methods = src.copytree(dst, symlinks=True, ignore=shutil.ignore_patterns('*.pyc'), jobs=3
+                           , ticker=lambda *args: ticks.append(args))
+    assert sum(methods.values()) == 40
+    assert len(ticks) == 40 and ticks[-1][1] == 40 and ticks[-1][3] == sum(range(40))
+    assert os.readlink(dst / 'link') == 'd0'
+    assert not (dst / 'skip.pyc').EXISTS
+    with io.open(dst / 'd3' / 'sub' / 'f39.txt', 'rb') as f:
+        assert f.read() == b'x' * 39
+
+    try:
+        src.copytree(dst)
+        assert False, "OSError expected"
+    except OSError:
+        pass
+    with io.open(src / 'd1' / 'new.txt', 'wb') as f:
+        f.write(b'new')
+    src.copytree(dst, symlinks=True, jobs=2, dirs_exist_ok=True)
+    assert (dst / 'd1' / 'new.txt').readFile() == 'new'
+
+    # a named pipe is an error, not a read blocking forever
+    if hasattr(os, 'mkfifo'):
+        os.mkfifo(src / 'd2' / 'fifo')
+        try:
+            src.copytree(dst, symlinks=True, jobs=2, dirs_exist_ok=True)
+            assert False, "shutil.Error expected"
+        except shutil.Error as exc:
+            errors = exc.args[0]
+            assert len(errors) == 1 and 'named pipe' in errors[0][2]
+        os.remove(src / 'd2' / 'fifo')
+
+    # a dangling symbolic link is an error of its own, the others are copied
+    os.symlink('missing', src / 'd0' / 'dangling')
+    for jobs in (1, 3):
+        dst.rmtree()
+        try:
+            src.copytree(dst, jobs=jobs)
+            assert False, "shutil.Error expected"
+        except shutil.Error as exc:
+            errors = exc.args[0]
+            # also found by the followed link to d0
+            assert sorted(x[0] for x in errors) == [src / 'd0' / 'dangling', src / 'link' / 'dangling']
+        with io.open(dst / 'd3' / 'sub' / 'f39.txt', 'rb') as f:
+            assert f.read() == b'x' * 39
+
+def test_rmtree(monkeypatch):
+    # the link to outside is removed, not followed
+    outside = _mktree(TMP / 'outside', ['keep'])
+    links = {'d0/link': outside}
+    for jobs in (1, 4):
+        tree = _mktree(TMP / 'rmtree', WIDE_FILES, links)
+        tree.rmtree(jobs=jobs)
+        assert not tree.EXISTS
+        assert (TMP / 'outside' / 'keep').EXISTS
+
+    # errors are reported like shutil.rmtree does
+    errors = []
+    (TMP / 'missing').rmtree(onerror=lambda *args: errors.append(args))
+    assert len(errors) == 1
+    (TMP / 'missing').rmtree(ignore_errors=True)
+
+    # a folder replaced after it has been listed is not cleared
+    if delete._supportsDirFd():  # pylint: disable=protected-access
+        real_open = os.open
+        moved = TMP / 'rmtree_moved'
+        def swap(name, flags, *args, **kwargs):
+            if name == 'd1' and not moved.EXISTS:
+                os.rename(tree / 'd1', moved)
+                os.mkdir(tree / 'd1')
+                with io.open(tree / 'd1' / 'keep', 'wb') as f:
+                    f.write(b'keep')
+            return real_open(name, flags, *args, **kwargs)
+        for jobs in (1, 4):
+            tree = _mktree(TMP / 'rmtree', WIDE_FILES, links)
+            if moved.EXISTS:
+                moved.rmtree()
+            errors = []
+            with monkeypatch.context() as patch:
+                patch.setattr(delete, '_supportsDirFd', lambda: True)
+                patch.setattr(os, 'open', swap)
+                tree.rmtree(jobs=jobs, onerror=lambda *args: errors.append(args))
+            assert errors and (tree / 'd1' / 'keep').EXISTS
+            tree.rmtree()
+        moved.rmtree()
+
+    tree = _mktree(TMP / 'rmtree', WIDE_FILES, links)
+    trash = tree.delete(background=True)
+    assert not tree.EXISTS
+    for _ in range(100):
+        if not trash.EXISTS:
+            break
+        time.sleep(0.1)
+    assert not trash.EXISTS
+
+    # only folders are renamed to the trash
+    fname = TMP / 'rmtree.txt'
+    with fname.openTextFile(mode='wt') as f:
+        f.write(u'x')
+    try:
+        fname.rmtree(background=True)
+        assert False, "OSError expected"
+    except OSError:
+        pass
+    assert fname.EXISTS
+    assert not list(TMP.glob('.rmtree.txt.*'))
+
+def test_rmtree_wide(monkeypatch):
+    # more folders than file descriptors
+    try:
+        import resource
+    except ImportError:
+        return
+    if not os.path.isdir('/proc/self/fd'):
+        return
+    monkeypatch.setattr(delete, 'MAX_OPEN_FOLDERS', 8, raising=False)
+    tree = TMP / 'rmtree_wide'
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    for jobs in (1, 4):
+        if tree.EXISTS:
+            tree.rmtree()
+        for i in range(300):
+            os.makedirs(tree / ('d%d' % i) / 'sub' / 'x')
+        limit = len(os.listdir('/proc/self/fd')) + 32
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(limit, soft), hard))
+        try:
+            tree.rmtree(jobs=jobs)
+        finally:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+        assert not tree.EXISTS
@@ -1,10 +1,12 @@
 # -*- coding: utf-8; mode: python -*-
 """test User Interface (sui)"""
 
+import six
 import time
 
 from fspath.sui import SUI, CONSOLE_TYPE
 from fspath.sui import ASCIITableFormatter, HTMLTableFormatter
+from fspath.progressbar import progressbar, ProgressBar
 
 #TMP = FSPath(OS_ENV.TEST_TEMPDIR)
 
@@ -17,6 +19,22 @@ def test_ask_choice():
     pass
 
 
+def test_progressbar():
+    out = six.StringIO()
+    bar = ProgressBar(barSize=20, pipe=out, interval=60)
+    for step in range(1, 10001):
+        bar.draw(step, 10000)
+    drawn = out.getvalue().split('\r')[1:]
+    # first and final step, nothing in between (interval)
+    assert len(drawn) == 2
+    assert drawn[-1].endswith('100%')
+
+    # the function draws on every call
+    out = six.StringIO()
+    for step in range(1, 11):
+        progressbar(step, 10, barSize=20, pipe=out)
+    assert len(out.getvalue().split('\r')[1:]) == 10
+
 def _test_choice():
     l = ['January', 'February', 'March', 'April', 'May', 'June'
          , 'July', 'August', 'September', 'October', 'November', 'December']
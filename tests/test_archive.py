@@ -0,0 +1,309 @@
+# -*- coding: utf-8; mode: python -*-
+"""test FSPath.extract & Co."""
+
+import io
+import os
+import sys
+import subprocess
+import zipfile
+import tarfile
+import zlib
+
+from fspath import FSPath, OS_ENV
+
+TMP = FSPath(OS_ENV.TEST_TEMPDIR)
+
+MEMBERS = [('pkg/',  b'')] + [
+    ('pkg/d%d/f%d.bin' % (i % 7, i), os.urandom(i * 97)) for i in range(1, 60)] + [
+        ('pkg/big.bin', os.urandom(2 * 1024 * 1024))]
+
+def _zip(fname):
+    with zipfile.ZipFile(fname, 'w', zipfile.ZIP_DEFLATED) as z:
+        for name, data in MEMBERS:
+            z.writestr(name, data)
+    return FSPath(fname)
+
+def _tar(fname, mode='w:gz'):
+    with tarfile.open(fname, mode) as t:
+        for name, data in MEMBERS:
+            info = tarfile.TarInfo(name.rstrip('/'))
+            if name.endswith('/'):
+                info.type = tarfile.DIRTYPE
+            info.size = len(data)
+            info.mtime = 1600000000
+            t.addfile(info, io.BytesIO(data))
+    return FSPath(fname)
+
+def _check(folder):
+    for name, data in MEMBERS:
+        if name.endswith('/'):
+            assert (folder / name).ISDIR
+        else:
+            with io.open(folder / name, 'rb') as f:
+                assert f.read() == data
+
+def _clean(folder):
+    if folder.EXISTS:
+        folder.rmtree()
+    return folder
+
+def test_extract():
+    for arch in (_zip(TMP / 'test.zip'), _tar(TMP / 'test.tar.gz')):
+        folder = _clean(TMP / 'extract')
+        members = arch.extract(folder)
+        assert len(members) == len(MEMBERS)
+        _check(folder)
+
+def test_extract_jobs():
+    arch   = _zip(TMP / 'test.zip')
+    folder = _clean(TMP / 'extract')
+    ticks  = []
+    members = arch.extract(folder, jobs=3, ticker=lambda *args: ticks.append(args))
+    assert sorted(m.name for m in members) == sorted(FSPath(x[0]) for x in MEMBERS)
+    assert [x[1] for x in ticks] == list(range(1, len(MEMBERS) + 1))
+    _check(folder)
+
+def test_extract_stream():
+    for arch in (_tar(TMP / 'test.tar.gz'), _tar(TMP / 'test.tar.xz', 'w:xz'), _zip(TMP / 'test.zip')):
+        folder = _clean(TMP / 'extract')
+        ticks  = []
+        members = arch.extract(folder, stream=True, ticker=lambda *args: ticks.append(args))
+        assert not (folder / 'pkg').EXISTS  # nothing extracted before the generator is consumed
+        names = []
+        for m in members:
+            names.append(m.name)
+            if m.ISTAR:
+                assert len(m.archive.members) == 0
+        assert names == [FSPath(x[0]) for x in MEMBERS]
+        assert len(ticks) == len(MEMBERS)
+        _check(folder)
+
+def test_extract_incremental():
+    for arch in (_zip(TMP / 'test.zip'), _tar(TMP / 'test.tar.gz')):
+        for kwargs in ({}, {'jobs': 2}, {'stream': True}):
+            folder = _clean(TMP / 'extract')
+            list(arch.extract(folder, incremental=True, **kwargs))
+            changed = folder / MEMBERS[3][0]
+            with io.open(changed, 'wb') as f:
+                f.write(b'x' * len(MEMBERS[3][1]))
+            if arch.ISTAR:
+                # same size and mtime: not detected
+                os.utime(changed, (0, 1600000000))
+            else:
+                # mtime differs: detected by the CRC
+                os.utime(changed, (0, 1000000000))
+            stale = folder / 'pkg' / 'stale' / 'foo.txt'
+            stale.DIRNAME.makedirs()
+            with io.open(stale, 'wb') as f:
+                f.write(b'stale')
+
+            members = list(arch.extract(folder, incremental=True, prune=True, **kwargs))
+            skipped = [m.name for m in members if m.skipped]
+            expected = len(MEMBERS) - 2 if arch.ISZIP else len(MEMBERS) - 1
+            assert len(skipped) == expected, (arch, kwargs)
+            if arch.ISZIP:
+                _check(folder)
+            assert not stale.EXISTS and not stale.DIRNAME.EXISTS
+
+    # the archive in the folder is not pruned
+    for kwargs in ({}, {'stream': True}):
+        folder = _clean(TMP / 'extract')
+        folder.makedirs()
+        arch = _zip(folder / 'test.zip')
+        list(arch.extract(folder, prune=True, **kwargs))
+        assert arch.EXISTS
+
+def test_extract_prune_cli():
+    folder = _clean(TMP / 'extract')
+    folder.makedirs()
+    _zip(folder / 'test.zip')
+    with io.open(folder / 'other.txt', 'wb') as f:
+        f.write(b'other')
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    cmd = [sys.executable, '-m', 'fspath.main', 'extract', 'test.zip']
+    assert subprocess.call(cmd + ['--prune'], cwd=folder, env=env, stderr=subprocess.PIPE) == 42
+    assert sorted(os.listdir(folder)) == ['other.txt', 'test.zip']
+    assert subprocess.call(cmd + ['.', '--prune'], cwd=folder, env=env) == 0
+    assert sorted(os.listdir(folder)) == ['pkg', 'test.zip']
+
+def test_extract_select():
+    import re
+    for arch in (_zip(TMP / 'test.zip'), _tar(TMP / 'test.tar.gz')):
+        for kwargs in ({}, {'jobs': 2}, {'stream': True}):
+            folder = _clean(TMP / 'extract')
+            members = list(arch.extract(folder, include='pkg/d1/*', exclude=['*/f8.bin'], **kwargs))
+            assert sorted(m.name for m in members) == sorted(
+                FSPath(x[0]) for x in MEMBERS if x[0].startswith('pkg/d1/') and not x[0].endswith('f8.bin'))
+            assert not (folder / 'pkg' / 'big.bin').EXISTS
+
+            folder = _clean(TMP / 'extract')
+            members = list(arch.extract(folder, members=['pkg/big.bin'], include=re.compile('.*bin$'), **kwargs))
+            assert [m.name for m in members] == ['pkg/big.bin']
+            assert (folder / 'pkg' / 'big.bin').SIZE == len(MEMBERS[-1][1])
+
+def _syncGzip(fname, flush_size=128 * 1024):
+    # gzip with byte aligned flush points (like pigz or gzip --rsyncable)
+    with io.open(_tar(TMP / 'sync.tar', 'w'), 'rb') as f:
+        data = f.read()
+    c = zlib.compressobj(6, zlib.DEFLATED, 31)
+    with io.open(fname, 'wb') as f:
+        for i in range(0, len(data), flush_size):
+            f.write(c.compress(data[i:i + flush_size]) + c.flush(zlib.Z_SYNC_FLUSH))
+        f.write(c.flush())
+    return FSPath(fname)
+
+def test_openArchiveMember(monkeypatch):
+    import errno
+    from fspath.tarindex import TarIndex, INDEX_SUFFIX
+    archives = [_zip(TMP / 'test.zip'), _tar(TMP / 'test.tar'), _tar(TMP / 'test.tar.gz')
+                , _syncGzip(TMP / 'sync.tar.gz')]
+    try:
+        archives.append(_tar(TMP / 'test.tar.xz', 'w:xz'))
+    except tarfile.CompressionError:
+        pass  # no lzma
+    for arch in archives:
+        for index in (False, True):
+            for name, data in MEMBERS[1::10] + MEMBERS[-1:]:
+                with arch.openArchiveMember(name, index=index) as f:
+                    assert f.read() == data
+        if arch.ISTAR:
+            assert (arch + INDEX_SUFFIX).EXISTS
+        try:
+            arch.openArchiveMember('pkg/missing')
+            assert False, "KeyError expected"
+        except KeyError:
+            pass
+
+    # checkpoints at the flush points, the index is renewed if the archive changes
+    arch = TMP / 'sync.tar.gz'
+    idx = TarIndex.build(arch, span=256 * 1024)
+    assert len(idx.checkpoints) > 5
+    assert TarIndex.load(arch).checkpoints == idx.checkpoints
+    for name, data in MEMBERS[1:]:
+        with idx.open(name) as f:
+            assert f.read() == data
+    _tar(arch)
+    assert TarIndex.load(arch) is None
+
+    # the index can't be saved (e.g. read-only folder): used from memory,
+    # only an explicit build fails
+    def save(_self):
+        raise OSError(errno.EROFS, 'Read-only file system')
+    monkeypatch.setattr(TarIndex, 'save', save)
+    with arch.openArchiveMember(MEMBERS[1][0]) as f:
+        assert f.read() == MEMBERS[1][1]
+    try:
+        TarIndex.build(arch)
+        assert False, "OSError expected"
+    except OSError:
+        pass
+
+def test_openMember():
+    from fspath.archive import MemoryReader
+    arch = TMP / 'stored.zip'
+    with zipfile.ZipFile(arch, 'w') as z:
+        for name, data in MEMBERS:
+            z.writestr(name, data, zipfile.ZIP_STORED if len(data) % 2 else zipfile.ZIP_DEFLATED)
+    arch = FSPath(arch)
+    for name, data in MEMBERS[1:]:
+        with arch.openMember(name) as f:
+            assert isinstance(f, MemoryReader) == bool(len(data) % 2)
+            assert f.read() == data
+    with arch.openMember(MEMBERS[1][0]) as f:
+        assert f.getbuffer() == MEMBERS[1][1]
+        f.seek(-10, io.SEEK_END)
+        assert f.read() == MEMBERS[1][1][-10:]
+
+    for arch in (arch, _tar(TMP / 'test.tar.gz')):
+        read = {}
+        for member in arch.iterMembers(exclude='*/d3/*'):
+            f = member.open()
+            if f is not None:
+                read[member.name] = f.read()
+        assert read == dict((k, v) for k, v in MEMBERS[1:] if '/d3/' not in k)
+        try:
+            arch.openMember('pkg/missing')
+            assert False, "KeyError expected"
+        except KeyError:
+            pass
+
+    # the archive is closed with the member (or on error)
+    if os.path.isdir('/proc/self/fd'):
+        fds = len(os.listdir('/proc/self/fd'))
+        for arch in (TMP / 'stored.zip', _tar(TMP / 'noindex.tar.gz')):
+            for name, data in MEMBERS[1:4]:
+                with arch.openMember(name) as f:
+                    assert f.read() == data
+            for name in ('pkg/missing', 'pkg'):
+                try:
+                    arch.openMember(name)
+                    assert False, "KeyError expected"
+                except KeyError:
+                    pass
+        assert len(os.listdir('/proc/self/fd')) == fds
+
+def test_compress(monkeypatch):
+    from fspath import compress
+    from fspath.compress import crc32Combine
+    from fspath.tarindex import TarIndex
+    a, b = os.urandom(1000), os.urandom(777)
+    assert crc32Combine(zlib.crc32(a) & 0xffffffff, zlib.crc32(b) & 0xffffffff, len(b)) == (
+        zlib.crc32(a + b) & 0xffffffff)
+
+    src = _clean(TMP / 'compress')
+    _zip(TMP / 'test.zip').extract(src)
+    src = src / 'pkg'
+    formats = ['zip', 'tar.gz', 'tar']
+    try:
+        import lzma  # pylint: disable=unused-import
+        formats.append('tar.xz')
+    except ImportError:
+        pass
+    for fmt in formats:
+        for jobs in (1, 2):
+            arch = TMP / ('compressed.' + fmt)
+            ticks = []
+            names = src.compress(arch, jobs=jobs, ticker=lambda *args: ticks.append(args))
+            assert len(names) == len(ticks)
+            assert set(x[0].rstrip('/') for x in MEMBERS) < set(names)
+            if arch.ISZIP:
+                assert zipfile.ZipFile(arch).testzip() is None
+            folder = _clean(TMP / 'extract')
+            arch.extract(folder)
+            _check(folder)
+    # the sync flush points of a parallel .tar.gz are checkpoints of the seek index
+    arch = TMP / 'compressed.tar.gz'
+    assert len(TarIndex.build(arch, span=256 * 1024).checkpoints) > 1
+
+    # symbolic links are stored as links, a dangling link is no error
+    if hasattr(os, 'symlink'):
+        src = _clean(TMP / 'compress-links')
+        src.makedirs()
+        with (src / 'file.txt').openTextFile('w') as f:
+            f.write(u'data')
+        os.symlink('missing.txt', src / 'dangling')
+        os.symlink('file.txt', src / 'link')
+        for fmt in ('zip', 'tar'):
+            arch = TMP / ('links.' + fmt)
+            src.compress(arch)
+            if arch.ISZIP:
+                with zipfile.ZipFile(arch) as arc:
+                    for name, target in (('dangling', b'missing.txt'), ('link', b'file.txt')):
+                        info = arc.getinfo('compress-links/' + name)
+                        assert (info.external_attr >> 16) & 0o170000 == 0o120000
+                        assert arc.read(info) == target
+            else:
+                with tarfile.open(arch) as arc:
+                    assert arc.getmember('compress-links/dangling').linkname == 'missing.txt'
+                    assert arc.getmember('compress-links/link').issym()
+
+    # no temporary file left behind when the pool can't be started
+    def pool(_jobs):
+        raise OSError('no threads')
+    monkeypatch.setattr(compress, '_pool', pool)
+    try:
+        src.compress(TMP / 'failed.zip', jobs=2)
+        assert False, "OSError expected"
+    except OSError:
+        pass
+    assert not list(TMP.glob('.failed.zip.*'))
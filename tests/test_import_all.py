@@ -1,17 +1,38 @@
 # -*- coding: utf-8; mode: python -*-
 """test OS_ENV"""
 
+import sys
+import subprocess
+
+from fspath.archive import *
+from fspath.cache import *
+from fspath.compress import *
 from fspath.cli import *
+from fspath.delete import *
 from fspath.fspath import *
+from fspath.download import *
+from fspath.filecopy import *
+from fspath.fsstat import *
 from fspath.helper import *
 from fspath.main import *
 from fspath.os_env import *
 from fspath.progressbar import *
+from fspath.walker import *
 from fspath.win import *
 from fspath._which import *
 from fspath.sui import *
+from fspath.tarindex import *
 
 def test_import_all():
     # import *all* names from origin modules (see imports above on module level)
     pass
 
+
+def test_lazy_import():
+    # a plain 'import fspath' should not load the heavy modules
+    if sys.version_info < (3, 7):
+        return  # no PEP 562
+    heavy = ('argparse', 'zipfile', 'tarfile', 'shutil', 'subprocess', 'platform', 'urllib.request')
+    code = "import sys, fspath; print(' '.join(m for m in %r if m in sys.modules))" % (heavy,)
+    out = subprocess.check_output([sys.executable, '-c', code], universal_newlines=True)
+    assert out.split() == []
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; mode: python -*-
+u"""
+import time benchmark of the fspath package
+
+Starts ``python -c "import fspath"`` N times in a fresh interpreter and prints
+the wall time (min / mean) of the import.  With ``--importtime`` the slowest
+modules reported by ``python -X importtime`` are listed::
+
+    python utils/bench_import.py -n 50 --importtime
+"""
+# pylint: disable=invalid-name
+
+import sys
+import os
+import argparse
+import subprocess
+
+BENCH = (
+    "import time; t = time.time(); import %s; "
+    "print('%%.6f' %% (time.time() - t))")
+
+def bench(module, count):
+    u"""Returns list of import times (in sec.) of ``module``"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))]
+        + [x for x in [env.get('PYTHONPATH')] if x])
+    times = []
+    for _ in range(count):
+        out = subprocess.check_output([sys.executable, '-c', BENCH % module], env=env)
+        times.append(float(out.strip()))
+    return times
+
+def importtime(module, top):
+    u"""Returns the ``top`` slowest (cumulative) imports of ``module``"""
+    out = subprocess.check_output(
+        [sys.executable, '-X', 'importtime', '-c', 'import %s' % module]
+        , stderr=subprocess.STDOUT, universal_newlines=True)
+    rows = []
+    for line in out.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _self, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative), name.rstrip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+def main():
+    u"""import time benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("module", nargs="?", default="fspath")
+    parser.add_argument("-n", type=int, default=20, help="number of runs")
+    parser.add_argument("--importtime", action="store_true", help="list the slowest imports")
+    parser.add_argument("--top", type=int, default=15, help="number of imports listed")
+    args = parser.parse_args()
+
+    times = bench(args.module, args.n)
+    print("import %s: min %.2f ms / mean %.2f ms (%d runs)" % (
+        args.module, min(times) * 1000, sum(times) / len(times) * 1000, len(times)))
+
+    if args.importtime:
+        for cumulative, name in importtime(args.module, args.top):
+            print("%10.2f ms | %s" % (cumulative / 1000.0, name))
+
+if __name__ == '__main__':
+    sys.exit(main())